@@ -0,0 +1,64 @@
+"""
+Times a numeric constraint guard over 10^4 candidate nodes,
+tested per node, and as a batch
+"""
+import unittest
+from unittest import mock
+
+import logging
+import timeit
+
+import acab
+config = acab.setup()
+
+import acab.core.util.vectorise as VEC
+from acab.core.data.node import AcabNode
+from acab.core.data.production_abstractions import ProductionComponent
+from acab.core.data.values import AcabValue, Sentence
+from acab.error.semantic_exception import AcabSemanticTestFailure
+from acab.modules.context.constraints import ConstraintCollection
+from acab.modules.context.context_set import ContextInstance
+from acab.modules.values.numbers.query_operators import GT, LT
+
+CONSTRAINT_V = config.prepare("Value.Structure", "CONSTRAINT")()
+
+NODE_COUNT = 10 ** 4
+
+
+class Constraint_Timing_Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.types = mock.patch.object(AcabValue, "_value_types", AcabValue._value_types | {int})
+        self.types.start()
+
+    def tearDown(self):
+        self.types.stop()
+
+    def test_time_numeric_guard(self):
+        ops  = ContextInstance(data={str(Sentence.build(["GT"])): GT(),
+                                     str(Sentence.build(["LT"])): LT()})
+        word = Sentence.build(["x"])[0]
+        word.data[CONSTRAINT_V] = [ProductionComponent("gt", Sentence.build(["GT"]), [AcabValue.safe_make(100)]),
+                                   ProductionComponent("lt", Sentence.build(["LT"]), [AcabValue.safe_make(200)])]
+        constraints = ConstraintCollection.build(word, operators=ops)
+        nodes       = [AcabNode(AcabValue.safe_make(x)) for x in range(NODE_COUNT)]
+        ctx         = ContextInstance()
+
+        def per_node():
+            passed = []
+            for node in nodes:
+                try:
+                    constraints.test(node, ctx)
+                    passed.append(node)
+                except AcabSemanticTestFailure:
+                    pass
+            return passed
+
+        self.assertEqual(len(per_node()), 99)
+        self.assertEqual(sum(constraints.test_all(nodes, ctx)), 99)
+        node_time  = timeit.timeit(per_node, number=10)
+        batch_time = timeit.timeit(lambda: constraints.test_all(nodes, ctx), number=10)
+        logging.warning("{} Nodes (numpy: {}): 10 Per Node {:.4f}, 10 Batched {:.4f}".format(NODE_COUNT,
+                                                                                           VEC.np is not None,
+                                                                                           node_time,
+                                                                                           batch_time))
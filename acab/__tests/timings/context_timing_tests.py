@@ -0,0 +1,86 @@
+"""
+Times ContextSet bookkeeping with 10^5 live contexts:
+pushing, clearing the active queue per query word, popping, and selecting subctxs
+"""
+import unittest
+
+import logging
+import timeit
+
+import acab
+config = acab.setup()
+
+from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.values import Sentence
+from acab.modules.context.context_set import ContextInstance, ContextSet
+from acab.modules.semantics.dependent import BreadthTrieSemantics
+from acab.modules.semantics.independent import BasicNodeSemantics
+
+BIND_V = config.prepare("Value.Structure", "BIND")()
+
+CONTEXT_COUNT = 10 ** 5
+WORD_COUNT    = 5
+
+def S(*words):
+    return Sentence.build(words)
+
+
+class Context_Timing_Tests(unittest.TestCase):
+
+    def _filled(self):
+        ctxs = ContextSet()
+        ctxs.pop()
+        ctxs.push([ContextInstance() for x in range(CONTEXT_COUNT)])
+        return ctxs
+
+    def test_time_push_and_pop(self):
+        ctxs      = ContextSet()
+        instances = [ContextInstance() for x in range(CONTEXT_COUNT)]
+        ctxs.pop()
+        push_time = timeit.timeit(lambda: ctxs.push(instances), number=1)
+        self.assertEqual(len(ctxs), CONTEXT_COUNT)
+
+        def pop_all():
+            while bool(ctxs):
+                ctxs.pop()
+
+        pop_time = timeit.timeit(pop_all, number=1)
+        self.assertEqual(len(ctxs), 0)
+        logging.warning("{} Contexts: Push {:.4f}, Pop {:.4f}".format(CONTEXT_COUNT, push_time, pop_time))
+
+    def test_time_generations(self):
+        """ A query's bookkeeping: each word takes the active contexts
+        and pushes their extensions """
+        ctxs = self._filled()
+
+        def query_words():
+            for word in range(WORD_COUNT):
+                ctxs.push([x.copy() for x in ctxs.active_list(clear=True)])
+
+        generation_time = timeit.timeit(query_words, number=1)
+        self.assertEqual(len(ctxs), CONTEXT_COUNT)
+        self.assertEqual(len(ctxs._total), CONTEXT_COUNT * (WORD_COUNT + 1) + 1)
+        logging.warning("{} Contexts: {} Generations {:.4f}".format(CONTEXT_COUNT, WORD_COUNT, generation_time))
+
+    def test_time_subctx(self):
+        ctxs  = self._filled()
+        roots = [x.id for x in ctxs.active_list()[:100]]
+        ctxs.push([x.copy() for x in ctxs.active_list(clear=True)])
+        sub_time = timeit.timeit(lambda: ctxs.subctx(roots), number=10)
+        self.assertEqual(len(ctxs.subctx(roots)), 100)
+        logging.warning("{} Contexts: 10 Subctxs of 100 {:.4f}".format(CONTEXT_COUNT, sub_time))
+
+    def test_time_query(self):
+        node_sem = BasicNodeSemantics().as_handler("_:node")
+        trie_sem = BreadthTrieSemantics(default=node_sem)
+        struct   = BasicNodeStruct.build_default()
+        trie_sem.insert_many([S("a", f"group_{i % 100}", f"sen_{i}")
+                              for i in range(CONTEXT_COUNT)], struct)
+        query_sen = S("a", "x", "y")
+        query_sen[1].data[BIND_V] = True
+        query_sen[2].data[BIND_V] = True
+
+        ctxs       = ContextSet.build()
+        query_time = timeit.timeit(lambda: trie_sem.query(query_sen, struct, ctxs=ctxs), number=1)
+        self.assertEqual(len(ctxs), CONTEXT_COUNT)
+        logging.warning("{} Contexts: Query {:.4f}".format(CONTEXT_COUNT, query_time))
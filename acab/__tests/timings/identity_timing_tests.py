@@ -0,0 +1,73 @@
+"""
+Compares eager uuid1 identities against the default lazy counter identities,
+for bulk trie insertion and querying
+"""
+import unittest
+
+import logging
+import timeit
+
+import acab
+config = acab.setup()
+
+from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.values import Sentence
+from acab.core.util.identity import CounterIdentity, UUIDIdentity, set_provider
+from acab.modules.context.context_set import ContextSet
+from acab.modules.semantics.dependent import BreadthTrieSemantics
+from acab.modules.semantics.independent import BasicNodeSemantics
+
+BIND_V = config.prepare("Value.Structure", "BIND")()
+
+SENTENCE_COUNT = 500
+
+def S(*words):
+    return Sentence.build(words)
+
+
+class Identity_Timing_Tests(unittest.TestCase):
+
+    def setUp(self):
+        node_sem      = BasicNodeSemantics().as_handler("_:node")
+        self.trie_sem = BreadthTrieSemantics(default=node_sem)
+
+    def tearDown(self):
+        set_provider(CounterIdentity())
+
+    def _insert_all(self):
+        struct = BasicNodeStruct.build_default()
+        for i in range(SENTENCE_COUNT):
+            self.trie_sem.insert(S("a", "test", f"sen_{i}", "end"), struct)
+
+        return struct
+
+    def _query_all(self, struct):
+        query_sen = S("a", "test", "x", "end")
+        query_sen[2].data[BIND_V] = True
+        ctxs = ContextSet.build()
+        self.trie_sem.query(query_sen, struct, ctxs=ctxs)
+        return ctxs
+
+    def _time(self, provider):
+        set_provider(provider)
+        insert_time = timeit.timeit(self._insert_all, number=5)
+        struct      = self._insert_all()
+        query_time  = timeit.timeit(lambda: self._query_all(struct), number=5)
+        return insert_time, query_time
+
+    def test_time_identity_providers(self):
+        eager_insert, eager_query = self._time(UUIDIdentity())
+        lazy_insert, lazy_query   = self._time(CounterIdentity())
+
+        # TODO Record this and check for regressions
+        logging.warning("UUID    Identity: Insert {:.4f}, Query {:.4f}".format(eager_insert, eager_query))
+        logging.warning("Counter Identity: Insert {:.4f}, Query {:.4f}".format(lazy_insert, lazy_query))
+
+    def test_query_results_unchanged(self):
+        set_provider(UUIDIdentity())
+        eager = self._query_all(self._insert_all())
+        set_provider(CounterIdentity())
+        lazy  = self._query_all(self._insert_all())
+
+        self.assertEqual(len(eager), SENTENCE_COUNT)
+        self.assertEqual(len(lazy), SENTENCE_COUNT)
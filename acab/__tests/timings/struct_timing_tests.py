@@ -0,0 +1,76 @@
+"""
+Compares BasicNodeStruct against CompactNodeStruct,
+for memory use and insertion time of the same facts
+"""
+import unittest
+
+import logging
+import timeit
+import tracemalloc
+
+import acab
+config = acab.setup()
+
+from acab.core.data.acab_struct import BasicNodeStruct, CompactNodeStruct
+from acab.core.data.values import Sentence
+from acab.modules.semantics.dependent import BreadthTrieSemantics
+from acab.modules.semantics.independent import (BasicNodeSemantics,
+                                                CompactNodeSemantics)
+
+SENTENCE_COUNT = 2000
+
+def S(*words):
+    return Sentence.build(words)
+
+
+class Struct_Timing_Tests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sentences = [S("a", f"group_{i % 50}", f"sen_{i}", "end") for i in range(SENTENCE_COUNT)]
+
+    def _measure(self, trie_sem, build_struct):
+        tracemalloc.start()
+        struct = build_struct()
+        for sen in self.sentences:
+            trie_sem.insert(sen, struct)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        def insert_all():
+            struct = build_struct()
+            for sen in self.sentences:
+                trie_sem.insert(sen, struct)
+
+        insert_time = timeit.timeit(insert_all, number=3)
+        return size, insert_time, struct
+
+    def test_node_struct_memory(self):
+        basic_sem   = BreadthTrieSemantics(default=BasicNodeSemantics().as_handler("_:node"))
+        compact_sem = BreadthTrieSemantics(default=CompactNodeSemantics().as_handler("_:node"))
+
+        basic_size, basic_time, basic     = self._measure(basic_sem, BasicNodeStruct.build_default)
+        compact_size, compact_time, compact = self._measure(compact_sem, CompactNodeStruct.build_default)
+
+        # TODO Record this and check for regressions
+        logging.warning("Basic   Struct: {} nodes, {} bytes, Insert {:.4f}".format(len(basic), basic_size, basic_time))
+        logging.warning("Compact Struct: {} nodes, {} bytes, Insert {:.4f}".format(len(compact), compact_size, compact_time))
+        self.assertEqual(len(basic), len(compact))
+
+    def test_insert_many(self):
+        trie_sem = BreadthTrieSemantics(default=BasicNodeSemantics().as_handler("_:node"))
+
+        def one_by_one():
+            struct = BasicNodeStruct.build_default()
+            for sen in self.sentences:
+                trie_sem.insert(sen, struct)
+
+        def batched():
+            struct = BasicNodeStruct.build_default()
+            trie_sem.insert_many(self.sentences, struct)
+
+        single_time = timeit.timeit(one_by_one, number=3)
+        batch_time  = timeit.timeit(batched, number=3)
+
+        # TODO Record this and check for regressions
+        logging.warning("Insert: {:.4f}, Insert Many: {:.4f}".format(single_time, batch_time))
@@ -0,0 +1,124 @@
+#https://docs.python.org/3/library/unittest.html
+from os.path import splitext, split
+import unittest
+import logging as root_logger
+logging = root_logger.getLogger(__name__)
+
+import acab
+config = acab.setup()
+
+from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.change_log import ChangeLog
+from acab.core.data.values import Sentence
+from acab.error.acab_exception import AcabException
+from acab.modules.semantics.dependent import BreadthTrieSemantics
+from acab.modules.semantics.independent import ExclusionNodeSemantics
+
+EXOP          = config.prepare("MODAL", "exop")()
+EXOP_enum     = config.prepare(EXOP, as_enum=True)()
+NEGATION_S    = config.prepare("Value.Structure", "NEGATION")()
+
+def S(*words):
+    return Sentence.build(words)
+
+class ChangeLogTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        LOGLEVEL = root_logger.DEBUG
+        LOG_FILE_NAME = "log.{}".format(splitext(split(__file__)[1])[0])
+        root_logger.basicConfig(filename=LOG_FILE_NAME, level=LOGLEVEL, filemode='w')
+
+        console = root_logger.StreamHandler()
+        console.setLevel(root_logger.INFO)
+        root_logger.getLogger('').addHandler(console)
+        logging = root_logger.getLogger(__name__)
+
+    def setUp(self):
+        self.trie_sem = BreadthTrieSemantics(default=ExclusionNodeSemantics().as_handler("_:node"))
+        self.struct   = BasicNodeStruct.build_default()
+        self.log      = ChangeLog.attach(self.struct)
+
+    def sentences(self):
+        return sorted([str(x) for x in self.trie_sem.to_sentences(self.struct)])
+
+    def test_attach(self):
+        self.assertIs(ChangeLog.attach(self.struct), self.log)
+        self.assertIn('change_log', self.struct.components)
+
+    def test_no_logging_without_checkpoint(self):
+        self.trie_sem.insert(S("a", "b"), self.struct)
+        self.assertEqual(len(self.log), 0)
+
+    def test_rewind_insert(self):
+        self.trie_sem.insert(S("a", "b"), self.struct)
+        self.log.checkpoint()
+        self.trie_sem.insert(S("a", "c", "d"), self.struct)
+        self.assertEqual(len(self.log), 2)
+
+        self.assertEqual(self.log.rewind(self.struct), 2)
+        self.assertEqual(self.sentences(), ["_:a.b"])
+        self.assertEqual(len(self.log), 0)
+
+    def test_rewind_exclusion(self):
+        sen = S("a", "b", "c")
+        sen[1].data[EXOP] = EXOP_enum.EX
+        self.trie_sem.insert(sen, self.struct)
+        self.log.checkpoint()
+
+        replacement = S("a", "b", "d")
+        replacement[1].data[EXOP] = EXOP_enum.EX
+        self.trie_sem.insert(replacement, self.struct)
+        self.assertEqual(self.sentences(), ["_:a.b.d"])
+
+        self.log.rewind(self.struct)
+        self.assertEqual(self.sentences(), ["_:a.b.c"])
+
+    def test_rewind_delete(self):
+        self.trie_sem.insert(S("a", "b", "c"), self.struct)
+        self.trie_sem.insert(S("a", "b", "d"), self.struct)
+        self.log.checkpoint()
+
+        negated = S("a", "b")
+        negated.data[NEGATION_S] = True
+        self.trie_sem.insert(negated, self.struct)
+        self.assertEqual(self.sentences(), ["_:a"])
+
+        self.log.rewind(self.struct)
+        self.assertEqual(self.sentences(), ["_:a.b.c", "_:a.b.d"])
+        # Indexes are restored
+        word_index = self.struct.components['word_index']
+        self.assertEqual(len(word_index.get(S("c")[0].key, root=self.struct.root)), 1)
+
+    def test_rewind_named_and_nth(self):
+        self.log.checkpoint("start")
+        self.trie_sem.insert(S("a"), self.struct)
+        self.log.checkpoint()
+        self.trie_sem.insert(S("b"), self.struct)
+        self.log.checkpoint()
+        self.trie_sem.insert(S("c"), self.struct)
+
+        self.log.rewind(self.struct, 2)
+        self.assertEqual(self.sentences(), ["_:a"])
+        self.assertEqual(len(self.log.checkpoints), 2)
+
+        self.log.rewind(self.struct, "start")
+        self.assertEqual(self.sentences(), [])
+        self.assertEqual(len(self.log.checkpoints), 1)
+
+    def test_rewind_repeatedly(self):
+        self.trie_sem.insert(S("a"), self.struct)
+        self.log.checkpoint()
+        for branch in ["b", "c", "d"]:
+            self.trie_sem.insert(S("a", branch), self.struct)
+            self.assertEqual(self.sentences(), [f"_:a.{branch}"])
+            self.log.rewind(self.struct)
+            self.assertEqual(self.sentences(), ["_:a"])
+
+    def test_rewind_without_checkpoint(self):
+        with self.assertRaises(AcabException):
+            self.log.rewind(self.struct)
+
+
+if __name__ == '__main__':
+    unittest.main()
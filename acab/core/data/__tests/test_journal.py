@@ -0,0 +1,194 @@
+#https://docs.python.org/3/library/unittest.html
+from os.path import splitext, split, join, getsize, dirname, abspath
+import subprocess
+import sys
+import tempfile
+import unittest
+import logging as root_logger
+logging = root_logger.getLogger(__name__)
+
+import acab
+config = acab.setup()
+
+from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.journal import (DELETE_OP, INSERT_OP, Journal,
+                                    decode_sentence, encode_sentence)
+from acab.core.data.values import AcabValue, Sentence, SymbolTable
+from acab.core.util.identity import next_id
+from acab.modules.semantics.dependent import BreadthTrieSemantics
+from acab.modules.semantics.independent import ExclusionNodeSemantics
+
+EXOP          = config.prepare("MODAL", "exop")()
+EXOP_enum     = config.prepare(EXOP, as_enum=True)()
+NEGATION_S    = config.prepare("Value.Structure", "NEGATION")()
+
+PACKAGE_ROOT  = abspath(join(dirname(__file__), "..", "..", "..", ".."))
+
+# Records a journal from a fresh process,
+# which interns names in a different order to the test process
+RECORD_SCRIPT = """
+import sys
+import acab
+acab.setup()
+from acab.core.data.journal import Journal
+from acab.core.data.values import Sentence, SymbolTable
+
+for x in range(50):
+    SymbolTable.intern(f"padding_{x}")
+journal = Journal(sys.argv[1], compact_every=0).open()
+journal.record(Sentence.build(["journal", "plain"]))
+journal.record(Sentence.build(["journal", "statement"]).attach_statement(Sentence.build(["inner", "words"])))
+pickled = Sentence.build(["journal", "pickled"])
+pickled.data["extra"] = ["not", "encodable"]
+journal.record(pickled)
+journal.close()
+"""
+
+def S(*words):
+    return Sentence.build(words)
+
+class JournalTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        LOGLEVEL = root_logger.DEBUG
+        LOG_FILE_NAME = "log.{}".format(splitext(split(__file__)[1])[0])
+        root_logger.basicConfig(filename=LOG_FILE_NAME, level=LOGLEVEL, filemode='w')
+
+        console = root_logger.StreamHandler()
+        console.setLevel(root_logger.INFO)
+        root_logger.getLogger('').addHandler(console)
+        logging = root_logger.getLogger(__name__)
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.journal  = join(self.temp_dir.name, "test.journal")
+        self.snapshot = join(self.temp_dir.name, "test.snapshot")
+        self.trie_sem = BreadthTrieSemantics(default=ExclusionNodeSemantics().as_handler("_:node"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def sentences(self, struct):
+        return [str(x) for x in self.trie_sem.to_sentences(struct)]
+
+    def test_encode_round_trip(self):
+        sen = S("a", "test", "sentence")
+        sen[1].data[EXOP] = EXOP_enum.EX
+        form, payload = encode_sentence(sen)
+        decoded = decode_sentence(form, payload)
+        self.assertEqual(decoded, sen)
+        self.assertEqual(decoded[1].data[EXOP], EXOP_enum.EX)
+
+    def test_encode_statement(self):
+        sen = S("a", "statement").attach_statement(S("other", "sentence"))
+        decoded = decode_sentence(*encode_sentence(sen))
+        self.assertEqual(str(decoded), str(sen))
+
+    def test_replay_from_other_process(self):
+        subprocess.run([sys.executable, "-c", RECORD_SCRIPT, self.journal],
+                       cwd=PACKAGE_ROOT, check=True, capture_output=True)
+        journal = Journal(self.journal, compact_every=0)
+        before  = next_id()
+        entries = [x[1] for x in journal.entries()]
+        self.assertEqual(entries[:1] + entries[2:],
+                         [S("journal", "plain"), S("journal", "pickled")])
+        self.assertEqual(entries[1][:-1], S("journal"))
+        for sen in entries:
+            self.assertTrue(all(x.key == SymbolTable.intern(x.name) for x in sen.words))
+            self.assertTrue(all(x.id > before for x in [sen, *sen.words]))
+
+        self.assertEqual([x.key for x in entries[1][-1].words],
+                         [SymbolTable.intern("inner"), SymbolTable.intern("words")])
+        self.assertEqual(entries[2].data["extra"], ["not", "encodable"])
+
+        struct = BasicNodeStruct.build_default()
+        self.assertEqual(journal.replay(self.trie_sem, struct), 3)
+        self.assertTrue(struct.root.get_child("journal").has_child("pickled"))
+        self.assertEqual(len(self.sentences(struct)), 3)
+
+    def test_records_insertions(self):
+        struct  = BasicNodeStruct.build_default()
+        journal = Journal(self.journal, compact_every=0).open()
+        struct.components['journal'] = journal
+
+        self.trie_sem.insert(S("a", "b", "c"), struct)
+        self.trie_sem.insert_many([S("a", "b", "d"), S("e", "f")], struct)
+        negated = S("a", "b", "c")
+        negated.data[NEGATION_S] = True
+        self.trie_sem.insert(negated, struct)
+        journal.close()
+
+        entries = list(journal.entries())
+        self.assertEqual([x[0] for x in entries], [INSERT_OP, INSERT_OP, INSERT_OP, DELETE_OP])
+        self.assertEqual(entries[-1][1], S("a", "b", "c"))
+
+    def test_recover(self):
+        struct  = BasicNodeStruct.build_default()
+        Journal(self.journal, snapshot=self.snapshot, compact_every=3).recover(self.trie_sem, struct)
+        for words in [("a", "b"), ("a", "c"), ("d", "e"), ("f", "g")]:
+            self.trie_sem.insert(S(*words), struct)
+        struct.components['journal'].close()
+
+        # Compaction happened after 3, so one entry is left:
+        self.assertEqual(len(struct.components['journal']), 1)
+
+        recovered = BasicNodeStruct.build_default()
+        journal   = Journal(self.journal, snapshot=self.snapshot, compact_every=3)
+        journal.recover(self.trie_sem, recovered)
+        journal.close()
+        self.assertEqual(sorted(self.sentences(recovered)), sorted(self.sentences(struct)))
+
+    def test_recover_torn_tail(self):
+        struct  = BasicNodeStruct.build_default()
+        journal = Journal(self.journal, compact_every=0).recover(self.trie_sem, struct).components['journal']
+        self.trie_sem.insert(S("a", "b"), struct)
+        self.trie_sem.insert(S("c", "d"), struct)
+        journal.close()
+
+        with open(self.journal, 'r+b') as f:
+            f.truncate(getsize(self.journal) - 2)
+
+        recovered = BasicNodeStruct.build_default()
+        journal   = Journal(self.journal, compact_every=0)
+        journal.recover(self.trie_sem, recovered)
+        journal.close()
+        self.assertEqual(self.sentences(recovered), ["_:a.b"])
+        self.assertEqual(len(journal), 1)
+
+    def test_stale_journal_not_replayed(self):
+        """ A crash between swapping in the snapshot and the journal """
+        struct  = BasicNodeStruct.build_default()
+        journal = Journal(self.journal, snapshot=self.snapshot, compact_every=0)
+        journal.recover(self.trie_sem, struct)
+        self.trie_sem.insert(S("a", "b"), struct)
+        journal.close()
+
+        with open(self.journal, 'rb') as f:
+            stale = f.read()
+        journal.compact(struct)
+        journal.close()
+        with open(self.journal, 'wb') as f:
+            f.write(stale)
+
+        recovered = BasicNodeStruct.build_default()
+        journal   = Journal(self.journal, snapshot=self.snapshot, compact_every=0)
+        journal.recover(self.trie_sem, recovered)
+        journal.close()
+        self.assertEqual(self.sentences(recovered), ["_:a.b"])
+        self.assertEqual(len(journal), 0)
+
+    def test_replay_doesnt_record(self):
+        struct  = BasicNodeStruct.build_default()
+        journal = Journal(self.journal, compact_every=0)
+        journal.recover(self.trie_sem, struct)
+        self.trie_sem.insert(S("a", "b"), struct)
+        journal.close()
+
+        journal.recover(self.trie_sem, BasicNodeStruct.build_default())
+        journal.close()
+        self.assertEqual(len(list(journal.entries())), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,7 +9,7 @@ config = acab.setup()
 
 from acab.interfaces.value import Sentence_i
 from acab.core.data.node import AcabNode
-from acab.core.data.values import AcabValue
+from acab.core.data.values import AcabValue, SymbolTable
 
 BIND_S = config.prepare("Value.Structure", "BIND")()
 AV = AcabValue
@@ -63,7 +63,7 @@ class AcabNodeTests(unittest.TestCase):
 
     def test_contains_true(self):
         a_node = AcabNode(AV("value"))
-        a_node.children['child'] = True
+        a_node.children[SymbolTable.intern('child')] = True
         self.assertTrue(a_node.has_child('child'))
 
     def test_contains_false(self):
@@ -106,6 +106,15 @@ class AcabNodeTests(unittest.TestCase):
         self.assertEqual(gotten_node, b_node)
         self.assertEqual(gotten_node_b, b_node)
 
+    def test_get_child_by_key(self):
+        a_node = AcabNode(AV('value'))
+        b_node = AcabNode(AV('value2'))
+        a_node.add_child(b_node)
+        self.assertIn(b_node.key, a_node.children)
+        self.assertTrue(a_node.has_child(SymbolTable.intern('value2')))
+        self.assertEqual(a_node.get_child(b_node.value.key), b_node)
+        self.assertFalse(a_node.has_child(int(b_node.value.key)))
+
     def test_remove_child(self):
         a_node = AcabNode(AV('value'))
         b_node = AcabNode(AV('value2'))
@@ -75,8 +75,21 @@ class SentenceTests(unittest.TestCase):
     def test_copy_independence(self):
         val = Sentence.build(["a","test","value"])
         val2 = val.copy()
-        val.words.append(Sentence.build(["test"])[0])
-        self.assertNotEqual(val, val2)
+        val3 = val.add(Sentence.build(["test"]))
+        self.assertEqual(val, val2)
+        self.assertNotEqual(val3, val2)
+        self.assertEqual(len(val), 3)
+
+    def test_words_immutable(self):
+        val = Sentence.build(["a","test","value"])
+        self.assertIsInstance(val.words, tuple)
+        with self.assertRaises(AttributeError):
+            val.words.append(Sentence.build(["test"])[0])
+
+    def test_copy_shares_words(self):
+        val = Sentence.build(["a","test","value"])
+        val2 = val.copy()
+        self.assertIs(val.words, val2.words)
 
     def test_copy_data_independence(self):
         val = Sentence.build(["a","test","value"])
@@ -108,6 +121,16 @@ class SentenceTests(unittest.TestCase):
         self.assertFalse(bound[-1].is_var)
         self.assertEqual(bound[-1].value, "blah")
 
+    def test_bind_value_shared(self):
+        sen = Sentence.build(["a", "var"])
+        sen[1].data.update({BIND_S : True})
+        value = AcabValue("blah")
+
+        bound = sen.bind({"var" : value})
+
+        self.assertIs(bound[-1], value)
+        self.assertIs(bound[0], sen[0])
+
     def test_bind_nop(self):
         val = Sentence.build(["a","test","value"])
         var = Sentence.build(["var"])
@@ -131,6 +154,19 @@ class SentenceTests(unittest.TestCase):
             self.assertIsInstance(x, AcabValue)
             self.assertEqual(x.value, y)
 
+    def test_get_item_slice_shares_words(self):
+        val = Sentence.build(["a","test","value"])
+        sliced = val[1:]
+        self.assertIs(sliced[0], val[1])
+        self.assertIs(sliced[1], val[2])
+
+    def test_cached_str_and_hash(self):
+        val = Sentence.build(["a","test","value"])
+        as_str = str(val)
+        self.assertIs(str(val), as_str)
+        self.assertEqual(hash(val), hash(as_str))
+        self.assertEqual(hash(val), hash(Sentence.build(["a","test","value"])))
+
     def test_attach_statement(self):
         sen = Sentence.build(["a","test","value"])
         to_attach = Sentence.build(["blah","bloo"])
@@ -0,0 +1,221 @@
+#https://docs.python.org/3/library/unittest.html
+from os.path import splitext, split, join, dirname, abspath
+import subprocess
+import sys
+import tempfile
+import unittest
+import logging as root_logger
+logging = root_logger.getLogger(__name__)
+
+import acab
+config = acab.setup()
+
+from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.snapshot import (AcabSnapshotException, HEADER, MAGIC,
+                                     SNAPSHOT_VERSION, MappedNode,
+                                     MappedNodeStruct, load_snapshot,
+                                     save_snapshot)
+from acab.core.data.values import AcabValue, Sentence, SymbolTable
+from acab.core.util.identity import next_id
+from acab.error.semantic_exception import AcabSemanticException
+from acab.modules.context.context_set import ContextSet
+from acab.modules.semantics.dependent import BreadthTrieSemantics
+from acab.modules.semantics.independent import ExclusionNodeSemantics
+
+EXOP          = config.prepare("MODAL", "exop")()
+EXOP_enum     = config.prepare(EXOP, as_enum=True)()
+TYPE_INSTANCE = config.prepare("Value.Structure", "TYPE_INSTANCE")()
+BIND          = config.prepare("Value.Structure", "BIND")()
+
+PACKAGE_ROOT  = abspath(join(dirname(__file__), "..", "..", "..", ".."))
+
+# Saves a snapshot from a fresh process,
+# which interns names in a different order to the test process
+SAVE_SCRIPT = """
+import sys
+import acab
+acab.setup()
+from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.snapshot import save_snapshot
+from acab.core.data.values import Sentence, SymbolTable
+from acab.modules.semantics.dependent import BreadthTrieSemantics
+from acab.modules.semantics.independent import ExclusionNodeSemantics
+
+for x in range(50):
+    SymbolTable.intern(f"padding_{x}")
+trie_sem = BreadthTrieSemantics(default=ExclusionNodeSemantics().as_handler("_:node"))
+struct   = BasicNodeStruct.build_default()
+sen      = Sentence.build(["process", "statement"])
+sen      = sen.attach_statement(Sentence.build(["inner", "words"]))
+trie_sem.insert(sen, struct)
+save_snapshot(struct, sys.argv[1])
+"""
+
+class SnapshotTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        LOGLEVEL = root_logger.DEBUG
+        LOG_FILE_NAME = "log.{}".format(splitext(split(__file__)[1])[0])
+        root_logger.basicConfig(filename=LOG_FILE_NAME, level=LOGLEVEL, filemode='w')
+
+        console = root_logger.StreamHandler()
+        console.setLevel(root_logger.INFO)
+        root_logger.getLogger('').addHandler(console)
+        logging = root_logger.getLogger(__name__)
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path     = join(self.temp_dir.name, "test.snapshot")
+        self.trie_sem = BreadthTrieSemantics(default=ExclusionNodeSemantics().as_handler("_:node"))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_round_trip(self):
+        struct = BasicNodeStruct.build_default()
+        sen  = Sentence.build(["a", "test", "sentence"])
+        sen[1].data[EXOP] = EXOP_enum.EX
+        sen[-1].data[TYPE_INSTANCE] = Sentence.build(["a_type"])
+        self.trie_sem.insert(sen, struct)
+        self.trie_sem.insert(Sentence.build(["a", "other"]), struct)
+
+        save_snapshot(struct, self.path)
+        loaded = load_snapshot(self.path)
+
+        self.assertEqual(len(loaded), len(struct))
+        self.assertEqual([str(x) for x in self.trie_sem.to_sentences(loaded)],
+                         [str(x) for x in self.trie_sem.to_sentences(struct)])
+        test_node = loaded.root.get_child("a").get_child("test")
+        self.assertEqual(test_node.data[EXOP], EXOP_enum.EX)
+        self.assertEqual(test_node.get_child("sentence").value.type, Sentence.build(["a_type"]))
+        # Indexes are rebuilt:
+        self.assertEqual(loaded.components['word_index'].count(sen[1].key), 1)
+
+    def test_complex_values(self):
+        struct = BasicNodeStruct.build_default()
+        sen    = Sentence.build(["a", "statement"])
+        sen    = sen.attach_statement(Sentence.build(["other", "sentence"]))
+        self.trie_sem.insert(sen, struct)
+
+        save_snapshot(struct, self.path)
+        loaded = load_snapshot(self.path)
+        leaf   = loaded.root.get_child("a").get_child("statement")
+        self.assertIsInstance(leaf.value, Sentence)
+        self.assertEqual(str(leaf.value), str(sen[-1]))
+
+    def test_load_from_other_process(self):
+        subprocess.run([sys.executable, "-c", SAVE_SCRIPT, self.path],
+                       cwd=PACKAGE_ROOT, check=True, capture_output=True)
+        before = next_id()
+        loaded = load_snapshot(self.path)
+        leaf   = loaded.root.get_child("process").get_child("statement")
+
+        self.assertIsInstance(leaf.value, Sentence)
+        self.assertEqual(leaf.value.key, SymbolTable.intern("statement"))
+        self.assertEqual([x.key for x in leaf.value.words],
+                         [SymbolTable.intern("inner"), SymbolTable.intern("words")])
+        self.assertEqual(hash(leaf.value[0]), hash(AcabValue("inner")))
+        self.assertTrue(all(x.id > before for x in [leaf.value, *leaf.value.words]))
+        self.assertNotEqual(leaf.value[0], AcabValue("other"))
+
+    def test_load_into_struct(self):
+        struct = BasicNodeStruct.build_default()
+        self.trie_sem.insert(Sentence.build(["a", "b"]), struct)
+        save_snapshot(struct, self.path)
+
+        target = BasicNodeStruct.build_default()
+        self.trie_sem.insert(Sentence.build(["x", "y"]), target)
+        load_snapshot(self.path, struct=target)
+        self.assertTrue("a" in target.root)
+        self.assertFalse("x" in target.root)
+        self.assertEqual(len(target), 2)
+
+    def test_bad_magic(self):
+        with open(self.path, 'wb') as f:
+            f.write(b"x" * HEADER.size)
+
+        with self.assertRaises(AcabSnapshotException):
+            load_snapshot(self.path)
+
+    def test_newer_version(self):
+        with open(self.path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION + 1, 0, 0, 0, 0, 0, 0))
+
+        with self.assertRaises(AcabSnapshotException):
+            load_snapshot(self.path)
+
+    def test_mapped_struct(self):
+        struct = BasicNodeStruct.build_default()
+        for words in [["a", "b", "c"], ["a", "b", "d"], ["a", "e"], ["f", "g"]]:
+            self.trie_sem.insert(Sentence.build(words), struct)
+        save_snapshot(struct, self.path)
+
+        mapped = MappedNodeStruct.open(self.path)
+        self.assertEqual(len(mapped), len(struct))
+        self.assertIsInstance(mapped.root.get_child("a"), MappedNode)
+        self.assertTrue(mapped.root.get_child("a").has_child("e"))
+        self.assertFalse(mapped.root.has_child("e"))
+        self.assertEqual(mapped.root.get_child("a").get_child("b").parentage,
+                         Sentence.build(["__root", "a", "b"]))
+        self.assertEqual(sorted([str(x) for x in self.trie_sem.to_sentences(mapped)]),
+                         sorted([str(x) for x in self.trie_sem.to_sentences(struct)]))
+        mapped.close()
+
+    def test_mapped_struct_wide_lookup(self):
+        struct = BasicNodeStruct.build_default()
+        names  = [f"node_{x}" for x in range(100)]
+        for name in reversed(names):
+            self.trie_sem.insert(Sentence.build(["a", name]), struct)
+        save_snapshot(struct, self.path)
+
+        mapped = MappedNodeStruct.open(self.path)
+        node_a = mapped.root.get_child("a")
+        self.assertEqual(len(node_a), 100)
+        self.assertTrue(all([node_a.has_child(x) for x in names]))
+        self.assertFalse(node_a.has_child("node_100"))
+        self.assertEqual(node_a.get_child(AcabValue("node_50")).name, "node_50")
+        mapped.close()
+
+    def test_mapped_struct_query(self):
+        struct = BasicNodeStruct.build_default()
+        for words in [["a", "b", "c"], ["a", "b", "d"], ["a", "e"]]:
+            self.trie_sem.insert(Sentence.build(words), struct)
+        save_snapshot(struct, self.path)
+        mapped = MappedNodeStruct.open(self.path)
+
+        query = Sentence.build(["a", "b", "x"])
+        query[-1].data[BIND] = True
+        ctxs = self.trie_sem.query(query, mapped, ctxs=ContextSet.build())
+        self.assertEqual(len(ctxs), 2)
+        self.assertEqual({ctx["x"].name for ctx in ctxs.active_list()}, {"c", "d"})
+        mapped.close()
+
+    def test_mapped_struct_int_lookup(self):
+        struct = BasicNodeStruct.build_default()
+        self.trie_sem.insert(Sentence.build(["a", "5"]), struct)
+        self.trie_sem.insert(Sentence.build(["b", "c"]), struct)
+        save_snapshot(struct, self.path)
+        mapped = MappedNodeStruct.open(self.path)
+
+        a_node = mapped.root.get_child("a")
+        self.assertTrue(a_node.has_child(5))
+        self.assertTrue(a_node.has_child(SymbolTable.intern("5")))
+        self.assertTrue(mapped.root.get_child(SymbolTable.intern("b")).has_child("c"))
+        mapped.close()
+
+    def test_mapped_struct_read_only(self):
+        struct = BasicNodeStruct.build_default()
+        self.trie_sem.insert(Sentence.build(["a", "b"]), struct)
+        save_snapshot(struct, self.path)
+        mapped = MappedNodeStruct.open(self.path)
+
+        with self.assertRaises(AcabSemanticException):
+            self.trie_sem.insert(Sentence.build(["a", "c"]), mapped)
+        with self.assertRaises(AcabSnapshotException):
+            mapped.root.get_child("a").clear_children()
+        mapped.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
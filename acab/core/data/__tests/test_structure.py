@@ -13,7 +13,9 @@ import acab
 config = acab.setup()
 
 from acab.interfaces.data import Structure_i, Node_i
-from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.acab_struct import BasicNodeStruct, CompactNodeStruct, NodeIndex, word_keys
+from acab.core.data.node import AcabNode
+from acab.core.data.values import AcabValue
 
 # TODO
 class StructureTests(unittest.TestCase):
@@ -44,3 +46,79 @@ class StructureTests(unittest.TestCase):
         self.assertFalse(bool(struct))
         # Root isn't counted
         self.assertEqual(len(struct), 0)
+
+    def test_compact_creation(self):
+        struct = CompactNodeStruct.build_default()
+        self.assertIsInstance(struct, Structure_i)
+        self.assertIsInstance(struct.root, Node_i)
+        self.assertFalse(bool(struct))
+        self.assertEqual(len(struct), 0)
+
+    def test_compact_add_and_find(self):
+        struct = CompactNodeStruct.build_default()
+        first  = struct.add_child(0, AcabValue("a"))
+        second = struct.add_child(0, AcabValue("b"))
+        self.assertEqual(len(struct), 2)
+        self.assertEqual(struct.find_child(0, AcabValue("a").key), first)
+        self.assertEqual(struct.find_child(0, AcabValue("b").key), second)
+        self.assertEqual(list(struct.child_indices(0)), [first, second])
+
+    def test_compact_remove_reuses_slots(self):
+        struct = CompactNodeStruct.build_default()
+        first  = struct.add_child(0, AcabValue("a"))
+        struct.add_child(first, AcabValue("b"))
+        second = struct.add_child(0, AcabValue("c"))
+        struct.remove_child(0, first)
+        self.assertEqual(len(struct), 1)
+        self.assertEqual(list(struct.child_indices(0)), [second])
+        struct.add_child(0, AcabValue("d"))
+        self.assertEqual(len(struct._values), 4)
+
+    def test_compact_remove_middle_and_last(self):
+        struct = CompactNodeStruct.build_default()
+        indices = [struct.add_child(0, AcabValue(x)) for x in "abcd"]
+        struct.remove_child(0, indices[1])
+        struct.remove_child(0, indices[3])
+        self.assertEqual(list(struct.child_indices(0)), [indices[0], indices[2]])
+        last = struct.add_child(0, AcabValue("e"))
+        self.assertEqual(list(struct.child_indices(0))[-1], last)
+
+    def test_compact_wide_index(self):
+        struct = CompactNodeStruct.build_default()
+        indices = [struct.add_child(0, AcabValue(f"val_{x}")) for x in range(CompactNodeStruct.WIDE_FANOUT + 5)]
+        self.assertIn(0, struct._wide)
+        self.assertEqual(struct.find_child(0, AcabValue("val_3").key), indices[3])
+        struct.remove_child(0, indices[3])
+        self.assertEqual(struct.find_child(0, AcabValue("val_3").key), -1)
+        self.assertEqual(len(list(struct.child_indices(0))), len(indices) - 1)
+
+    def test_default_indexes(self):
+        struct = BasicNodeStruct.build_default()
+        self.assertEqual(len(struct.indexes), 3)
+        self.assertIn('word_index', struct.components)
+        self.assertIn('type_index', struct.components)
+        self.assertIn('tag_index', struct.components)
+        self.assertFalse(bool(CompactNodeStruct.build_default().indexes))
+
+    def test_node_index_add_remove(self):
+        index = NodeIndex(word_keys)
+        node  = AcabNode(AcabValue("a"))
+        index.add(node)
+        self.assertIn(node.key, index)
+        self.assertEqual(index.count(node.key), 1)
+        self.assertIs(index.get(node.key)[0], node)
+        index.remove(node)
+        self.assertNotIn(node.key, index)
+        self.assertEqual(index.get(node.key), [])
+
+    def test_node_index_attached_only(self):
+        root   = AcabNode.Root()
+        index  = NodeIndex(word_keys)
+        first  = root.add_child(AcabNode(AcabValue("a")))
+        second = first.add_child(AcabNode(AcabValue("b")))
+        index.add(second)
+        self.assertEqual(index.get(second.key, root=root), [second])
+        root.remove_child(first)
+        self.assertEqual(index.get(second.key, root=root), [])
+        self.assertEqual(index.get(second.key), [second])
+
@@ -1,15 +1,17 @@
 #https://docs.python.org/3/library/unittest.html
 from os.path import splitext, split
 import unittest
+from uuid import UUID
 import logging as root_logger
 logging = root_logger.getLogger(__name__)
 
 import acab
 config = acab.setup()
 
-from acab.core.data.values import AcabValue, AcabStatement
+from acab.core.data.values import AcabValue, AcabStatement, SymbolTable
 from acab.core.data.values import Sentence
 from acab.core.data.node import AcabNode
+from acab.core.util.identity import AcabId, UUIDIdentity, set_provider
 
 AT_BIND_S = config.prepare("Value.Structure", "AT_BIND")()
 BIND_S    = config.prepare("Value.Structure", "BIND")()
@@ -113,6 +115,41 @@ class AcabValueTests(unittest.TestCase):
         self.assertTrue("a" in copied.tags)
         self.assertFalse("b" in value.tags)
 
+    def test_value_id_is_lazy_uuid(self):
+        value = AcabValue("test")
+        self.assertIsInstance(value.id, AcabId)
+        self.assertIsInstance(value.uuid, UUID)
+        self.assertEqual(value.uuid, value.uuid)
+        self.assertNotEqual(value.uuid, AcabValue("test").uuid)
+
+    def test_value_id_provider_swap(self):
+        previous = set_provider(UUIDIdentity())
+        try:
+            value = AcabValue("test")
+        finally:
+            set_provider(previous)
+
+        self.assertIsInstance(value.id, AcabId)
+        self.assertEqual(value.uuid, value.uuid)
+        self.assertNotEqual(value.uuid, AcabValue("test").uuid)
+
+    def test_value_copy_data_independence(self):
+        value = AcabValue("test", params=["a"])
+        copied = value.copy()
+        copied.data["blah"] = True
+        copied.params.append(AcabValue("b"))
+        self.assertFalse("blah" in value.data)
+        self.assertEqual(len(value.params), 1)
+        self.assertEqual(value.key, copied.key)
+        self.assertEqual(hash(value), hash(copied))
+
+    def test_value_copy_with_data(self):
+        value = AcabValue("test")
+        copied = value.copy(data={"blah": True})
+        self.assertTrue(copied.data["blah"])
+        self.assertFalse(copied.is_var)
+        self.assertFalse("blah" in value.data)
+
 
     def test_eq(self):
         val1 = AcabValue("test")
@@ -131,3 +168,33 @@ class AcabValueTests(unittest.TestCase):
         val1 = AcabValue("test")
         val2 = AcabValue("blah")
         self.assertNotEqual(val1, val2)
+
+    def test_eq_ignores_ids(self):
+        val1 = AcabValue("test")
+        val2 = AcabValue("other", id=val1.id)
+        val3 = AcabValue("test")
+        self.assertNotEqual(val1, val2)
+        self.assertEqual(val1, val3)
+
+    def test_interned_key(self):
+        val1 = AcabValue("test")
+        val2 = AcabValue("test")
+        val3 = AcabValue("blah")
+        self.assertIsInstance(val1.key, int)
+        self.assertEqual(val1.key, val2.key)
+        self.assertNotEqual(val1.key, val3.key)
+        self.assertEqual(SymbolTable.name(val1.key), "test")
+        self.assertEqual(SymbolTable.intern("test"), val1.key)
+
+    def test_int_keys_are_interned(self):
+        sym_id = AcabValue("test").key
+        self.assertIs(SymbolTable.key(sym_id), sym_id)
+        self.assertEqual(SymbolTable.key(int(sym_id)), SymbolTable.intern(str(int(sym_id))))
+        self.assertEqual(SymbolTable.key(10 ** 9), SymbolTable.intern(str(10 ** 9)))
+
+    def test_hash_matches_eq(self):
+        val1 = AcabValue("test")
+        val2 = val1.copy()
+        self.assertEqual(hash(val1), hash(val2))
+        self.assertEqual(hash(val1), hash("test"))
+        self.assertIn("test", {val1})
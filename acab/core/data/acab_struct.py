@@ -1,11 +1,16 @@
+from array import array
 from dataclasses import dataclass, field
-from weakref import WeakValueDictionary
+from itertools import islice
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional
+from weakref import ReferenceType, WeakValueDictionary, ref
 import logging as root_logger
 
 from acab.core.config.config import AcabConfig
 from acab.interfaces.data import Structure_i
-from acab.core.data.node import AcabNode
-from acab.core.data.values import AcabValue
+from acab.core.data.node import AcabNode, CompactNode
+from acab.core.data.values import AcabValue, SymbolTable
+from acab.core.util.identity import AcabId, next_id
+from acab.core.data.default_structure import ROOT, TYPE_BOTTOM_NAME, TYPE_INSTANCE
 
 logging = root_logger.getLogger(__name__)
 config  = AcabConfig.Get()
@@ -13,19 +18,178 @@ config  = AcabConfig.Get()
 class AcabStruct(Structure_i):
     """ A structure in ACAB,
     which is registered into the semantic system for use """
-    pass
 
+    @property
+    def indexes(self) -> List['NodeIndex']:
+        """ The secondary indexes registered as components """
+        return [x for x in self.components.values() if isinstance(x, NodeIndex)]
+
+    def fork(self) -> 'AcabStruct':
+        """ A copy on write copy of the struct, for engine forking """
+        raise NotImplementedError()
+
+    def own(self, parent, node):
+        """ Get a node which is safe to modify, given its (safe) parent.
+        A no-op unless the struct shares nodes, see BasicNodeStruct.fork """
+        return node
+
+
+def word_keys(value) -> List[Hashable]:
+    return [value.key]
+
+def type_keys(value) -> List[Hashable]:
+    """ Atoms aren't indexed, as nearly everything is one """
+    type_instance = value.data.get(TYPE_INSTANCE, TYPE_BOTTOM_NAME)
+    if type_instance == TYPE_BOTTOM_NAME:
+        return []
+    return [str(value.type)]
+
+def tag_keys(value) -> List[Hashable]:
+    return [SymbolTable.key(x) for x in value.tags]
+
+
+@dataclass
+class NodeIndex:
+    """ A secondary index of a struct's nodes,
+    from keys of their values to the nodes.
+
+    Nodes are held by weakref, so nodes dropped from the struct
+    without being removed from the index (eg: by exclusion),
+    are pruned once they are unreferenced and the key is next read.
+    Use `get` with the root to only retrieve nodes still in the struct.
+    """
+    key_fn : Callable[[AcabValue], List[Hashable]]       = field()
+    _index : Dict[Hashable, Dict[AcabId, ReferenceType]] = field(default_factory=dict)
+
+    def add(self, node):
+        for key in self.key_fn(node.value):
+            if key not in self._index:
+                self._index[key] = {}
+            self._index[key][node.id] = ref(node)
+
+    def remove(self, node):
+        for key in self.key_fn(node.value):
+            if key not in self._index:
+                continue
+            self._index[key].pop(node.id, None)
+            if not bool(self._index[key]):
+                del self._index[key]
+
+    def count(self, key) -> int:
+        """ An upper bound, as dead references are only pruned by `get` """
+        if key not in self._index:
+            return 0
+        return len(self._index[key])
+
+    def get(self, key, root=None) -> List[AcabNode]:
+        if key not in self._index:
+            return []
+
+        entries = self._index[key]
+        nodes   = [x() for x in entries.values()]
+        if not all(nodes):
+            live = {ident: node_ref for ident, node_ref in entries.items() if node_ref() is not None}
+            if bool(live):
+                self._index[key] = live
+            else:
+                del self._index[key]
+            nodes = [x for x in nodes if x is not None]
+
+        if root is None:
+            return nodes
+
+        return [x for x in nodes if NodeIndex.is_attached(x, root)]
+
+    def __contains__(self, key):
+        return key in self._index
+
+    @staticmethod
+    def is_attached(node, root) -> bool:
+        """ Check the parentage of a node is still linked up to the root """
+        current = node
+        while current is not root:
+            parent = current.parent() if current.parent is not None else None
+            if parent is None or parent.children.get(current.key) is not current:
+                return False
+            current = parent
+
+        return True
+
+
+@dataclass
 class BasicNodeStruct(AcabStruct):
     """ A Node based struct """
 
+    # Set once forked, nodes not owned by it are shared:
+    _owner  : Optional[AcabId] = field(init=False, default=None, repr=False)
+    # Forks leave the parents of the nodes they share to the original
+    _forked : bool             = field(init=False, default=False, repr=False)
+
     @staticmethod
     def build_default():
         logging.info(f"Building Node Struct")
         struct = BasicNodeStruct(AcabNode.Root())
-        # all_nodes : WeakDict[UUID, Node]
+        # all_nodes : WeakDict[AcabId, Node]
         struct.components['all_nodes'] = WeakValueDictionary()
+        # Secondary indexes, maintained by the trie semantics:
+        struct.components['word_index'] = NodeIndex(word_keys)
+        struct.components['type_index'] = NodeIndex(type_keys)
+        struct.components['tag_index']  = NodeIndex(tag_keys)
         return struct
 
+
+    def fork(self) -> 'BasicNodeStruct':
+        """ A copy on write copy of the struct, in O(1).
+        Both structs share every node, and take new owner ids.
+        Mutating semantics call `own` on each node they descend through,
+        which copies a node not owned by the struct (and its children dict),
+        and replaces it in its parent.
+
+        The fork has no secondary indexes, so queries scan,
+        and its all_nodes (so its len) only holds nodes made after forking.
+        The original stays the owner of shared nodes' parent references,
+        re-parenting the children of nodes it copies, so its index lookups,
+        which check a node's parents lead to the root, still work.
+        In the fork, shared nodes' parent references point into the original.
+        Any change log is cleared, as rewinding would modify shared nodes.
+        """
+        if 'change_log' in self.components and bool(self.components['change_log'].checkpoints):
+            logging.warning("Forking discards the struct's checkpoints")
+            self.components['change_log'].clear()
+
+        self._owner = next_id()
+        forked = BasicNodeStruct(self.root)
+        forked._owner  = next_id()
+        forked._forked = True
+        forked.components['all_nodes'] = WeakValueDictionary()
+        return forked
+
+    def own(self, parent:Optional[AcabNode], node:AcabNode) -> AcabNode:
+        """ Copy a shared node before it is modified.
+        A parent of None is for the root """
+        if self._owner is None or node.owner == self._owner:
+            return node
+
+        copied = AcabNode(node.value,
+                          data=node.data.copy(),
+                          children=node.children.copy(),
+                          owner=self._owner)
+        if parent is None:
+            self.root = copied
+        else:
+            parent.children[copied.key] = copied
+            copied.set_parent(parent)
+
+        if not self._forked:
+            for child in copied.children.values():
+                child.set_parent(copied)
+
+        self.components['all_nodes'][copied.id] = copied
+        for index in self.indexes:
+            index.add(copied)
+
+        return copied
+
     def __bool__(self):
         return bool(self.root)
 
@@ -34,11 +198,181 @@ class BasicNodeStruct(AcabStruct):
 
     def __repr__(self):
         val = f"BasicNodeStruct("
-        val += ";".join([x.name for x in self.components['all_nodes'].values()][:5])
+        val += ";".join([x.name for x in islice(self.components['all_nodes'].values(), 5)])
+        val += "..."
+        val += ")"
+        return val
+
+
+NO_NODE = -1
+
+@dataclass
+class CompactNodeStruct(AcabStruct):
+    """ A Struct-of-Arrays trie.
+    Nodes are integer indices into parallel arrays,
+    instead of an AcabNode object (and its dicts and weakrefs) each.
+
+    Children form a linked list through first_child/next_sibling,
+    in insertion order. prev_sibling is circular on the first child,
+    so a parent's first child points back to its last.
+    Nodes with more than WIDE_FANOUT children also get a dict index,
+    from interned value key to child.
+
+    Use with CompactNodeSemantics, which operate on CompactNode handles.
+    """
+    root           : CompactNode          = field(default=None)
+
+    _parent        : array                = field(init=False, default_factory=lambda: array('q'))
+    _key           : array                = field(init=False, default_factory=lambda: array('q'))
+    _first_child   : array                = field(init=False, default_factory=lambda: array('q'))
+    _next_sibling  : array                = field(init=False, default_factory=lambda: array('q'))
+    _prev_sibling  : array                = field(init=False, default_factory=lambda: array('q'))
+    _fanout        : array                = field(init=False, default_factory=lambda: array('l'))
+    _values        : List[AcabValue]      = field(init=False, default_factory=list)
+    # Sparse, only nodes with data have an entry:
+    _data          : Dict[int, Dict]      = field(init=False, default_factory=dict)
+    _wide          : Dict[int, Dict]      = field(init=False, default_factory=dict)
+    _free          : List[int]            = field(init=False, default_factory=list)
+
+    WIDE_FANOUT = 16
+
+    @staticmethod
+    def build_default():
+        logging.info(f"Building Compact Node Struct")
+        struct = CompactNodeStruct()
+        root_index = struct._alloc(NO_NODE, AcabValue.safe_make(ROOT))
+        struct.root = CompactNode(struct, root_index)
+        return struct
+
+    def __bool__(self):
+        return bool(self.root)
+
+    def __len__(self):
+        """ The number of nodes, excluding the root """
+        return len(self._values) - len(self._free) - 1
+
+    def __repr__(self):
+        val = f"CompactNodeStruct("
+        val += ";".join([x.name for x in self._values[1:6] if x is not None])
         val += "..."
         val += ")"
         return val
 
+    def _alloc(self, parent:int, value:AcabValue) -> int:
+        if bool(self._free):
+            index = self._free.pop()
+            self._parent[index]       = parent
+            self._key[index]          = value.key
+            self._first_child[index]  = NO_NODE
+            self._next_sibling[index] = NO_NODE
+            self._prev_sibling[index] = NO_NODE
+            self._fanout[index]       = 0
+            self._values[index]       = value
+            return index
+
+        index = len(self._values)
+        self._parent.append(parent)
+        self._key.append(value.key)
+        self._first_child.append(NO_NODE)
+        self._next_sibling.append(NO_NODE)
+        self._prev_sibling.append(NO_NODE)
+        self._fanout.append(0)
+        self._values.append(value)
+        return index
+
+    def child_indices(self, index:int) -> Iterator[int]:
+        current = self._first_child[index]
+        while current != NO_NODE:
+            following = self._next_sibling[current]
+            yield current
+            current = following
+
+    def find_child(self, index:int, key:int) -> int:
+        if key is None:
+            return NO_NODE
+        if index in self._wide:
+            return self._wide[index].get(key, NO_NODE)
+
+        current   = self._first_child[index]
+        node_keys = self._key
+        siblings  = self._next_sibling
+        while current != NO_NODE:
+            if node_keys[current] == key:
+                return current
+            current = siblings[current]
+
+        return NO_NODE
+
+    def add_child(self, index:int, value:AcabValue, data:Dict=None) -> int:
+        """ Append a new child to a node, returning its index """
+        child = self._alloc(index, value)
+        if bool(data):
+            self._data[child] = data
+
+        first = self._first_child[index]
+        if first == NO_NODE:
+            self._first_child[index]  = child
+            self._prev_sibling[child] = child
+        else:
+            last = self._prev_sibling[first]
+            self._next_sibling[last]  = child
+            self._prev_sibling[child] = last
+            self._prev_sibling[first] = child
+
+        self._fanout[index] += 1
+        if index in self._wide:
+            self._wide[index][value.key] = child
+        elif self.WIDE_FANOUT < self._fanout[index]:
+            self._wide[index] = {self._key[x]: x for x in self.child_indices(index)}
+
+        return child
+
+    def remove_child(self, index:int, child:int):
+        """ Unlink a child from its parent, and free its subtree """
+        assert(self._parent[child] == index)
+        first     = self._first_child[index]
+        following = self._next_sibling[child]
+        previous  = self._prev_sibling[child]
+
+        if child == first:
+            self._first_child[index] = following
+            if following != NO_NODE:
+                self._prev_sibling[following] = previous
+        else:
+            self._next_sibling[previous] = following
+            if following != NO_NODE:
+                self._prev_sibling[following] = previous
+            else:
+                self._prev_sibling[first] = previous
+
+        self._fanout[index] -= 1
+        if index in self._wide:
+            del self._wide[index][self._key[child]]
+            if not bool(self._wide[index]):
+                del self._wide[index]
+
+        self._free_subtree(child)
+
+    def clear_children(self, index:int):
+        for child in list(self.child_indices(index)):
+            self._free_subtree(child)
+
+        self._first_child[index] = NO_NODE
+        self._fanout[index]      = 0
+        self._wide.pop(index, None)
+
+    def _free_subtree(self, index:int):
+        queue = [index]
+        while bool(queue):
+            current = queue.pop()
+            queue += self.child_indices(current)
+            self._values[current] = None
+            self._parent[current] = NO_NODE
+            self._data.pop(current, None)
+            self._wide.pop(current, None)
+            self._free.append(current)
+
+
 class NPArrayStruct(AcabStruct):
     """ A numpy based data structure """
     pass
@@ -0,0 +1,156 @@
+"""
+A log of the inverse deltas of changes made to a BasicNodeStruct,
+for checkpointing and rewinding it.
+
+Attach a ChangeLog to a struct as its 'change_log' component,
+and BreadthTrieSemantics reports each structural change it makes:
+  a child added       : undone by popping it
+  a children replaced : (eg: by exclusion) undone by restoring the old dict
+  a child removed     : undone by re-adding the removed node, and its subtree
+
+Nodes are never copied, as an AcabNode's children dict is replaced,
+not mutated, when cleared, and removed nodes keep their subtrees.
+So a checkpoint is a position in the log,
+and rewinding costs the number of changes since it, not the struct's size.
+
+Changes are only logged while there is a checkpoint to rewind to.
+"""
+import logging as root_logger
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from acab import types as AT
+from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.node import AcabNode
+from acab.error.acab_exception import AcabException
+
+logging = root_logger.getLogger(__name__)
+
+Structure = AT.DataStructure
+
+ADDED, REPLACED, REMOVED = range(3)
+
+
+@dataclass
+class ChangeLog:
+    """ Inverse deltas since the earliest checkpoint of a struct """
+
+    _deltas      : List[Tuple[int, AcabNode, Any]] = field(default_factory=list)
+    _checkpoints : List[int]                       = field(default_factory=list)
+    _named       : Dict[str, int]                  = field(default_factory=dict)
+
+    @staticmethod
+    def attach(struct:Structure) -> 'ChangeLog':
+        """ Get the change log of a struct, adding one if necessary """
+        if not isinstance(struct, BasicNodeStruct):
+            raise AcabException("Change Logs need a BasicNodeStruct", struct)
+
+        if 'change_log' not in struct.components:
+            struct.components['change_log'] = ChangeLog()
+
+        return struct.components['change_log']
+
+    def __len__(self):
+        """ The number of changes logged """
+        return len(self._deltas)
+
+    @property
+    def recording(self) -> bool:
+        return bool(self._checkpoints)
+
+    @property
+    def checkpoints(self) -> List[int]:
+        return self._checkpoints[:]
+
+    def checkpoint(self, name:Optional[str]=None) -> int:
+        """ Mark the current state to rewind to, returning its position """
+        position = len(self._deltas)
+        self._checkpoints.append(position)
+        if name is not None:
+            self._named[name] = position
+
+        return position
+
+    def clear(self):
+        """ Forget every checkpoint, and stop logging """
+        self._deltas.clear()
+        self._checkpoints.clear()
+        self._named.clear()
+
+    def inserted(self, parent:AcabNode, old_children:Dict, child:AcabNode):
+        """ Called after inserting child into parent,
+        with the parent's children dict from before the insertion """
+        if not self.recording:
+            return
+
+        if parent.children is old_children:
+            self._deltas.append((ADDED, parent, child.key))
+        else:
+            self._deltas.append((REPLACED, parent, old_children))
+
+    def removed(self, parent:AcabNode, child:AcabNode):
+        if not self.recording:
+            return
+
+        self._deltas.append((REMOVED, parent, child))
+
+    def _position(self, val:Optional[Union[int, str]]) -> int:
+        """ None for the last checkpoint,
+        an int n for the nth most recent checkpoint,
+        or the name of a checkpoint
+        """
+        if isinstance(val, str):
+            if val not in self._named:
+                raise AcabException("Unknown Checkpoint", val)
+            return self._named[val]
+
+        steps = 1 if val is None else val
+        if steps < 1 or len(self._checkpoints) < steps:
+            raise AcabException("Not enough Checkpoints to Rewind", val)
+
+        return self._checkpoints[-steps]
+
+    def rewind(self, struct:Structure, val:Optional[Union[int, str]]=None) -> int:
+        """ Undo changes back to a checkpoint, which is kept.
+        Later checkpoints are discarded.
+        Returns the number of changes undone
+        """
+        position = self._position(val)
+        indexes  = struct.indexes
+        undone   = len(self._deltas) - position
+        while position < len(self._deltas):
+            kind, parent, delta = self._deltas.pop()
+            if kind == ADDED:
+                child = parent.children.pop(delta)
+                for index in indexes:
+                    index.remove(child)
+            elif kind == REPLACED:
+                parent.children = delta
+            elif kind == REMOVED:
+                parent.children[delta.key] = delta
+                delta.set_parent(parent)
+                self._reindex(delta, struct, indexes)
+
+        self._checkpoints = [x for x in self._checkpoints if x <= position]
+        self._named       = {x: y for x, y in self._named.items() if y <= position}
+
+        journal = struct.components.get('journal', None)
+        if journal is not None and journal.snapshot is not None:
+            # The journal is of the changes just undone, so rebase it
+            journal.compact(struct)
+        elif journal is not None:
+            logging.warning(f"Rewound a journaled struct without a snapshot to compact into")
+
+        logging.info(f"Rewound {undone} changes")
+        return undone
+
+    def _reindex(self, node:AcabNode, struct:Structure, indexes):
+        all_nodes = struct.components.get('all_nodes', None)
+        queue     = [node]
+        while bool(queue):
+            current = queue.pop()
+            queue  += current.children.values()
+            if all_nodes is not None:
+                all_nodes[current.id] = current
+            for index in indexes:
+                index.add(current)
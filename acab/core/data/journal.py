@@ -0,0 +1,314 @@
+"""
+An append-only journal of the insertions and retractions made to a struct,
+for incremental persistence between snapshots.
+
+Attach a Journal to a struct as its 'journal' component,
+and BreadthTrieSemantics records each sentence before applying it.
+Every `compact_every` entries, the struct is saved as a snapshot,
+and the journal is truncated.
+Recovery loads the snapshot, then replays the journal's tail.
+
+Layout, little endian:
+  Header  : JOURNAL_MAGIC, version:H, and the crc32 of the snapshot
+            the journal follows on from, or 0 for none.
+  Entries : op:B, form:B, length:I, crc32:I, then the payload.
+            Plain payloads are a sentence's string, data and record tables,
+            (as in snapshots), a pickle of any complex words,
+            then the sentence's data index and word record indices.
+            Sentences with data that can't be encoded are pickled whole.
+A torn final entry (eg: from a crash mid-write) fails its crc,
+and is truncated on recovery.
+A journal whose snapshot crc doesn't match the snapshot
+has already been compacted into it, so isn't replayed.
+"""
+import logging as root_logger
+import os
+import zlib
+from array import array
+from dataclasses import dataclass, field
+from struct import Struct
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from acab import types as AT
+from acab.core.data.snapshot import (COUNT, SHORT,
+                                     AcabSnapshotException, SnapshotWriter,
+                                     decode_data, decode_record,
+                                     load_snapshot, pickle_values,
+                                     save_snapshot, unpickle_values)
+from acab.core.data.values import Sentence
+from acab.core.config.config import AcabConfig
+from acab.error.semantic_exception import AcabSemanticException
+
+logging = root_logger.getLogger(__name__)
+config  = AcabConfig.Get()
+
+NEGATION_S = config.prepare("Value.Structure", "NEGATION")()
+
+Structure = AT.DataStructure
+
+JOURNAL_MAGIC   = b"ACABJRNL"
+JOURNAL_VERSION = 1
+
+JOURNAL_HEADER = Struct("<8sHI")
+ENTRY          = Struct("<BBII")
+
+INSERT_OP, DELETE_OP = 1, 2
+PLAIN_F, PICKLED_F   = 0, 1
+
+
+def encode_sentence(sen:Sentence) -> Tuple[int, bytes]:
+    """ Encode a sentence as a journal payload, returning its form """
+    writer  = SnapshotWriter()
+    # Negation is recorded as the entry's op
+    sen_data = {x: y for x, y in sen.data.items() if x != NEGATION_S}
+    data_id  = writer.encode_data(sen_data)
+    if data_id is None:
+        return PICKLED_F, pickle_values(sen)
+
+    words = array('I', [writer.encode_value(x) for x in sen.words])
+    buf   = []
+    strings = [x.encode("utf-8") for x in writer.strings]
+    for table in [strings, list(writer.data), list(writer.records)]:
+        buf.append(COUNT.pack(len(table)))
+        for encoded in table:
+            buf += [COUNT.pack(len(encoded)), encoded]
+
+    complex_blob = pickle_values(writer.complex) if bool(writer.complex) else b""
+    buf += [COUNT.pack(len(complex_blob)), complex_blob]
+    buf += [COUNT.pack(data_id), SHORT.pack(len(words))]
+    buf += [COUNT.pack(x) for x in words]
+    return PLAIN_F, b"".join(buf)
+
+
+def decode_sentence(form:int, payload) -> Sentence:
+    if form == PICKLED_F:
+        # Unpickled values re-intern their names, and get fresh ids
+        return unpickle_values(payload)
+    if form != PLAIN_F:
+        raise AcabSnapshotException("Unknown Journal Entry Form", form)
+
+    offset = 0
+    def read(fmt):
+        nonlocal offset
+        values = fmt.unpack_from(payload, offset)
+        offset += fmt.size
+        return values[0]
+
+    def read_bytes(length):
+        nonlocal offset
+        offset += length
+        return payload[offset - length:offset]
+
+    tables = []
+    for x in range(3):
+        tables.append([read_bytes(read(COUNT)) for y in range(read(COUNT))])
+
+    strings = [str(x, "utf-8") for x in tables[0]]
+    data    = [decode_data(x, strings.__getitem__) for x in tables[1]]
+    complex_blob   = read_bytes(read(COUNT))
+    complex_values = unpickle_values(complex_blob) if bool(complex_blob) else []
+    records = [decode_record(x, strings.__getitem__, data.__getitem__, lambda: complex_values)
+               for x in tables[2]]
+
+    sen_data = data[read(COUNT)].copy()
+    words    = []
+    used     = set()
+    for x in range(read(SHORT)):
+        record = read(COUNT)
+        # Records are shared within an entry, so copy repeats
+        words.append(records[record] if record not in used else records[record].copy())
+        used.add(record)
+
+    return Sentence.build(words, data=sen_data)
+
+
+@dataclass
+class Journal:
+    """ An append-only file of insertions and retractions.
+
+    Entries are flushed to the OS as they are written,
+    so survive the process crashing.
+    Set `fsync` to also survive the machine crashing, at a cost per entry.
+    A `compact_every` of 0 disables automatic compaction.
+    """
+
+    filename      : str           = field()
+    snapshot      : Optional[str] = field(default=None)
+    compact_every : int           = field(default=10000)
+    fsync         : bool          = field(default=False)
+
+    _file         : BinaryIO      = field(init=False, default=None, repr=False)
+    _count        : int           = field(init=False, default=0)
+
+    def __post_init__(self):
+        if self.compact_every and self.snapshot is None:
+            raise AcabSnapshotException("Journal compaction needs a snapshot filename", self.filename)
+
+    def __len__(self):
+        """ The number of entries since the last compaction """
+        return self._count
+
+    @property
+    def should_compact(self) -> bool:
+        return bool(self.compact_every) and self.compact_every <= self._count
+
+    def open(self):
+        """ Open the journal for appending, creating it if necessary.
+        Entries already in the journal are counted, and a torn tail is dropped
+        """
+        if self._file is not None:
+            return self
+
+        if not os.path.exists(self.filename):
+            self._write_empty(self.filename, self._snapshot_crc())
+
+        self._count = sum(1 for x in self.entries())
+        self._file  = open(self.filename, 'ab')
+        return self
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def record(self, sen:Sentence, negated:bool=None):
+        """ Append a sentence, as an insertion or a retraction """
+        if self._file is None:
+            self.open()
+
+        if negated is None:
+            negated = bool(sen.data.get(NEGATION_S, False))
+
+        form, payload = encode_sentence(sen)
+        op = DELETE_OP if negated else INSERT_OP
+        self._file.write(ENTRY.pack(op, form, len(payload), zlib.crc32(payload)))
+        self._file.write(payload)
+        self._flush()
+        self._count += 1
+
+    def _flush(self):
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _snapshot_crc(self, filename:str=None) -> int:
+        filename = filename or self.snapshot
+        if filename is None or not os.path.exists(filename):
+            return 0
+
+        with open(filename, 'rb') as f:
+            return zlib.crc32(f.read())
+
+    def _write_empty(self, filename:str, snapshot_crc:int):
+        with open(filename, 'wb') as f:
+            f.write(JOURNAL_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, snapshot_crc))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def _read(self) -> Tuple[int, memoryview]:
+        with open(self.filename, 'rb') as f:
+            buffer = memoryview(f.read())
+
+        if len(buffer) < JOURNAL_HEADER.size:
+            raise AcabSnapshotException("Truncated Journal Header", self.filename)
+
+        magic, version, snapshot_crc = JOURNAL_HEADER.unpack_from(buffer, 0)
+        if magic != JOURNAL_MAGIC:
+            raise AcabSnapshotException("Not an Acab Journal", self.filename)
+        if version != JOURNAL_VERSION:
+            raise AcabSnapshotException(f"Unsupported Journal Version: {version}", self.filename)
+
+        return snapshot_crc, buffer
+
+    def entries(self) -> Iterator[Tuple[int, Sentence]]:
+        """ Read the journal's (op, sentence) entries in order.
+        A torn or corrupt tail is truncated from the file, with a warning.
+        """
+        _, buffer = self._read()
+        offset = JOURNAL_HEADER.size
+        while offset < len(buffer):
+            end = offset + ENTRY.size
+            if len(buffer) < end:
+                break
+
+            op, form, length, crc = ENTRY.unpack_from(buffer, offset)
+            payload = buffer[end:end + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                break
+
+            yield op, decode_sentence(form, payload)
+            offset = end + length
+
+        if offset < len(buffer):
+            logging.warning(f"Truncating torn Journal tail at {offset}: {self.filename}")
+            if self._file is not None:
+                self._file.flush()
+            os.truncate(self.filename, offset)
+
+    def replay(self, semantics, struct:Structure) -> int:
+        """ Apply the journal's entries to a struct, without re-recording them.
+        Returns the number of entries replayed
+        """
+        if not os.path.exists(self.filename):
+            return 0
+
+        journal = struct.components.pop('journal', None)
+        count   = 0
+        try:
+            for op, sen in self.entries():
+                try:
+                    if op == DELETE_OP:
+                        semantics._delete(sen, struct)
+                    else:
+                        semantics.insert(sen, struct)
+                except AcabSemanticException as err:
+                    # Entries are written ahead, so may have failed originally too
+                    logging.warning(f"Journal entry failed to replay: {err}")
+
+                count += 1
+        finally:
+            if journal is not None:
+                struct.components['journal'] = journal
+
+        logging.info(f"Replayed {count} Journal entries from {self.filename}")
+        return count
+
+    def recover(self, semantics, struct:Structure) -> Structure:
+        """ Rebuild a struct from the last snapshot and the journal,
+        then attach this journal to it """
+        self.close()
+        snapshot_crc = self._snapshot_crc()
+        if snapshot_crc != 0:
+            load_snapshot(self.snapshot, struct=struct)
+
+        if os.path.exists(self.filename) and self._read()[0] != snapshot_crc:
+            # Interrupted after the snapshot of a compaction was swapped in
+            logging.warning(f"Journal already compacted into snapshot, discarding: {self.filename}")
+            self._write_empty(self.filename, snapshot_crc)
+
+        self.replay(semantics, struct)
+        self.open()
+        struct.components['journal'] = self
+        return struct
+
+    def compact(self, struct:Structure):
+        """ Save the struct as the snapshot, then empty the journal.
+        The new snapshot and journal are written beside the old ones,
+        then swapped in. The journal records the crc of its snapshot,
+        so recovery can tell if a crash left a stale journal.
+        """
+        if self.snapshot is None:
+            raise AcabSnapshotException("Journal compaction needs a snapshot filename", self.filename)
+
+        temp_snapshot = f"{self.snapshot}.tmp"
+        temp_journal  = f"{self.filename}.tmp"
+        save_snapshot(struct, temp_snapshot)
+        self._write_empty(temp_journal, self._snapshot_crc(temp_snapshot))
+
+        self.close()
+        os.replace(temp_snapshot, self.snapshot)
+        os.replace(temp_journal, self.filename)
+        self._count = 0
+        self.open()
+        logging.info(f"Compacted Journal into {self.snapshot}")
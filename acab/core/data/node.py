@@ -5,14 +5,15 @@ AcabNode: The internal type which knowledge base data structures use.
 import logging as root_logger
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
-from uuid import UUID, uuid1
+from uuid import UUID
 from weakref import ref, ReferenceType
 
 from acab import types as AT
 import acab.interfaces.data as DI
 import acab.interfaces.value as VI
 from acab.core.config.config import AcabConfig
-from acab.core.data.values import AcabValue, Sentence
+from acab.core.data.values import AcabValue, Sentence, SymbolId, SymbolTable
+from acab.core.util.identity import AcabId, next_id
 
 from acab.core.data.default_structure import ROOT
 logging = root_logger.getLogger(__name__)
@@ -28,11 +29,14 @@ class AcabNode(DI.Node_i):
     """
     # TODO make children a dict of dicts
     # value  : AcabValue       = field(default=None)
+    # children are keyed by the SymbolTable id of their value's name
     data     : Dict[str, Any]                = field(default_factory=dict)
     path     : Sentence                      = field(default=None)
     parent   : Optional[ReferenceType]       = field(default=None)
-    children : Dict[str, Node]               = field(default_factory=dict)
-    uuid     : UUID                          = field(default_factory=uuid1)
+    children : Dict[int, Node]               = field(default_factory=dict)
+    id       : AcabId                        = field(default_factory=next_id)
+    # The forked struct the node belongs to, see BasicNodeStruct.fork
+    owner    : Optional[AcabId]              = field(default=None, compare=False, repr=False)
 
     @staticmethod
     def Root():
@@ -68,53 +72,55 @@ class AcabNode(DI.Node_i):
         return iter(self.children.values())
 
     def __hash__(self):
-        return hash(self.uuid)
+        return hash(self.id)
+
+    @property
+    def uuid(self) -> UUID:
+        """ Built from the id only when asked for """
+        return self.id.uuid
 
     @property
     def name(self):
         return str(self.value)
 
+    @property
+    def key(self) -> int:
+        """ The interned id of the node's value """
+        return self.value.key
+
+    @staticmethod
+    def _child_key(term) -> Optional[int]:
+        """ Coerce a str, SymbolId, value or node to a child map key """
+        if isinstance(term, AcabNode):
+            return term.value.key
+        elif isinstance(term, (AcabValue, str, int)):
+            return SymbolTable.key(term)
+
+        return None
+
     def add_child(self, node) -> Node:
         """ Add a node as a child of this node
         mutate object
         """
         assert(isinstance(node, AcabNode))
-        self.children[str(node)] = node
+        self.children[node.value.key] = node
         node.set_parent(self)
         return node
 
     def get_child(self, node) -> Node:
-        """ Get a node using a string, or a node itself """
-        if isinstance(node, str):
-            return self.children[node]
-
-        return self.children[str(node)]
+        """ Get a node using a string, id, value, or a node itself """
+        return self.children[AcabNode._child_key(node)]
 
     def has_child(self, term) -> bool:
         """ Question if this term has a particular child """
-        if isinstance(term, str):
-            return term in self.children
-        elif isinstance(term, AcabNode):
-            return term.name in self.children
-        elif isinstance(term, AcabValue):
-            return str(term) in self.children
-        else:
-            return False
+        return AcabNode._child_key(term) in self.children
 
     def remove_child(self, node) -> Optional[Node]:
         """ Delete a child from this node, return success state
         mutate object
         """
-        result = None
-        if self.has_child(node):
-            result = self.get_child(node)
-            if isinstance(node, str):
-                del self.children[node]
-            else:
-                del self.children[str(node)]
-
-
-        return result
+        key = AcabNode._child_key(node)
+        return self.children.pop(key, None)
 
     def clear_children(self):
         """ Remove all children from this node
@@ -148,3 +154,185 @@ class AcabNode(DI.Node_i):
     def _update_node(self, path, data, context):
         """ Called by a semantics for passing through a node """
         pass
+
+
+class CompactNode(DI.Node_i):
+    """ A lightweight handle onto a node of a CompactNodeStruct.
+    The struct holds the node's state in parallel arrays,
+    handles are made on access, and are cheap to discard.
+
+    A handle made by `detached` is not yet in a struct,
+    and just carries its value and data until it is inserted.
+    Handles to removed nodes are invalid, as their slots are reused.
+    """
+    __slots__ = ("store", "index", "_value", "_data")
+
+    def __init__(self, store, index:int, value=None, data=None):
+        self.store  = store
+        self.index  = index
+        self._value = value
+        self._data  = data
+
+    @staticmethod
+    def Root():
+        raise TypeError("CompactNode roots are created by CompactNodeStruct.build_default")
+
+    @staticmethod
+    def detached(value, data=None) -> 'CompactNode':
+        if isinstance(value, DI.Node_i):
+            raise TypeError("Nodes shouldn't have nodes inside them")
+        if not isinstance(value, VI.Value_i):
+            raise TypeError("Nodes Must have Values inside them")
+
+        return CompactNode(None, -1, value=value, data=data or {})
+
+    @property
+    def is_attached(self) -> bool:
+        return self.store is not None
+
+    @property
+    def value(self) -> AcabValue:
+        if self.store is None:
+            return self._value
+        return self.store._values[self.index]
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        if self.store is None:
+            return self._data
+        return self.store._data.setdefault(self.index, {})
+
+    def data_get(self, key, default=None):
+        """ Read from the node's data, without allocating it """
+        if self.store is None:
+            return self._data.get(key, default)
+
+        node_data = self.store._data.get(self.index, None)
+        if node_data is None:
+            return default
+        return node_data.get(key, default)
+
+    @property
+    def id(self) -> int:
+        return self.index
+
+    @property
+    def children(self) -> Dict[int, 'CompactNode']:
+        """ Built on request, prefer iterating the node """
+        return {child.key: child for child in self}
+
+    @property
+    def parent(self) -> Optional[ReferenceType]:
+        """ Mirrors AcabNode.parent, by returning a callable """
+        if self.store is None:
+            return None
+        parent = self.store._parent[self.index]
+        if parent < 0:
+            return None
+        return lambda: CompactNode(self.store, parent)
+
+    def __str__(self):
+        return self.value.name
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, str(self))
+
+    def __len__(self):
+        if self.store is None:
+            return 0
+        return self.store._fanout[self.index]
+
+    def __bool__(self):
+        return bool(len(self))
+
+    def __contains__(self, v):
+        return self.has_child(v)
+
+    def __iter__(self):
+        if self.store is None:
+            return iter([])
+        store = self.store
+        return (CompactNode(store, x) for x in store.child_indices(self.index))
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactNode):
+            return False
+        if self.store is None:
+            return self is other
+        return self.store is other.store and self.index == other.index
+
+    def __hash__(self):
+        if self.store is None:
+            return id(self)
+        return hash((id(self.store), self.index))
+
+    @property
+    def name(self):
+        return str(self.value)
+
+    @property
+    def key(self) -> int:
+        if self.store is None:
+            return self._value.key
+        return SymbolId(self.store._key[self.index])
+
+    @staticmethod
+    def _child_key(term) -> Optional[int]:
+        if isinstance(term, (AcabNode, CompactNode)):
+            return term.key
+        elif isinstance(term, (AcabValue, str, int)):
+            return SymbolTable.key(term)
+
+        return None
+
+    def _find(self, term) -> int:
+        if self.store is None:
+            return -1
+        return self.store.find_child(self.index, CompactNode._child_key(term))
+
+    def add_child(self, node) -> 'CompactNode':
+        """ Insert a detached node's value and data as a child of this node """
+        assert(isinstance(node, CompactNode))
+        assert(self.store is not None)
+        index = self.store.add_child(self.index, node.value, node._data)
+        return CompactNode(self.store, index)
+
+    def get_child(self, node) -> 'CompactNode':
+        index = self._find(node)
+        if index < 0:
+            raise KeyError(node)
+        return CompactNode(self.store, index)
+
+    def has_child(self, term) -> bool:
+        return 0 <= self._find(term)
+
+    def remove_child(self, node) -> Optional['CompactNode']:
+        """ Remove a child, returning a detached copy of it """
+        index = self._find(node)
+        if index < 0:
+            return None
+
+        removed = CompactNode.detached(self.store._values[index],
+                                       self.store._data.get(index, None))
+        self.store.remove_child(self.index, index)
+        return removed
+
+    def clear_children(self):
+        if self.store is not None:
+            self.store.clear_children(self.index)
+
+    @property
+    def parentage(self) -> Sentence:
+        path = [self.value]
+        current = self.parent
+        while current is not None:
+            path.append(current().value)
+            current = current().parent
+
+        path.reverse()
+        return Sentence.build(path)
+
+    def _default_setup(self, path: [Node], data: Dict[Any,Any], context: Dict[Any,Any]):
+        pass
+    def _update_node(self, path, data, context):
+        pass
@@ -52,11 +52,19 @@ class ProductionOperator(AcabValue):
         super(ProductionOperator, self).__post_init__()
         object.__setattr__(self, 'name', self.__class__.__name__)
         object.__setattr__(self, 'value', self.name)
+        self._intern_name()
         self.data[DS.TYPE_INSTANCE] =  DS.OPERATOR_PRIM
 
     def __call__(self, *params: List[Value], data=None):
         raise NotImplementedError()
 
+    def batch(self, values:List[Value], *params: Value, data=None) -> Sequence[bool]:
+        """ Test many values against the same params, returning a mask of those that pass.
+        Calls the operator on each value, unless overridden
+        to test them all at once (see acab.core.util.vectorise)
+        """
+        return [bool(self(x, *params, data=data)) for x in values]
+
     def copy(self, **kwargs):
         """ Operators by default are immutable, and don't need to duplicate """
         return self
@@ -0,0 +1,684 @@
+"""
+Binary snapshots of a BasicNodeStruct,
+for saving and loading a working memory without the printer or parser,
+and for mapping a read-only working memory straight from disk.
+
+Layout, little endian, with every section 4 byte aligned:
+  Header  : MAGIC, version:H, flags:H,
+            then counts of strings, data dicts, value records and nodes,
+            and the length of the complex value blob, each as I.
+  Strings : utf-8, referenced by index.
+  Data    : deduplicated data dicts of values and nodes.
+  Records : deduplicated plain AcabValues, as name, value, data and tags.
+            Each of these tables is an array of count+1 offsets, then a blob.
+  Complex : a pickle of the values which aren't plain, eg: statements.
+  Nodes   : arrays of parent, record, node data, and name string indices.
+            Nodes are in breadth first order, numbered from 1. The root is 0.
+            So a node's children are contiguous,
+            and the parent array is sorted.
+  Order   : node numbers, ordered by name within each run of siblings,
+            for binary searching a node's children.
+"""
+import io
+import logging as root_logger
+import mmap
+import pickle
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from enum import Enum
+from functools import lru_cache
+from itertools import islice
+from struct import Struct
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import acab.interfaces.data as DI
+from acab.core.config.config import AcabConfig
+from acab.core.data.acab_struct import AcabStruct, BasicNodeStruct
+from acab.core.data.node import AcabNode
+from acab.core.data.default_structure import ROOT
+from acab.core.data.values import AcabValue, Sentence, SymbolId, SymbolTable
+from acab.error.acab_exception import AcabException
+
+logging = root_logger.getLogger(__name__)
+config  = AcabConfig.Get()
+
+MAGIC            = b"ACABSNAP"
+SNAPSHOT_VERSION = 2
+
+HEADER = Struct("<8sHHIIIII")
+COUNT  = Struct("<I")
+SHORT  = Struct("<H")
+ITEM   = Struct("<IB")
+INT    = Struct("<q")
+FLOAT  = Struct("<d")
+RECORD = Struct("<IIIH")
+ENUM   = Struct("<II")
+ALIGN  = 4
+
+# Data value tags
+NONE_T, FALSE_T, TRUE_T, INT_T, FLOAT_T, STR_T, ENUM_T, SEN_T = range(8)
+# Records with this as their name index are complex
+COMPLEX = 0xFFFFFFFF
+
+
+class AcabSnapshotException(AcabException):
+    """ Raised for unreadable or incompatible snapshots """
+    pass
+
+
+class _Pickler(pickle.Pickler):
+    """ Config enums are created dynamically, so can't be pickled by reference """
+
+    def persistent_id(self, obj):
+        if isinstance(obj, Enum) and type(obj) in config.enums.values():
+            return (type(obj).__name__, obj.name)
+        return None
+
+class _Unpickler(pickle.Unpickler):
+
+    def persistent_load(self, pid):
+        enum_name, member = pid
+        return _enum(enum_name)[member]
+
+
+def pickle_values(values:Any) -> bytes:
+    with io.BytesIO() as buf:
+        _Pickler(buf, protocol=pickle.HIGHEST_PROTOCOL).dump(values)
+        return buf.getvalue()
+
+def unpickle_values(blob) -> Any:
+    return _Unpickler(io.BytesIO(blob)).load()
+
+
+def _enum(name):
+    for enum_cls in config.enums.values():
+        if enum_cls.__name__ == name:
+            return enum_cls
+
+    raise AcabSnapshotException("Unknown Enum in Snapshot", name)
+
+
+@dataclass
+class SnapshotWriter:
+    """ Accumulates the tables of a snapshot, while walking a struct """
+
+    strings  : Dict[str, int]    = field(default_factory=dict)
+    data     : Dict[bytes, int]  = field(default_factory=dict)
+    records  : Dict[bytes, int]  = field(default_factory=dict)
+    complex  : List[AcabValue]   = field(default_factory=list)
+
+    _simple_types : Dict[int, bool] = field(default_factory=dict)
+
+    def string(self, text:str) -> int:
+        if text not in self.strings:
+            self.strings[text] = len(self.strings)
+        return self.strings[text]
+
+    def encode_data(self, data:Dict[str, Any]) -> Optional[int]:
+        """ Add a data dict to the table, returning None if it can't be encoded """
+        buf = [SHORT.pack(len(data))]
+        for key, val in data.items():
+            if not isinstance(key, str):
+                return None
+
+            key_id = self.string(key)
+            if val is None:
+                buf.append(ITEM.pack(key_id, NONE_T))
+            elif val is True or val is False:
+                buf.append(ITEM.pack(key_id, TRUE_T if val else FALSE_T))
+            elif type(val) is int:
+                buf += [ITEM.pack(key_id, INT_T), INT.pack(val)]
+            elif type(val) is float:
+                buf += [ITEM.pack(key_id, FLOAT_T), FLOAT.pack(val)]
+            elif type(val) is str:
+                buf += [ITEM.pack(key_id, STR_T), COUNT.pack(self.string(val))]
+            elif isinstance(val, Enum) and type(val) in config.enums.values():
+                buf += [ITEM.pack(key_id, ENUM_T),
+                        ENUM.pack(self.string(type(val).__name__), self.string(val.name))]
+            elif isinstance(val, Sentence) and self._is_simple_sentence(val):
+                buf += [ITEM.pack(key_id, SEN_T), SHORT.pack(len(val))]
+                buf += [COUNT.pack(self.string(x.name)) for x in val.words]
+            else:
+                return None
+
+        encoded = b"".join(buf)
+        if encoded not in self.data:
+            self.data[encoded] = len(self.data)
+        return self.data[encoded]
+
+    def _is_simple_sentence(self, sen) -> bool:
+        """ Sentences which Sentence.build can recreate from their names """
+        if id(sen) not in self._simple_types:
+            rebuilt = Sentence.build([x.name for x in sen.words])
+            simple  = sen.data == rebuilt.data and all([type(x) is AcabValue
+                                                        and x.value == x.name
+                                                        and x.data == y.data
+                                                        for x, y in zip(sen.words, rebuilt.words)])
+            self._simple_types[id(sen)] = simple
+
+        return self._simple_types[id(sen)]
+
+    def encode_value(self, value:AcabValue) -> int:
+        record = None
+        if type(value) is AcabValue and type(value.value) is str and not bool(value.params):
+            record = self._simple_record(value)
+
+        if record is None:
+            record = RECORD.pack(COMPLEX, len(self.complex), 0, 0)
+            self.complex.append(value)
+
+        if record not in self.records:
+            self.records[record] = len(self.records)
+        return self.records[record]
+
+    def _simple_record(self, value) -> Optional[bytes]:
+        if not all([type(x) is AcabValue for x in value.tags]):
+            return None
+
+        data_id = self.encode_data(value.data)
+        if data_id is None:
+            return None
+
+        tags = sorted([self.string(x.name) for x in value.tags])
+        return b"".join([RECORD.pack(self.string(value.name),
+                                     self.string(value.value),
+                                     data_id,
+                                     len(tags))]
+                        + [COUNT.pack(x) for x in tags])
+
+    def write(self, stream, nodes:List[array]):
+        complex_blob = b""
+        if bool(self.complex):
+            complex_blob = pickle_values(self.complex)
+
+        stream.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION, 0,
+                                 len(self.strings), len(self.data),
+                                 len(self.records), len(nodes[0]),
+                                 len(complex_blob)))
+
+        strings = [x.encode("utf-8") for x in self.strings]
+        for table in [strings, list(self.data), list(self.records)]:
+            offsets = array('I', [0])
+            for encoded in table:
+                offsets.append(offsets[-1] + len(encoded))
+            _write_array(stream, offsets)
+            _write_padded(stream, b"".join(table))
+
+        _write_padded(stream, complex_blob)
+        for arr in nodes:
+            _write_array(stream, arr)
+
+
+def _write_padded(stream, blob:bytes):
+    stream.write(blob)
+    stream.write(b"\0" * (-len(blob) % ALIGN))
+
+def _write_array(stream, arr:array):
+    if sys.byteorder == "big":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    stream.write(arr.tobytes())
+
+
+def save_snapshot(struct:BasicNodeStruct, filename:str):
+    """ Write a BasicNodeStruct to a binary snapshot file """
+    writer  = SnapshotWriter()
+    nodes   = [array('I') for x in range(5)]
+    parents, records, node_data, names, by_name = nodes
+
+    # Breadth first, so parents are always numbered before children
+    queue   = []
+    def enqueue(parent, node):
+        start    = len(queue) + 1
+        children = list(node.children.values())
+        queue.extend([(parent, x) for x in children])
+        by_name.extend(sorted(range(start, start + len(children)),
+                              key=lambda x: queue[x - 1][1].value.name))
+
+    enqueue(0, struct.root)
+    current = 0
+    while current < len(queue):
+        parent, node = queue[current]
+        current += 1
+        data_id = writer.encode_data(node.data)
+        if data_id is None:
+            raise AcabSnapshotException("Node data can't be snapshot", node)
+
+        parents.append(parent)
+        records.append(writer.encode_value(node.value))
+        node_data.append(data_id)
+        names.append(writer.string(node.value.name))
+        enqueue(current, node)
+
+    with open(filename, 'wb') as f:
+        writer.write(f, nodes)
+
+    logging.info(f"Saved Snapshot of {len(parents)} nodes to {filename}")
+
+
+def decode_data(encoded, string:Callable[[int], str]) -> Dict[str, Any]:
+    """ Decode a data dict, with a function from string index to string """
+    offset = SHORT.size
+    result = {}
+    def read(fmt):
+        nonlocal offset
+        values = fmt.unpack_from(encoded, offset)
+        offset += fmt.size
+        return values
+
+    for x in range(SHORT.unpack_from(encoded, 0)[0]):
+        key_id, tag = read(ITEM)
+        key = string(key_id)
+        if tag == NONE_T:
+            result[key] = None
+        elif tag == FALSE_T or tag == TRUE_T:
+            result[key] = tag == TRUE_T
+        elif tag == INT_T:
+            result[key] = read(INT)[0]
+        elif tag == FLOAT_T:
+            result[key] = read(FLOAT)[0]
+        elif tag == STR_T:
+            result[key] = string(read(COUNT)[0])
+        elif tag == ENUM_T:
+            enum_name, member = read(ENUM)
+            result[key] = _enum(string(enum_name))[string(member)]
+        elif tag == SEN_T:
+            words = [string(read(COUNT)[0]) for y in range(read(SHORT)[0])]
+            result[key] = Sentence.build(words)
+        else:
+            raise AcabSnapshotException("Unknown Data Tag in Snapshot", tag)
+
+    return result
+
+def decode_record(encoded,
+                  string:Callable[[int], str],
+                  data:Callable[[int], Dict],
+                  complex_values:Callable[[], List[AcabValue]]) -> AcabValue:
+    """ Decode a value record, given accessors for the other tables """
+    name_id, value_id, data_id, tag_count = RECORD.unpack_from(encoded, 0)
+    if name_id == COMPLEX:
+        return complex_values()[value_id]
+
+    tags = {AcabValue(string(COUNT.unpack_from(encoded, RECORD.size + x * COUNT.size)[0]))
+            for x in range(tag_count)}
+    return AcabValue(value=string(value_id),
+                     name=string(name_id),
+                     data=data(data_id).copy(),
+                     tags=tags)
+
+
+@dataclass
+class SnapshotReader:
+    """ Decodes a snapshot on demand, from a bytes-like buffer.
+    Strings, data and records are decoded when first asked for,
+    and kept in lru caches of cache_size (None for unbounded).
+    Decoded data and values are shared, so copy them to modify them.
+    """
+
+    buffer     : memoryview    = field()
+    cache_size : Optional[int] = field(default=None)
+
+    header     : Tuple         = field(init=False)
+    parents    : memoryview    = field(init=False)
+    records    : memoryview    = field(init=False)
+    node_data  : memoryview    = field(init=False)
+    names      : memoryview    = field(init=False)
+    by_name    : memoryview    = field(init=False)
+
+    string     : Callable[[int], str]       = field(init=False, repr=False)
+    data       : Callable[[int], Dict]      = field(init=False, repr=False)
+    record     : Callable[[int], AcabValue] = field(init=False, repr=False)
+
+    _offset    : int                        = field(init=False, default=0)
+    _tables    : List[Tuple]                = field(init=False, default_factory=list)
+    _complex_blob : memoryview              = field(init=False, default=None)
+    _complex   : Optional[List[AcabValue]]  = field(init=False, default=None)
+
+    def __post_init__(self):
+        if len(self.buffer) < HEADER.size:
+            raise AcabSnapshotException("Truncated Snapshot Header")
+
+        self.header = HEADER.unpack_from(self.buffer, 0)
+        magic, version, flags, n_strings, n_data, n_records, n_nodes, complex_len = self.header
+        if magic != MAGIC:
+            raise AcabSnapshotException("Not an Acab Snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise AcabSnapshotException(f"Unsupported Snapshot Version: {version}")
+
+        self._offset = HEADER.size
+        for count in [n_strings, n_data, n_records]:
+            offsets = self._read_array(count + 1)
+            self._tables.append((offsets, self._read_bytes(offsets[-1])))
+
+        self._complex_blob = self._read_bytes(complex_len)
+        self.parents, self.records, self.node_data, self.names, self.by_name = [self._read_array(n_nodes) for x in range(5)]
+
+        self.string = lru_cache(maxsize=self.cache_size)(self._decode_string)
+        self.data   = lru_cache(maxsize=self.cache_size)(self._decode_data)
+        self.record = lru_cache(maxsize=self.cache_size)(self._decode_record)
+
+    def __len__(self):
+        """ The number of nodes, excluding the root """
+        return self.header[6]
+
+    def _read_bytes(self, length:int) -> memoryview:
+        end = self._offset + length
+        if len(self.buffer) < end:
+            raise AcabSnapshotException("Truncated Snapshot")
+
+        result = self.buffer[self._offset:end]
+        self._offset = end + (-length % ALIGN)
+        return result
+
+    def _read_array(self, count:int):
+        """ A view onto the buffer, or on big endian machines, a swapped copy """
+        raw = self._read_bytes(count * COUNT.size)
+        if sys.byteorder == "big":
+            arr = array('I', bytes(raw))
+            arr.byteswap()
+            return arr
+
+        return raw.cast('I')
+
+    def _entry(self, table:int, index:int) -> memoryview:
+        offsets, blob = self._tables[table]
+        return blob[offsets[index]:offsets[index + 1]]
+
+    def _decode_string(self, index:int) -> str:
+        return str(self._entry(0, index), "utf-8")
+
+    def _decode_data(self, index:int) -> Dict[str, Any]:
+        return decode_data(self._entry(1, index), self.string)
+
+    def _decode_record(self, index:int) -> AcabValue:
+        return decode_record(self._entry(2, index), self.string, self.data, self.complex_values)
+
+    def complex_values(self) -> List[AcabValue]:
+        if self._complex is None:
+            self._complex = []
+            if bool(self._complex_blob):
+                self._complex = unpickle_values(self._complex_blob)
+
+        return self._complex
+
+    def child_range(self, node:int) -> Tuple[int, int]:
+        """ The positions in the node arrays of a node's children.
+        Position i holds node i+1.
+        """
+        return bisect_left(self.parents, node), bisect_right(self.parents, node)
+
+    def find_child(self, node:int, name:str) -> int:
+        """ Binary search a node's children by name, returning 0 on failure """
+        lo, hi = self.child_range(node)
+        while lo < hi:
+            mid   = (lo + hi) // 2
+            child = self.by_name[mid]
+            child_name = self.string(self.names[child - 1])
+            if child_name == name:
+                return child
+            elif child_name < name:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        return 0
+
+    def release(self):
+        """ Release the views onto the buffer """
+        self.string.cache_clear()
+        self.data.cache_clear()
+        self.record.cache_clear()
+        views = [self.parents, self.records, self.node_data, self.names, self.by_name, self._complex_blob]
+        views += [y for x in self._tables for y in x]
+        views.append(self.buffer)
+        for view in views:
+            if isinstance(view, memoryview):
+                view.release()
+
+
+def load_snapshot(filename:str, struct:BasicNodeStruct=None) -> BasicNodeStruct:
+    """ Read a snapshot file into a new BasicNodeStruct,
+    or replace the contents of the one passed in """
+    with open(filename, 'rb') as f:
+        try:
+            reader = SnapshotReader(memoryview(f.read()))
+        except AcabSnapshotException as err:
+            raise AcabSnapshotException(err.args[0], filename) from err
+
+    fresh = BasicNodeStruct.build_default()
+    if struct is None:
+        struct = fresh
+    else:
+        struct.root = fresh.root
+        struct.components.update(fresh.components)
+        if 'change_log' in struct.components:
+            # Its deltas are of the replaced nodes
+            struct.components['change_log'].clear()
+
+    indexes   = struct.indexes
+    all_nodes = struct.components['all_nodes']
+    nodes     = [struct.root]
+    used      = set()
+    for parent, record, data_id in zip(reader.parents, reader.records, reader.node_data):
+        value = reader.record(record)
+        # Values are shared within the snapshot, so copy repeats
+        if record in used:
+            value = value.copy()
+        used.add(record)
+
+        node = AcabNode(value, data=reader.data(data_id).copy())
+        nodes[parent].add_child(node)
+        nodes.append(node)
+        all_nodes[node.id] = node
+        for index in indexes:
+            index.add(node)
+
+    logging.info(f"Loaded Snapshot of {len(reader)} nodes from {filename}")
+    return struct
+
+
+class MappedNode(DI.Node_i):
+    """ A read-only handle onto a node of a MappedNodeStruct.
+    Handles are made on access, and decode their value
+    and data from the snapshot when asked.
+    """
+    __slots__ = ("store", "index")
+
+    def __init__(self, store:SnapshotReader, index:int):
+        self.store = store
+        self.index = index
+
+    @staticmethod
+    def Root():
+        raise TypeError("MappedNode roots are created by MappedNodeStruct.open")
+
+    @property
+    def value(self) -> AcabValue:
+        if self.index == 0:
+            return MappedNodeStruct.ROOT_VALUE
+        return self.store.record(self.store.records[self.index - 1])
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """ Shared between handles, so don't modify it """
+        if self.index == 0:
+            return {}
+        return self.store.data(self.store.node_data[self.index - 1])
+
+    @property
+    def id(self) -> int:
+        return self.index
+
+    @property
+    def name(self) -> str:
+        if self.index == 0:
+            return MappedNodeStruct.ROOT_VALUE.name
+        return self.store.string(self.store.names[self.index - 1])
+
+    @property
+    def key(self) -> int:
+        return SymbolTable.intern(self.name)
+
+    @property
+    def children(self) -> Dict[int, 'MappedNode']:
+        """ Built on request, prefer iterating the node """
+        return {child.key: child for child in self}
+
+    @property
+    def parent(self):
+        """ Mirrors AcabNode.parent, by returning a callable """
+        if self.index == 0:
+            return None
+        parent = self.store.parents[self.index - 1]
+        return lambda: MappedNode(self.store, parent)
+
+    def __str__(self):
+        return self.name
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, str(self))
+
+    def __len__(self):
+        lo, hi = self.store.child_range(self.index)
+        return hi - lo
+
+    def __bool__(self):
+        return bool(len(self))
+
+    def __contains__(self, v):
+        return self.has_child(v)
+
+    def __iter__(self) -> Iterator['MappedNode']:
+        lo, hi = self.store.child_range(self.index)
+        return (MappedNode(self.store, x + 1) for x in range(lo, hi))
+
+    def __eq__(self, other):
+        if not isinstance(other, MappedNode):
+            return False
+        return self.store is other.store and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.store), self.index))
+
+    @staticmethod
+    def _child_name(term) -> Optional[str]:
+        if isinstance(term, (AcabNode, MappedNode)):
+            return term.name
+        elif isinstance(term, AcabValue):
+            return term.name
+        elif isinstance(term, SymbolId):
+            return SymbolTable.name(term)
+        elif isinstance(term, (str, int)):
+            # Plain ints are names, as they are for SymbolTable.key
+            return str(term)
+
+        return None
+
+    def _find(self, term) -> int:
+        name = MappedNode._child_name(term)
+        if name is None:
+            return 0
+        return self.store.find_child(self.index, name)
+
+    def get_child(self, node) -> 'MappedNode':
+        index = self._find(node)
+        if index == 0:
+            raise KeyError(node)
+        return MappedNode(self.store, index)
+
+    def has_child(self, term) -> bool:
+        return self._find(term) != 0
+
+    def add_child(self, node):
+        raise AcabSnapshotException("Mapped Snapshots are read only", node)
+
+    def remove_child(self, node):
+        raise AcabSnapshotException("Mapped Snapshots are read only", node)
+
+    def clear_children(self):
+        raise AcabSnapshotException("Mapped Snapshots are read only", self)
+
+    @property
+    def parentage(self) -> Sentence:
+        path = [self.value]
+        current = self.parent
+        while current is not None:
+            path.append(current().value)
+            current = current().parent
+
+        path.reverse()
+        return Sentence.build(path)
+
+    def _default_setup(self, path, data, context):
+        pass
+    def _update_node(self, path, data, context):
+        pass
+
+
+@dataclass
+class MappedNodeStruct(AcabStruct):
+    """ A read-only struct, memory mapped from a snapshot file.
+    Nodes are decoded lazily, so processes mapping the same file
+    share the page cache instead of each building every node.
+
+    Queries through the trie semantics work as normal,
+    as the nodes implement the independent semantics' access contract.
+    Insertions and removals raise AcabSnapshotException.
+    """
+    root       : MappedNode     = field(default=None)
+
+    _mmap      : mmap.mmap      = field(init=False, default=None, repr=False)
+    _reader    : SnapshotReader = field(init=False, default=None, repr=False)
+
+    ROOT_VALUE  = AcabValue.safe_make(ROOT)
+    CACHE_SIZE  = 2 ** 14
+
+    @staticmethod
+    def build_default():
+        raise TypeError("MappedNodeStructs are created from a snapshot, with MappedNodeStruct.open")
+
+    @staticmethod
+    def open(filename:str, cache_size:int=None) -> 'MappedNodeStruct':
+        with open(filename, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            reader = SnapshotReader(memoryview(mapped),
+                                    cache_size=cache_size or MappedNodeStruct.CACHE_SIZE)
+        except AcabSnapshotException as err:
+            mapped.close()
+            raise AcabSnapshotException(err.args[0], filename) from err
+
+        struct = MappedNodeStruct(MappedNode(reader, 0))
+        struct._mmap   = mapped
+        struct._reader = reader
+        logging.info(f"Mapped Snapshot of {len(reader)} nodes from {filename}")
+        return struct
+
+    def fork(self) -> 'MappedNodeStruct':
+        """ Read only, so forks can share it """
+        return self
+
+    def close(self):
+        """ Unmap the snapshot. Any nodes still held become invalid """
+        if self._mmap is None:
+            return
+
+        self._reader.release()
+        self._mmap.close()
+        self._mmap = None
+
+    def __bool__(self):
+        return bool(self.root)
+
+    def __len__(self):
+        return len(self._reader)
+
+    def __repr__(self):
+        val = f"MappedNodeStruct("
+        val += ";".join([x.name for x in islice(self.root, 5)])
+        val += "..."
+        val += ")"
+        return val
@@ -0,0 +1,132 @@
+"""
+A struct of subject.predicate.object sentences,
+indexed in three permutations, so any pattern of bound and unbound
+positions is an index lookup, instead of a scan.
+
+SPO is a three level trie of AcabNodes, from the root.
+POS and OSP map the interned keys of the other orderings
+to the same SPO leaves, so query results are always SPO trie nodes,
+and can be bound by contexts like any other trie's.
+
+    Pattern  : Index
+    s p o    : SPO
+    s p $o   : SPO
+    s $p o   : OSP
+    s $p $o  : SPO
+    $s p o   : POS
+    $s p $o  : POS
+    $s $p o  : OSP
+    $s $p $o : SPO scan
+"""
+import logging as root_logger
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from acab.core.data.acab_struct import AcabStruct
+from acab.core.data.node import AcabNode
+
+logging = root_logger.getLogger(__name__)
+
+TRIPLE = 3
+
+# Key -> Key -> Key -> Leaf
+PermutationIndex = Dict[int, Dict[int, Dict[int, AcabNode]]]
+
+
+@dataclass
+class TripleStore(AcabStruct):
+    """ A hexastore, of the SPO, POS and OSP permutations """
+
+    _pos   : PermutationIndex = field(init=False, default_factory=dict, repr=False)
+    _osp   : PermutationIndex = field(init=False, default_factory=dict, repr=False)
+    _count : int              = field(init=False, default=0)
+
+    @staticmethod
+    def build_default() -> 'TripleStore':
+        logging.info(f"Building Triple Store")
+        return TripleStore(AcabNode.Root())
+
+    def __bool__(self):
+        return bool(self._count)
+
+    def __len__(self):
+        """ The number of triples """
+        return self._count
+
+    def __repr__(self):
+        return f"TripleStore({self._count} triples)"
+
+    def index(self, leaf:AcabNode):
+        """ Add a newly inserted SPO leaf to the other permutations """
+        s, p, o = self.keys(leaf)
+        self._pos.setdefault(p, {}).setdefault(o, {})[s] = leaf
+        self._osp.setdefault(o, {}).setdefault(s, {})[p] = leaf
+        self._count += 1
+
+    def unindex(self, leaf:AcabNode):
+        s, p, o = self.keys(leaf)
+        for index, first, second, third in [(self._pos, p, o, s), (self._osp, o, s, p)]:
+            del index[first][second][third]
+            if not bool(index[first][second]):
+                del index[first][second]
+            if not bool(index[first]):
+                del index[first]
+
+        self._count -= 1
+
+    @staticmethod
+    def keys(leaf:AcabNode) -> List[int]:
+        """ The (s, p, o) keys of a leaf """
+        predicate = leaf.parent()
+        subject   = predicate.parent()
+        return [subject.key, predicate.key, leaf.key]
+
+    def leaves(self, node:Optional[AcabNode]=None) -> Iterator[AcabNode]:
+        """ The leaves under an SPO node, defaulting to all of them """
+        if node is None:
+            node = self.root
+
+        queue = [node]
+        while bool(queue):
+            current = queue.pop()
+            if not bool(current.children):
+                if current is not self.root:
+                    yield current
+                continue
+            queue += current.children.values()
+
+    def match(self, s:Optional[int]=None, p:Optional[int]=None, o:Optional[int]=None) -> Iterator[AcabNode]:
+        """ The leaves of the triples matching a pattern of keys,
+        where None is unbound """
+        if s is not None and p is not None:
+            yield from self._match_spo(s, p, o)
+        elif p is not None:
+            yield from self._lookup(self._pos, p, o)
+        elif o is not None:
+            yield from self._lookup(self._osp, o, s)
+        elif s is not None:
+            if self.root.has_child(s):
+                yield from self.leaves(self.root.get_child(s))
+        else:
+            yield from self.leaves()
+
+    def _match_spo(self, s, p, o) -> Iterator[AcabNode]:
+        if not self.root.has_child(s):
+            return
+        subject = self.root.get_child(s)
+        if not subject.has_child(p):
+            return
+        predicate = subject.get_child(p)
+        if o is None:
+            yield from predicate.children.values()
+        elif predicate.has_child(o):
+            yield predicate.get_child(o)
+
+    def _lookup(self, index:PermutationIndex, first:int, second:Optional[int]) -> Iterator[AcabNode]:
+        if first not in index:
+            return
+        if second is None:
+            for leaves in index[first].values():
+                yield from leaves.values()
+        elif second in index[first]:
+            yield from index[first][second].values()
@@ -9,13 +9,14 @@ from re import Pattern
 from typing import (Any, Callable, ClassVar, Dict, Generic, Iterable, Iterator,
                     List, Mapping, Match, MutableMapping, Optional, Sequence,
                     Set, Tuple, TypeVar, Union, cast)
-from uuid import UUID, uuid1
+from uuid import UUID
 from weakref import ref
 
 from acab import types as AT
 import acab.interfaces.value as VI
 from acab.core.config.config import AcabConfig
 import acab.core.data.default_structure as DS
+from acab.core.util.identity import next_id
 
 logging          = root_logger.getLogger(__name__)
 
@@ -33,11 +34,66 @@ Value     = AT.Value
 Sen       = AT.Sentence
 Statement = AT.Statement
 
+# Fields that AcabValue.copy can change without re-initialising
+_CLONEABLE_FIELDS = {"data", "params", "tags"}
+# Fields that are only valid in the process that set them, so aren't pickled
+_PROCESS_LOCAL_FIELDS = ("id", "_key", "_hash", "_str")
+
+class SymbolId(int):
+    """ The id of an interned name.
+    Distinct from plain ints, which are interned by name like any other term
+    """
+    __slots__ = ()
+
+    def __repr__(self):
+        return f"SymbolId({int(self)})"
+
+
+class SymbolTable:
+    """ The Global Intern Table of value names.
+    Maps each distinct name to a small integer id, and back again,
+    so structures can key on ints instead of rebuilding strings
+    """
+    _ids   : ClassVar[Dict[str, SymbolId]] = {}
+    _names : ClassVar[List[str]]           = []
+
+    @staticmethod
+    def intern(name: str) -> SymbolId:
+        """ Get the id of a name, registering it if necessary """
+        try:
+            return SymbolTable._ids[name]
+        except KeyError:
+            sym_id = SymbolId(len(SymbolTable._names))
+            SymbolTable._ids[name] = sym_id
+            SymbolTable._names.append(name)
+            return sym_id
+
+    @staticmethod
+    def name(sym_id: SymbolId) -> str:
+        """ Get the name registered to an id """
+        return SymbolTable._names[sym_id]
+
+    @staticmethod
+    def key(term: Union[SymbolId, str, Value]) -> SymbolId:
+        """ Coerce a symbol id, str, or value into its interned id.
+        Anything else, including plain ints, is interned by its str """
+        if isinstance(term, SymbolId):
+            return term
+        if isinstance(term, AcabValue):
+            return term.key
+
+        return SymbolTable.intern(str(term))
+
+
 @dataclass(frozen=True)
 class AcabValue(VI.Value_i, Generic[T]):
-    _value_types : ClassVar[Set[Any]] = set([VI.Value_i, str, Pattern, list])
+    _value_types : ClassVar[Set[Any]] = set([VI.Value_i, str, Pattern, list, tuple])
     value        : T                  = field(default=None)
 
+    # Interned name id and cached hash, set in __post_init__
+    _key         : int                = field(init=False, default=None, repr=False, compare=False)
+    _hash        : int                = field(init=False, default=None, repr=False, compare=False)
+
     @staticmethod
     def safe_make(value: T,
                   name: str=None,
@@ -79,7 +135,7 @@ class AcabValue(VI.Value_i, Generic[T]):
             assert(isinstance(self.name, str)), self.name
         elif isinstance(self.value, Pattern):
             name_update = self.value.pattern
-        elif isinstance(self.value, (list, VI.Statement_i)):
+        elif isinstance(self.value, (list, tuple, VI.Statement_i)):
             name_update = ANON_VALUE
         else:
             name_update = str(self.value)
@@ -93,6 +149,8 @@ class AcabValue(VI.Value_i, Generic[T]):
             object.__setattr__(self, "value", self.name)
             # self.value = self.name
 
+        self._intern_name()
+
         if DS.TYPE_INSTANCE not in self.data:
             self.data[DS.TYPE_INSTANCE] = DS.TYPE_BOTTOM_NAME
 
@@ -129,7 +187,7 @@ class AcabValue(VI.Value_i, Generic[T]):
                                      val_str)
 
     def __hash__(self):
-        return hash(repr(self))
+        return self._hash
 
     def __eq__(self, other):
         """ Base eq: compare hashes  """
@@ -139,8 +197,6 @@ class AcabValue(VI.Value_i, Generic[T]):
             return str(self) == other
         elif not isinstance(other, VI.Value_i):
             return False
-        elif self.uuid == other.uuid:
-            return True
         else:
             return str(self) == str(other)
 
@@ -155,6 +211,34 @@ class AcabValue(VI.Value_i, Generic[T]):
         return TypeError("AcabValues can only be __lt__'d with AcabValues and Strings")
 
 
+    def _intern_name(self):
+        """ Register the name in the SymbolTable,
+        caching the id and hash.
+        Call again if the name is ever overridden
+        """
+        object.__setattr__(self, "_key", SymbolTable.intern(self.name))
+        object.__setattr__(self, "_hash", hash(self.name))
+
+    def __getstate__(self):
+        """ Ids, interned keys and hashes only hold in the process that made them,
+        so aren't pickled """
+        state = self.__dict__.copy()
+        for cached in _PROCESS_LOCAL_FIELDS:
+            state.pop(cached, None)
+
+        return state
+
+    def __setstate__(self, state):
+        """ Unpickled values get a fresh id, and re-intern their name """
+        self.__dict__.update(state)
+        object.__setattr__(self, "id", next_id())
+        self._intern_name()
+
+    @property
+    def key(self) -> int:
+        """ The interned id of the value's name """
+        return self._key
+
     @property
     def type(self) -> Sen:
         """ Lazily coerces description to Sentence """
@@ -180,7 +264,10 @@ class AcabValue(VI.Value_i, Generic[T]):
         return self.data[DS.BIND] == DS.AT_BIND
 
     def copy(self, **kwargs) -> Value:
-        """ copy the object, but give it a new uuid """
+        """ copy the object, but give it a new id """
+        if self._can_clone(kwargs):
+            return self._clone(**kwargs)
+
         if 'params' not in kwargs:
             kwargs['params'] = self.params[:]
         if 'tags' not in kwargs:
@@ -188,7 +275,42 @@ class AcabValue(VI.Value_i, Generic[T]):
         if 'data' not in kwargs:
             kwargs['data'] = self.data.copy()
 
-        return replace(self, uuid=uuid1(), **kwargs)
+        return replace(self, id=next_id(), **kwargs)
+
+    def _can_clone(self, kwargs) -> bool:
+        """ Can a copy skip __init__ and __post_init__?
+        Only if the name and value are unchanged,
+        new params are already values,
+        and new data won't need subclass specific normalisation
+        """
+        if not kwargs.keys() <= _CLONEABLE_FIELDS:
+            return False
+        if 'params' in kwargs and not all([isinstance(x, VI.Value_i) for x in kwargs['params']]):
+            return False
+        if 'data' in kwargs and type(self).__post_init__ is not AcabValue.__post_init__:
+            return False
+
+        return True
+
+    def _clone(self, data=None, params=None, tags=None) -> Value:
+        """ Shallow copy an already initialised value.
+        The name, value, and cached key/hash are shared,
+        only the mutable containers are duplicated
+        """
+        copied = object.__new__(self.__class__)
+        copied.__dict__.update(self.__dict__)
+
+        if data is None:
+            data = self.data.copy()
+        else:
+            data.setdefault(DS.TYPE_INSTANCE, DS.TYPE_BOTTOM_NAME)
+            data.setdefault(DS.BIND, False)
+
+        object.__setattr__(copied, "id", next_id())
+        object.__setattr__(copied, "data", data)
+        object.__setattr__(copied, "params", self.params[:] if params is None else params)
+        object.__setattr__(copied, "tags", self.tags.copy() if tags is None else tags)
+        return copied
 
 
     def bind(self, bindings) -> Value:
@@ -276,18 +398,32 @@ class AcabStatement(AcabValue, VI.Statement_i):
 
 @dataclass(frozen=True)
 class Sentence(AcabStatement, VI.Sentence_i):
+    """ An immutable sequence of words, stored as a tuple.
+    Derived sentences (slices, additions, copies) share their words
+    with the source, and the str/hash is computed once, on first use.
+    """
+
+    # Lazily cached str, set in __str__
+    _str : str = field(init=False, default=None, repr=False, compare=False)
 
     @staticmethod
     def build(words, **kwargs):
-        safe_words = [AcabValue.safe_make(x) for x in words]
+        safe_words = tuple(AcabValue.safe_make(x) for x in words)
         sen = Sentence(value=safe_words, **kwargs)
         return sen
 
 
     def __post_init__(self):
+        if not isinstance(self.value, tuple):
+            object.__setattr__(self, "value", tuple(self.value))
+
         AcabValue.__post_init__(self)
         self.data[DS.TYPE_INSTANCE] = DS.SENTENCE_PRIM
 
+    def _intern_name(self):
+        """ Sentences hash their words, so defer the hash to first use """
+        object.__setattr__(self, "_key", SymbolTable.intern(self.name))
+
     def __eq__(self, other):
         if isinstance(other, str) and other[:2] == "_:":
             return str(self) == other
@@ -302,10 +438,15 @@ class Sentence(AcabStatement, VI.Sentence_i):
 
 
     def __hash__(self):
-        return hash(str(self))
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash(str(self)))
+        return self._hash
+
     def __str__(self):
-        words = FALLBACK_MODAL.join([str(x) for x in self.words])
-        return "{}:{}".format(self.name, words)
+        if self._str is None:
+            words = FALLBACK_MODAL.join([str(x) for x in self.words])
+            object.__setattr__(self, "_str", "{}:{}".format(self.name, words))
+        return self._str
 
     def __repr__(self):
         return super().__repr__()
@@ -316,23 +457,22 @@ class Sentence(AcabStatement, VI.Sentence_i):
 
     def __getitem__(self, i):
         if isinstance(i, slice):
-            return Sentence.build(self.words.__getitem__(i), data=self.data)
+            # Slices share the words, no copying or re-wrapping
+            return Sentence(value=self.words.__getitem__(i), data=self.data)
         return self.words.__getitem__(i)
 
     def __contains__(self, value:Union[str, Value]):
         return value in self.words
 
     def copy(self, **kwargs) -> Sen:
-        if 'value' not in kwargs:
-            kwargs['value'] = [x.copy() for x in self.value]
-
+        """ Copy the sentence, sharing its (immutable) word tuple """
         return super(Sentence, self).copy(**kwargs)
 
     def clear(self) -> Sen:
         """
         return modified copy
         """
-        return self.copy(value=[])
+        return self.copy(value=tuple())
 
     def bind(self, bindings) -> Sen:
         """ Given a dictionary of bindings, reify the sentence,
@@ -341,6 +481,8 @@ class Sentence(AcabStatement, VI.Sentence_i):
         return modified copy
         """
         assert(isinstance(bindings, dict))
+        # Unbound words are shared with this sentence,
+        # only bound words are new values
         output = []
 
         for word in self:
@@ -367,24 +509,20 @@ class Sentence(AcabStatement, VI.Sentence_i):
                 copied.data[DS.BIND] = False
                 output.append(copied)
             elif isinstance(retrieved, VI.Value_i):
-                # Apply the variables data to the retrieval
-                copied = retrieved.copy()
-                copied.data.update(word.data)
-                # Except retrieved isn't a binding
-                copied.data[DS.BIND] = False
+                # Values are immutable, so the retrieval is shared as is
                 output.append(retrieved)
             else:
                 # TODO how often should this actually happen?
                 # won't most things be values already?
                 # TODO get a type for basic values
-                new_word = AcabValue(retrieved, data=word.data)
+                new_word = AcabValue(retrieved, data=word.data.copy())
                 new_word.data[DS.BIND] = False
                 output.append(new_word)
 
-        return Sentence.build(output,
-                              data=self.data,
-                              params=self.params,
-                              tags=self.tags)
+        return Sentence(value=tuple(output),
+                        data=self.data,
+                        params=self.params,
+                        tags=self.tags)
 
     def add(self, *other) -> Sen:
         """ Return a copy of the sentence, with words added to the end.
@@ -393,16 +531,16 @@ class Sentence(AcabStatement, VI.Sentence_i):
         """
         words = self.words
         for sen in other:
-            assert(isinstance(sen, (list, VI.Sentence_i)))
-            words += [x for x in sen]
+            assert(isinstance(sen, (list, tuple, VI.Sentence_i)))
+            words += tuple(sen)
 
         new_sen = replace(self, value=words)
         return new_sen
 
     def prefix(self, prefix:Union[Value, Sen]) -> Sen:
-        if isinstance(prefix, list):
+        if isinstance(prefix, (list, tuple)):
             prefix = Sentence.build(prefix)
-        elif not isinstance(self, Sentence):
+        elif not isinstance(prefix, VI.Sentence_i):
             prefix = Sentence.build([prefix])
 
         return prefix.add(self)
@@ -421,7 +559,7 @@ class Sentence(AcabStatement, VI.Sentence_i):
         combined_data.update(value.data)
         value_copy = value.copy(name=last.name, data=combined_data)
 
-        new_words = self.words[:-1] + [value_copy]
+        new_words = self.words[:-1] + (value_copy,)
         sen_copy = self.copy(value=new_words)
 
         return sen_copy
@@ -444,7 +582,7 @@ class Sentence(AcabStatement, VI.Sentence_i):
             else:
                 out_words.append(word)
 
-        sen_copy = self.copy(value=out_words)
+        sen_copy = self.copy(value=tuple(out_words))
         return (sen_copy, statements)
 
 
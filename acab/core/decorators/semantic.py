@@ -69,6 +69,17 @@ def OperatorArgUnWrap(f):
     wrapped.__name__ = f"ArgUnwrap({f})"
     return wrapped
 
+def OperatorBatchUnWrap(f):
+    """ OperatorArgUnWrap for an operator's batch method,
+    extracting the raw values of each value tested, and of the params """
+    def wrapped(self, values, *the_args, **the_kwargs):
+        unwrapped_values = [x.value for x in values]
+        unwrapped_args   = [x.value for x in the_args]
+        return f(self, unwrapped_values, *unwrapped_args, **the_kwargs)
+
+    wrapped.__name__ = f"BatchUnwrap({f})"
+    return wrapped
+
 def OperatorDataUnWrap(f):
     """ Use to simplify extracting raw values for use in operators,
     and wrapping the results into AcabValues """
@@ -8,6 +8,7 @@ from typing import (Any, Callable, ClassVar, Dict, Generic, Iterable, Iterator,
                     Set, Tuple, TypeVar, Union, cast)
 
 from acab import types as AT
+from acab.core.data.change_log import ChangeLog
 from acab.interfaces.dsl import DSL_Fragment_i, Bootstrapper_i
 from acab.core.parsing.trie_bootstrapper import TrieBootstrapper
 
@@ -19,22 +20,29 @@ DSL_Fragment = AT.DSL_Fragment
 @dataclass
 class RewindEngineInterface(metaclass=abc.ABCMeta):
     """
-    Describes how an engine can be reverted to a previous state
+    Describes how an engine can be reverted to a previous state.
+
+    States are checkpoints in a ChangeLog of the working memory,
+    so saving one is O(1), and rewinding undoes only the changes since.
     """
-    # TODO  update with reloacable state of working memory
-    prior_states : List[List[Sentence]]       = field(default_factory=list)
-    # named recall states of past kb states
-    recall_states : Dict[str, List[Sentence]] = field(default_factory=dict)
 
-    def rewind(self, val:Optional[Union[int, str]]) -> None:
-        raise NotImplementedError()
+    @property
+    def _change_log(self) -> ChangeLog:
+        return ChangeLog.attach(self.semantics.default.struct)
+
+    @property
+    def prior_states(self) -> List[int]:
+        return self._change_log.checkpoints
 
-    def save_state(self, name: Optional[str]=None):
-        """ Copy the current string representation of the working memory,
-        and any associated data """
-        # TODO replace this with a down
-        self.prior_states.append(self._working_memory.to_sentences())
-        if name is not None:
-            self.recall_state[name] = self._working_memory.to_sentences()
+    def rewind(self, val:Optional[Union[int, str]]=None) -> int:
+        """ Rewind to the last saved state, the nth last, or a named state.
+        Returns the number of changes undone """
+        return self._change_log.rewind(self.semantics.default.struct, val)
 
+    def save_state(self, name: Optional[str]=None) -> int:
+        """ Checkpoint the working memory, optionally by name """
+        return self._change_log.checkpoint(name)
 
+    def clear_states(self):
+        """ Forget all saved states, and stop logging changes """
+        self._change_log.clear()
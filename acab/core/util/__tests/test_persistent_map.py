@@ -0,0 +1,200 @@
+#!/opt/anaconda3/envs/acab/bin/python
+import logging
+import pickle
+import unittest
+from os.path import split, splitext
+
+from acab.core.util.persistent_map import PersistentMap, _Bitmap
+
+
+class Colliding:
+    """ Keys with the same hash, but unequal """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __hash__(self):
+        return 42
+
+    def __eq__(self, other):
+        return isinstance(other, Colliding) and self.name == other.name
+
+    def __repr__(self):
+        return f"Colliding({self.name})"
+
+
+class PersistentMapTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        LOGLEVEL = logging.DEBUG
+        LOG_FILE_NAME = "log.{}".format(splitext(split(__file__)[1])[0])
+        logging.basicConfig(filename=LOG_FILE_NAME, level=LOGLEVEL, filemode='w')
+
+        console = logging.StreamHandler()
+        console.setLevel(logging.INFO)
+        logging.getLogger('').addHandler(console)
+
+    def test_empty(self):
+        the_map = PersistentMap()
+        self.assertEqual(len(the_map), 0)
+        self.assertFalse(bool(the_map))
+        self.assertEqual(the_map, {})
+        self.assertNotIn("a", the_map)
+
+    def test_set_and_get(self):
+        the_map = PersistentMap({"a": 1, "b": 2})
+        the_map["c"] = 3
+        self.assertEqual(the_map["a"], 1)
+        self.assertEqual(the_map["c"], 3)
+        self.assertEqual(len(the_map), 3)
+        self.assertEqual(the_map, {"a": 1, "b": 2, "c": 3})
+        with self.assertRaises(KeyError):
+            the_map["d"]
+
+    def test_replace(self):
+        the_map = PersistentMap({"a": 1})
+        the_map["a"] = 2
+        self.assertEqual(the_map["a"], 2)
+        self.assertEqual(len(the_map), 1)
+
+    def test_copy_is_independent(self):
+        first        = PersistentMap({"a": 1})
+        second       = first.copy()
+        second["a"]  = 5
+        second["b"]  = 6
+        self.assertEqual(dict(first), {"a": 1})
+        self.assertEqual(dict(second), {"a": 5, "b": 6})
+
+    def test_set_is_persistent(self):
+        first  = PersistentMap({"a": 1})
+        second = first.set("b", 2)
+        self.assertNotIn("b", first)
+        self.assertEqual(second["b"], 2)
+
+    def test_structural_sharing(self):
+        first  = PersistentMap({x: x for x in range(1000)})
+        second = first.set(1000, 1000)
+        shared = [x for x, y in zip(first._root.children, second._root.children) if x is y]
+        # Only the path to the new key is copied
+        self.assertEqual(len(shared), len(first._root.children) - 1)
+
+    def test_many(self):
+        the_map = PersistentMap()
+        for x in range(5000):
+            the_map[str(x)] = x
+        self.assertEqual(len(the_map), 5000)
+        self.assertTrue(all([the_map[str(x)] == x for x in range(5000)]))
+        self.assertEqual(sorted(the_map.values()), list(range(5000)))
+
+    def test_delete(self):
+        the_map = PersistentMap({x: x for x in range(100)})
+        copied  = the_map.copy()
+        for x in range(0, 100, 2):
+            del the_map[x]
+        self.assertEqual(len(the_map), 50)
+        self.assertEqual(sorted(the_map), list(range(1, 100, 2)))
+        self.assertEqual(len(copied), 100)
+        with self.assertRaises(KeyError):
+            del the_map[0]
+
+    def test_delete_all(self):
+        the_map = PersistentMap({x: x for x in range(40)})
+        for x in range(40):
+            del the_map[x]
+        self.assertEqual(the_map, {})
+        self.assertIsInstance(the_map._root, _Bitmap)
+        the_map[1] = 2
+        self.assertEqual(the_map, {1: 2})
+
+    def test_collisions(self):
+        keys    = [Colliding(x) for x in "abc"]
+        the_map = PersistentMap()
+        for index, key in enumerate(keys):
+            the_map[key] = index
+        self.assertEqual(len(the_map), 3)
+        self.assertEqual([the_map[x] for x in keys], [0, 1, 2])
+        the_map[keys[1]] = 5
+        self.assertEqual(the_map[keys[1]], 5)
+        self.assertEqual(len(the_map), 3)
+        the_map[42] = "int"
+        del the_map[keys[0]]
+        del the_map[keys[2]]
+        self.assertEqual(dict(the_map), {keys[1]: 5, 42: "int"})
+        the_map[Colliding("d")] = 6
+        self.assertEqual(the_map[Colliding("d")], 6)
+        self.assertEqual(len(the_map), 3)
+
+    def test_pickle(self):
+        the_map = PersistentMap({"a": 1, "b": 2})
+        loaded  = pickle.loads(pickle.dumps(the_map))
+        self.assertIsInstance(loaded, PersistentMap)
+        self.assertEqual(loaded, the_map)
+        self.assertEqual(list(loaded), ["a", "b"])
+
+    def test_insertion_order(self):
+        keys    = [f"key_{x}" for x in reversed(range(50))]
+        the_map = PersistentMap()
+        for key in keys:
+            the_map[key] = key
+        self.assertEqual(list(the_map), keys)
+        self.assertEqual(the_map.values(), keys)
+
+        # Replacing keeps a key's place, removing and re-adding moves it last
+        the_map[keys[3]] = "replaced"
+        del the_map[keys[0]]
+        the_map[keys[0]] = "readded"
+        self.assertEqual(list(the_map), keys[1:] + keys[:1])
+        self.assertEqual(the_map.items()[2], (keys[3], "replaced"))
+
+    def test_insertion_order_many(self):
+        the_map  = PersistentMap()
+        expected = {}
+        for x in reversed(range(3000)):
+            the_map[str(x)] = expected[str(x)] = x
+        for x in range(0, 3000, 7):
+            del the_map[str(x)]
+            del expected[str(x)]
+        for x in range(0, 3000, 14):
+            the_map[str(x)] = expected[str(x)] = -x
+
+        self.assertEqual(the_map.items(), list(expected.items()))
+
+    def test_spine_sharing(self):
+        first  = PersistentMap({x: x for x in range(1000)})
+        second = first.set(1000, 1000)
+        shared = [x for x, y in zip(first._spine, second._spine) if x is y]
+        # Only the path to the new key's order is copied
+        self.assertEqual(len(first._spine), 32)
+        self.assertEqual(len(shared), len(first._spine) - 1)
+
+    def test_spine_compacts(self):
+        the_map = PersistentMap({x: x for x in range(100)})
+        copied  = the_map.copy()
+        for x in range(90):
+            del the_map[x]
+        self.assertLess(the_map._next, 100)
+        self.assertEqual(list(the_map), list(range(90, 100)))
+        the_map["new"] = 1
+        self.assertEqual(list(the_map)[-1], "new")
+        self.assertEqual(list(copied), list(range(100)))
+
+    def test_copies_keep_order(self):
+        the_map = PersistentMap({"z": 1, "a": 2})
+        copied  = the_map.set("m", 3)
+        the_map["b"] = 4
+        self.assertEqual(list(copied), ["z", "a", "m"])
+        self.assertEqual(list(the_map), ["z", "a", "b"])
+
+    def test_collisions_keep_order(self):
+        keys    = [Colliding(x) for x in "cab"]
+        the_map = PersistentMap()
+        for index, key in enumerate(keys):
+            the_map[key] = index
+        the_map[keys[0]] = 5
+        self.assertEqual(list(the_map), keys)
+        self.assertEqual(the_map.values(), [5, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
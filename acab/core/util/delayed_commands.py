@@ -1,5 +1,4 @@
 #!/usr/bin/env python3
-from uuid import UUID
 from dataclasses import InitVar, dataclass, field
 from typing import (Any, Callable, ClassVar, Dict, Generic, Iterable, Iterator,
                     List, Mapping, Match, MutableMapping, Optional, Sequence,
@@ -9,20 +8,21 @@ import logging as root_logger
 logging = root_logger.getLogger(__name__)
 
 from acab import types as AT
+from acab.core.util.identity import AcabId
 # Type declarations:
 CtxSet     = AT.CtxSet
 CtxIns     = AT.CtxIns
 Value      = AT.Value
 ProdComp   = AT.Component
-DelayValue = Union[UUID, CtxIns, CtxSet, None]
+DelayValue = Union[AcabId, CtxIns, CtxSet, None]
 
 
 @dataclass
 class DelayedCommands_i():
 
-    delayed_e: Enum                    = field()
-    _purgatory : Dict[Enum, Set[UUID]] = field(init=False, default_factory=dict)
-    _priority : List[Enum]             = field(init=False, default_factory=list)
+    delayed_e: Enum                      = field()
+    _purgatory : Dict[Enum, Set[AcabId]] = field(init=False, default_factory=dict)
+    _priority : List[Enum]               = field(init=False, default_factory=list)
 
     def delay(self, instr:Enum, ctxIns:DelayValue):
         """
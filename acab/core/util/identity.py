@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Identities for values, nodes and contexts.
+
+Objects are given a cheap AcabId on construction,
+and only build a UUID from it when something asks for one.
+(eg: printing, serialization, or the network layer)
+
+The provider of ids is pluggable, see set_provider.
+
+Counter ids are only unique within a process,
+so they identify objects, but aren't used to decide equality.
+Anything loaded from another process (snapshots, journals, pickles)
+is given a fresh id as it is loaded.
+"""
+import abc
+import logging as root_logger
+from itertools import count
+from typing import (Any, Callable, ClassVar, Dict, Generic, Iterable, Iterator,
+                    List, Mapping, Match, MutableMapping, Optional, Sequence,
+                    Set, Tuple, TypeVar, Union, cast)
+from uuid import UUID, uuid1
+
+logging = root_logger.getLogger(__name__)
+
+# Shared between providers, so swapping providers can't reuse ids,
+# or change the uuid of an id already handed out
+_COUNTER = count()
+_BASE    = uuid1()
+
+
+class AcabId(int):
+    """ A process unique identity.
+    Subclasses int so it is cheap to hash and compare,
+    but is distinguishable from plain ints (eg: ContextSet indices)
+    """
+    __slots__ = ()
+
+    @property
+    def uuid(self) -> UUID:
+        return IdentityProvider_i.current.to_uuid(self)
+
+    def __repr__(self):
+        return f"AcabId({int(self)})"
+
+
+class IdentityProvider_i(metaclass=abc.ABCMeta):
+    """ Creates identities, and converts them to UUIDs on request """
+
+    current : ClassVar['IdentityProvider_i'] = None
+
+    @abc.abstractmethod
+    def next_id(self) -> AcabId:
+        pass
+
+    @abc.abstractmethod
+    def to_uuid(self, ident: AcabId) -> UUID:
+        pass
+
+
+class CounterIdentity(IdentityProvider_i):
+    """ The default provider.
+    Ids are a monotonic counter.
+    UUIDs are version 1 uuids, derived from a single base uuid1
+    made at startup, offsetting its timestamp by the id.
+    """
+
+    def next_id(self) -> AcabId:
+        return AcabId(next(_COUNTER))
+
+    def to_uuid(self, ident: AcabId) -> UUID:
+        if isinstance(ident, EagerId):
+            return ident.eager_uuid
+
+        timestamp = _BASE.time + int(ident)
+        return UUID(fields=(timestamp & 0xffffffff,
+                            (timestamp >> 32) & 0xffff,
+                            ((timestamp >> 48) & 0x0fff) | (1 << 12),
+                            _BASE.clock_seq_hi_variant,
+                            _BASE.clock_seq_low,
+                            _BASE.node))
+
+
+class EagerId(AcabId):
+    """ An AcabId which carries a uuid1 made at creation """
+
+    def __repr__(self):
+        return f"EagerId({int(self)})"
+
+
+class UUIDIdentity(CounterIdentity):
+    """ The previous behaviour: a uuid1 for every object, made eagerly """
+
+    def next_id(self) -> AcabId:
+        ident = EagerId(next(_COUNTER))
+        ident.eager_uuid = uuid1()
+        return ident
+
+
+def set_provider(provider: IdentityProvider_i) -> IdentityProvider_i:
+    """ Swap the identity provider, returning the previous one. """
+    assert(isinstance(provider, IdentityProvider_i))
+    previous = IdentityProvider_i.current
+    IdentityProvider_i.current = provider
+    return previous
+
+def next_id() -> AcabId:
+    """ Get a new identity from the current provider """
+    return IdentityProvider_i.current.next_id()
+
+
+IdentityProvider_i.current = CounterIdentity()
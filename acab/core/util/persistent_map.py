@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+A persistent hash array mapped trie (HAMT),
+for maps which are copied far more often than they are changed,
+such as the bindings of context instances.
+
+The trie's nodes are immutable. Each level consumes BITS bits of a key's hash,
+and stores only the children present, compressed by a bitmap.
+Setting or removing a key copies only the nodes on the path to it,
+sharing the rest with the map it was derived from,
+so changes are O(log n) time and memory, and copies are O(1).
+
+PersistentMap is a mutable handle onto a trie root:
+copying a handle shares the root, and changing a handle replaces its root,
+so derived maps can be updated in place without affecting each other.
+
+Leaves carry the order their key was first set in,
+so iteration follows insertion order, as a dict does,
+rather than hash order, which changes between runs.
+The order is kept incrementally by the spine: a persistent vector
+of the leaves, indexed by their order, and walked to iterate.
+Removing a key leaves a hole in the spine,
+and the map is rebuilt once holes outnumber keys.
+"""
+import logging as root_logger
+from collections.abc import MutableMapping
+from typing import Any, Iterator, List, Optional, Tuple
+
+logging = root_logger.getLogger(__name__)
+
+BITS      = 5
+MASK      = (1 << BITS) - 1
+HASH_BITS = 64
+HASH_MASK = (1 << HASH_BITS) - 1
+
+
+def _popcount(value:int) -> int:
+    return bin(value).count("1")
+
+
+def _spine_set(node:Tuple, shift:int, index:int, leaf:Optional['_Leaf']) -> Tuple:
+    """ A copy of the path to an index of the spine, with the index set.
+    Indices past the end are appended """
+    slot = (index >> shift) & MASK
+    if shift == 0:
+        child = leaf
+    else:
+        child = _spine_set(node[slot] if slot < len(node) else (), shift - BITS, index, leaf)
+
+    if slot < len(node):
+        return node[:slot] + (child,) + node[slot + 1:]
+
+    return node + (None,) * (slot - len(node)) + (child,)
+
+def _spine_walk(node:Tuple, shift:int) -> Iterator['_Leaf']:
+    """ The leaves of the spine, in order """
+    if shift == 0:
+        yield from (x for x in node if x is not None)
+        return
+
+    for child in node:
+        yield from _spine_walk(child, shift - BITS)
+
+
+class _Leaf:
+    __slots__ = ("hash", "key", "value", "order")
+
+    def __init__(self, hash_, key, value, order=0):
+        self.hash  = hash_
+        self.key   = key
+        self.value = value
+        self.order = order
+
+
+class _Collision:
+    """ Leaves whose whole hashes are equal """
+    __slots__ = ("hash", "leaves")
+
+    def __init__(self, hash_, leaves:Tuple[_Leaf, ...]):
+        self.hash   = hash_
+        self.leaves = leaves
+
+    def find(self, key) -> Optional[_Leaf]:
+        for leaf in self.leaves:
+            if leaf.key == key:
+                return leaf
+
+        return None
+
+    def assoc(self, leaf:_Leaf) -> Tuple['_Collision', bool]:
+        replaced = self.find(leaf.key)
+        if replaced is not None:
+            leaf.order = replaced.order
+            leaves     = tuple([leaf if x is replaced else x for x in self.leaves])
+            return _Collision(self.hash, leaves), False
+
+        return _Collision(self.hash, self.leaves + (leaf,)), True
+
+    def without(self, key) -> Any:
+        remaining = tuple([x for x in self.leaves if x.key != key])
+        if len(remaining) == len(self.leaves):
+            raise KeyError(key)
+        if len(remaining) == 1:
+            return remaining[0]
+
+        return _Collision(self.hash, remaining)
+
+
+class _Bitmap:
+    """ An inner node, of the children present at this level """
+    __slots__ = ("bitmap", "children")
+
+    def __init__(self, bitmap:int, children:Tuple[Any, ...]):
+        self.bitmap   = bitmap
+        self.children = children
+
+    def find(self, hash_, key, shift) -> Optional[_Leaf]:
+        node = self
+        while isinstance(node, _Bitmap):
+            bit = 1 << ((hash_ >> shift) & MASK)
+            if not node.bitmap & bit:
+                return None
+            node   = node.children[_popcount(node.bitmap & (bit - 1))]
+            shift += BITS
+
+        if isinstance(node, _Collision):
+            return node.find(key)
+        if node.hash == hash_ and node.key == key:
+            return node
+
+        return None
+
+    def assoc(self, leaf:_Leaf, shift:int) -> Tuple['_Bitmap', bool]:
+        """ A copy of the path to a leaf's position, with the leaf set.
+        Returns the new node and whether the key was added """
+        bit   = 1 << ((leaf.hash >> shift) & MASK)
+        index = _popcount(self.bitmap & (bit - 1))
+        if not self.bitmap & bit:
+            children = self.children[:index] + (leaf,) + self.children[index:]
+            return _Bitmap(self.bitmap | bit, children), True
+
+        child = self.children[index]
+        if isinstance(child, _Bitmap):
+            replacement, added = child.assoc(leaf, shift + BITS)
+        elif isinstance(child, _Collision) and child.hash == leaf.hash:
+            replacement, added = child.assoc(leaf)
+        elif isinstance(child, _Collision):
+            replacement, added = _merge(child, leaf, shift + BITS), True
+        elif child.hash == leaf.hash and child.key == leaf.key:
+            leaf.order         = child.order
+            replacement, added = leaf, False
+        else:
+            replacement, added = _merge(child, leaf, shift + BITS), True
+
+        children = self.children[:index] + (replacement,) + self.children[index + 1:]
+        return _Bitmap(self.bitmap, children), added
+
+    def without(self, hash_, key, shift) -> Any:
+        """ A copy of the path to a key, with the key removed.
+        Nodes left with a single leaf are replaced by it """
+        bit   = 1 << ((hash_ >> shift) & MASK)
+        index = _popcount(self.bitmap & (bit - 1))
+        if not self.bitmap & bit:
+            raise KeyError(key)
+
+        child = self.children[index]
+        if isinstance(child, _Bitmap):
+            replacement = child.without(hash_, key, shift + BITS)
+        elif isinstance(child, _Collision):
+            replacement = child.without(key)
+        elif child.hash == hash_ and child.key == key:
+            replacement = None
+        else:
+            raise KeyError(key)
+
+        if replacement is not None:
+            children = self.children[:index] + (replacement,) + self.children[index + 1:]
+            return _Bitmap(self.bitmap, children)
+
+        children = self.children[:index] + self.children[index + 1:]
+        if len(children) == 1 and not isinstance(children[0], _Bitmap):
+            return children[0]
+
+        return _Bitmap(self.bitmap ^ bit, children)
+
+
+def _merge(first:Any, second:_Leaf, shift:int) -> Any:
+    """ The subtrie holding two leaves (or a collision and a leaf), from a level down """
+    if shift >= HASH_BITS:
+        return _Collision(first.hash, (first, second))
+
+    first_index  = (first.hash >> shift) & MASK
+    second_index = (second.hash >> shift) & MASK
+    if first_index == second_index:
+        return _Bitmap(1 << first_index, (_merge(first, second, shift + BITS),))
+    if first_index < second_index:
+        return _Bitmap((1 << first_index) | (1 << second_index), (first, second))
+
+    return _Bitmap((1 << first_index) | (1 << second_index), (second, first))
+
+
+_EMPTY = _Bitmap(0, ())
+
+
+class PersistentMap(MutableMapping):
+    """ A MutableMapping over a persistent trie.
+    copy is O(1), and changes only copy the path to the changed key.
+    Iteration follows insertion order, as a dict.
+    """
+    __slots__ = ("_root", "_spine", "_shift", "_len", "_next")
+
+    def __init__(self, items=None):
+        self._clear()
+        if items is not None:
+            self.update(items)
+
+    def _clear(self):
+        self._root  = _EMPTY
+        self._spine = ()
+        self._shift = 0
+        self._len   = 0
+        self._next  = 0
+
+    @staticmethod
+    def _hash(key) -> int:
+        return hash(key) & HASH_MASK
+
+    def __getitem__(self, key):
+        leaf = self._root.find(self._hash(key), key, 0)
+        if leaf is None:
+            raise KeyError(key)
+
+        return leaf.value
+
+    def __contains__(self, key):
+        return self._root.find(self._hash(key), key, 0) is not None
+
+    def __setitem__(self, key, value):
+        leaf = _Leaf(self._hash(key), key, value, self._next)
+        # Replacing a key gives the new leaf the old one's order
+        self._root, added = self._root.assoc(leaf, 0)
+        if added:
+            self._len  += 1
+            self._next += 1
+            if (1 << (self._shift + BITS)) < self._next:
+                self._spine  = (self._spine,)
+                self._shift += BITS
+
+        self._spine = _spine_set(self._spine, self._shift, leaf.order, leaf)
+
+    def __delitem__(self, key):
+        hash_ = self._hash(key)
+        leaf  = self._root.find(hash_, key, 0)
+        if leaf is None:
+            raise KeyError(key)
+
+        root = self._root.without(hash_, key, 0)
+        if not isinstance(root, _Bitmap):
+            root = _EMPTY.assoc(root, 0)[0]
+
+        self._root  = root
+        self._spine = _spine_set(self._spine, self._shift, leaf.order, None)
+        self._len  -= 1
+        if MASK < self._next and 2 * self._len < self._next:
+            # Leaves can be shared with copies, so are rebuilt rather than reordered
+            items = self.items()
+            self._clear()
+            self.update(items)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self) -> Iterator[Any]:
+        return (x.key for x in self._ordered())
+
+    def _ordered(self) -> Iterator[_Leaf]:
+        """ The leaves in insertion order """
+        return _spine_walk(self._spine, self._shift)
+
+    def items(self):
+        return [(x.key, x.value) for x in self._ordered()]
+
+    def values(self):
+        return [x.value for x in self._ordered()]
+
+    def __repr__(self):
+        return "PersistentMap({})".format(dict(self.items()))
+
+    def copy(self) -> 'PersistentMap':
+        """ A handle onto the same trie """
+        copied        = PersistentMap.__new__(PersistentMap)
+        copied._root  = self._root
+        copied._spine = self._spine
+        copied._shift = self._shift
+        copied._len   = self._len
+        copied._next  = self._next
+        return copied
+
+    def set(self, key, value) -> 'PersistentMap':
+        """ A new map with a key set, leaving this one unchanged """
+        copied      = self.copy()
+        copied[key] = value
+        return copied
+
+    def __getstate__(self):
+        return dict(self.items())
+
+    def __setstate__(self, state):
+        self._clear()
+        self.update(state)
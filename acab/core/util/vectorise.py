@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Boolean masks, for testing many values at once.
+
+NumPy is optional. When it is installed, and the values compared are all numbers,
+comparisons run as array operations. Otherwise they run as list comprehensions.
+Masks are either lists of bools or numpy bool arrays, so combine them with mask_and,
+and use to_list for indexing in python.
+"""
+from numbers import Number
+from typing import Any, Callable, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+Mask = Sequence[bool]
+
+
+def is_numeric(value:Any) -> bool:
+    return isinstance(value, Number) and not isinstance(value, bool)
+
+def as_array(values:List[Any]) -> Optional['np.ndarray']:
+    """ An array of the values, if numpy is available and they are all numbers.
+    Otherwise None """
+    if np is None or not bool(values) or not all(is_numeric(x) for x in values):
+        return None
+
+    return np.asarray(values)
+
+def compare(op:Callable[[Any, Any], Any], values:List[Any], other:Any) -> Mask:
+    """ Compare every value with a single other value, eg: compare(operator.gt, [1,2,3], 2) """
+    array = as_array(values) if is_numeric(other) else None
+    if array is not None:
+        return op(array, other)
+
+    return [bool(op(x, other)) for x in values]
+
+def mask_and(first:Mask, second:Mask) -> Mask:
+    if np is not None and (isinstance(first, np.ndarray) or isinstance(second, np.ndarray)):
+        return np.logical_and(first, second)
+
+    return [bool(x) and bool(y) for x, y in zip(first, second)]
+
+def to_list(mask:Mask) -> List[bool]:
+    if np is not None and isinstance(mask, np.ndarray):
+        return mask.tolist()
+
+    return [bool(x) for x in mask]
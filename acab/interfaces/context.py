@@ -10,18 +10,18 @@ from typing import (Any, Callable, ClassVar, Dict, Generic, Iterable, Iterator,
                     List, Mapping, Match, MutableMapping, Optional, Sequence,
                     Set, Tuple, TypeVar, Union, cast)
 from enum import Enum
-from uuid import UUID
 
 logging = root_logger.getLogger(__name__)
 
 from acab import types as AT
+from acab.core.util.identity import AcabId
 
 # Type declarations:
 CtxSet     = AT.CtxSet
 CtxIns     = AT.CtxIns
 Value      = AT.Value
 ProdComp   = AT.Component
-DelayValue = Union[UUID, CtxIns, CtxSet, None]
+DelayValue = Union[AcabId, CtxIns, CtxSet, None]
 
 
 # Interfaces:
@@ -42,6 +42,10 @@ class Constraint_i(metaclass=abc.ABCMeta):
     def test(self, node, ctx):
         pass
 
+    @abc.abstractmethod
+    def test_all(self, nodes, ctx) -> List[bool]:
+        pass
+
 @dataclass
 class ContextSet_i(metaclass=abc.ABCMeta):
 
@@ -1,5 +1,6 @@
 import abc
 import logging as root_logger
+from copy import copy
 from dataclasses import dataclass, field
 from os.path import abspath, exists, expanduser, split
 from typing import (Any, Callable, ClassVar, Dict, Generic, Iterable, Iterator,
@@ -15,11 +16,14 @@ from acab.interfaces.module_loader import ModuleLoader_i
 from acab.interfaces.printing import PrintSystem_i
 from acab.interfaces.semantic import SemanticSystem_i
 from acab.core.parsing.dsl_builder import DSLBuilder
+from acab.core.data.journal import Journal
+from acab.core.data.snapshot import load_snapshot, save_snapshot
 from acab.error.semantic_exception import AcabSemanticException
 from acab.core.decorators.engine import EnsureEngineInitialised
 
 # TODO add 'Tick' functionality
 ModuleComponents = AT.ModuleComponents
+Sentence         = AT.Sentence
 
 @dataclass
 class AcabEngine_i(metaclass=abc.ABCMeta):
@@ -51,35 +55,79 @@ class AcabEngine_i(metaclass=abc.ABCMeta):
         # everything should be an assertion
         try:
             assertions = self._dsl_builder.parseFile(filename)
-            # Assert facts:
-            for x in assertions:
-                logging.info(f"File load assertion: {x}")
-                self(x)
+            # Assert facts, together so consecutive insertions are batched:
+            logging.info(f"File load assertions: {len(assertions)}")
+            if bool(assertions):
+                self(assertions[:])
         except FileNotFoundError as err:
             logging.warning(f"{err}")
         except AcabSemanticException as err:
-            logging.warning(f"Assertion Failed: {x}")
+            logging.warning(f"Assertion Failed: {err}")
 
         return True
 
     def save_file(self, filename:str, printer:PrintSystem_i=None):
-        """ Dump the content of the kb to a file to reload later """
+        """ Dump the content of the kb to a file to reload later.
+        Sentences are printed and written one at a time """
         assert(exists(split(abspath(expanduser(filename)))[0]))
         if printer is None:
             printer = self.printer
 
-        as_sentences = self.semantics.to_sentences()
-        if not bool(as_sentences[0]):
+        sentences = self.iter_sentences()
+        first     = next(sentences, None)
+        if first is None:
             logging.info("Nothing to print")
             return
 
-        as_strings = printer.pprint(*as_sentences)
-
+        separator = printer.pprint(printer.separator)
         # TODO add modeline
         with open(abspath(expanduser(filename)), 'w') as f:
-            f.write(as_strings)
+            f.write(printer.pprint(first))
+            for sen in sentences:
+                f.write(separator)
+                f.write(printer.pprint(sen))
+
+
+    def fork(self) -> 'AcabEngine_i':
+        """ A cheap copy of the engine, for hypotheticals.
+        Shares the parser, printer, modules and semantics,
+        with a copy on write working memory """
+        forked = copy(self)
+        forked.semantics = self.semantics.fork()
+        return forked
+
+    def save_snapshot(self, filename:str):
+        """ Save the working memory as a binary snapshot,
+        skipping the printer """
+        assert(exists(split(abspath(expanduser(filename)))[0]))
+        save_snapshot(self.semantics.default.struct, abspath(expanduser(filename)))
+
+    def load_snapshot(self, filename:str) -> bool:
+        """ Replace the working memory with a binary snapshot,
+        skipping the parser """
+        filename = abspath(expanduser(filename))
+        logging.info("Loading Snapshot: {}".format(filename))
+        try:
+            load_snapshot(filename, struct=self.semantics.default.struct)
+        except FileNotFoundError as err:
+            logging.warning(f"{err}")
+            return False
+
+        return True
 
+    def journal(self, filename:str, snapshot:str=None, compact_every:int=10000, fsync:bool=False) -> Journal:
+        """ Recover the working memory from a snapshot and journal,
+        then journal every change made to it, compacting into the snapshot
+        every compact_every changes """
+        filename = abspath(expanduser(filename))
+        if snapshot is not None:
+            snapshot = abspath(expanduser(snapshot))
 
+        logging.info("Journaling to: {}".format(filename))
+        semantics, struct = self.semantics.default
+        journal = Journal(filename, snapshot=snapshot, compact_every=compact_every, fsync=fsync)
+        journal.recover(semantics, struct)
+        return journal
 
     def to_sentences(self):
         """
@@ -90,16 +138,19 @@ class AcabEngine_i(metaclass=abc.ABCMeta):
         """
         return self.semantics.to_sentences()
 
+    def iter_sentences(self) -> Iterator[Sentence]:
+        """ As to_sentences, but lazily """
+        return self.semantics.iter_sentences()
+
     def pprint(self, target=None) -> str:
         """ Pass a value to the engine's printer """
-        sens = target
-        if sens is None:
-            sens = self.to_sentences()
-
-        if not bool(sens) or not bool(sens[0]):
-            return ""
+        if target is not None:
+            if not bool(target) or not bool(target[0]):
+                return ""
+            return self.printer.pprint(*target)
 
-        return self.printer.pprint(*sens)
+        separator = self.printer.pprint(self.printer.separator)
+        return separator.join([self.printer.pprint(x) for x in self.iter_sentences()])
 
     def load_modules(self, *modules: List[str]) -> List[ModuleComponents]:
         logging.info("Loading Modules")
@@ -113,7 +164,7 @@ class AcabEngine_i(metaclass=abc.ABCMeta):
 
         self.printer.extend(loaded_mods)
 
-        # insert operator sentences
+        # insert operator sentences, as one batch
         logging.info("Asserting operators")
         ops = [y for x in loaded_mods for y in x.operators]
         self.semantics(*ops)
@@ -17,7 +17,9 @@ Meanwhile IndependentSemantics_i are concerned only with the values and structur
 
 import abc
 import logging as root_logger
-from dataclasses import InitVar, dataclass, field
+from copy import copy
+from itertools import islice
+from dataclasses import InitVar, dataclass, field, replace
 from enum import Enum
 from typing import (Any, Callable, ClassVar, Dict, Generic, Iterable, Iterator,
                     List, Mapping, Match, MutableMapping, Optional, Sequence,
@@ -96,18 +98,74 @@ class SemanticSystem_i(HandlerSystem_i):
         else:
             ctxset = self.ctx_set.build(self._operator_cache)
 
-        if ctxset._operators is not None:
+        # Keep the cache's identity when reusing it, so compiled query plans are reused
+        if ctxset._operators is not None and ctxset._operators is not self._operator_cache:
             self._operator_cache = ctxset._operators.copy()
 
         # Auto remove the empty context:
-        ctxset.delay(ctxset.delayed_e.DEACTIVATE, ctxset[0].uuid)
+        ctxset.delay(ctxset.delayed_e.DEACTIVATE, ctxset[0].id)
 
         return ctxset
 
+    def query_iter(self, query, ctxs:Optional[CtxSet]=None, limit:Optional[int]=None) -> Iterator[CtxIns]:
+        """ Lazily yield the bindings of a query sentence or query container,
+        stopping after `limit` results.
+        Each clause extends the bindings of the previous one as they are taken,
+        so the structs are only searched as far as needed.
+        Semantics without an `iter_query` are run on a context set per binding.
+        """
+        if ctxs is None:
+            ctxs = self.build_ctxset()
+
+        clauses = [query] if isinstance(query, Sentence_i) else query.clauses
+        results = iter(ctxs.active_list())
+        for clause in clauses:
+            semantics, struct = self.lookup(clause)
+            if hasattr(semantics, "iter_query"):
+                results = semantics.iter_query(clause, struct, ctxs=ctxs, start=results)
+            else:
+                results = self._materialised_query(semantics, clause, struct, ctxs, results)
+
+        return islice(results, limit)
+
+    def _materialised_query(self, semantics, clause, struct, ctxs, start) -> Iterator[CtxIns]:
+        for ctxInst in start:
+            sub_ctxs = ctxs.build(ctxs._operators)
+            sub_ctxs.active_list(clear=True)
+            sub_ctxs.push(ctxInst)
+            semantics.query(clause, struct, ctxs=sub_ctxs)
+            yield from sub_ctxs.active_list()
+
+    def exists(self, query, ctxs:Optional[CtxSet]=None) -> bool:
+        """ Whether a query has any binding, searching only until the first """
+        return next(self.query_iter(query, ctxs=ctxs, limit=1), None) is not None
+
     @property
     def has_op_cache(self) -> bool:
         return self._operator_cache is not None
 
+    def fork(self) -> 'SemanticSystem_i':
+        """ A shallow copy of the system, sharing its semantics,
+        sieve and operator cache, but with each handler's struct forked.
+        See AcabStruct.fork
+        """
+        forked   = copy(self)
+        structs  = {}
+        handlers = {}
+        def fork_handler(handler):
+            if handler is None or handler.struct is None:
+                return handler
+            if id(handler) not in handlers:
+                if id(handler.struct) not in structs:
+                    structs[id(handler.struct)] = handler.struct.fork()
+                handlers[id(handler)] = replace(handler, struct=structs[id(handler.struct)])
+
+            return handlers[id(handler)]
+
+        forked.handlers = {x: fork_handler(y) for x, y in self.handlers.items()}
+        forked.default  = fork_handler(self.default)
+        return forked
+
     @abc.abstractmethod
     def __call__(self, *instructions, ctxs=None, data=None) -> CtxSet:
         pass
@@ -117,6 +175,9 @@ class SemanticSystem_i(HandlerSystem_i):
         # TODO run the dep_sem.to_sentences for each struct with a matching registration
         pass
 
+    def iter_sentences(self) -> Iterator[Sentence]:
+        return iter(self.to_sentences())
+
     def extend(self, mods:List[ModuleComponents]):
         logging.info("Extending Semantics")
         semantics = [y for x in mods for y in x.semantics]
@@ -150,6 +211,11 @@ class DependentSemantics_i(HandlerComponent_i, SemanticSystem_i):
         """ Reduce a struct down to sentences, for printing """
         raise NotImplementedError()
 
+    def iter_sentences(self, struct, data=None, ctxs=None) -> Iterator[Sentence]:
+        """ Reduce a struct down to sentences, lazily.
+        Override to avoid building the full list """
+        return iter(self.to_sentences(struct, data=data, ctxs=ctxs))
+
     def verify(self, instruction, data=None, ctxs=None):
         raise NotImplementedError()
 
@@ -157,6 +223,19 @@ class DependentSemantics_i(HandlerComponent_i, SemanticSystem_i):
     def insert(self, struct, sen, data):
         pass
 
+    def insert_many(self, sentences, struct, data=None, ctxs=None) -> CtxSet:
+        """ Insert multiple sentences, in order.
+        A sentence that fails is reported, and doesn't stop the rest,
+        as if each were run separately.
+        Override to share work between the sentences """
+        for sen in sentences:
+            try:
+                self.insert(sen, struct, data=data, ctxs=ctxs)
+            except AcabSemanticException as err:
+                logging.warning(err)
+
+        return ctxs
+
     @abc.abstractmethod
     def query(self, struct, sen, data):
         pass
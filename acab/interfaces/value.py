@@ -7,10 +7,11 @@ import logging as root_logger
 from dataclasses import dataclass, field
 from typing import (Any, Dict, List, Mapping, Match, MutableMapping, Optional,
                     Sequence, Set, Tuple, TypeVar, Union, cast)
-from uuid import UUID, uuid1
+from uuid import UUID
 
 from acab import types as AT
 from acab.core.config.config import AcabConfig
+from acab.core.util.identity import AcabId, next_id
 
 logging       = root_logger.getLogger(__name__)
 
@@ -28,13 +29,18 @@ class Value_i(metaclass=abc.ABCMeta):
     params : List[Value]  = field(default_factory=list)
     tags   : Set[Value]   = field(default_factory=set)
     data   : Dict[str, Any] = field(default_factory=dict)
-    uuid   : UUID           = field(default_factory=uuid1)
+    id     : AcabId         = field(default_factory=next_id)
 
     @staticmethod
     @abc.abstractmethod
     def safe_make(value, name, data, _type, **kwargs) -> Value:
         pass
 
+    @property
+    def uuid(self) -> UUID:
+        """ Built from the id only when asked for """
+        return self.id.uuid
+
     @property
     @abc.abstractmethod
     def type(self) -> Sentence:
@@ -96,7 +102,7 @@ class Statement_i(Value_i):
 @dataclass(frozen=True)
 class Sentence_i(Statement_i):
 
-    value: List[Value]  = field(default_factory=list)
+    value: Tuple[Value, ...] = field(default_factory=tuple)
 
     @abc.abstractmethod
     def build(words, **kwargs):
@@ -121,5 +127,5 @@ class Sentence_i(Statement_i):
         pass
 
     @property
-    def words(self) -> List[Value]:
+    def words(self) -> Tuple[Value, ...]:
         return self.value
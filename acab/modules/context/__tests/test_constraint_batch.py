@@ -0,0 +1,174 @@
+#!/opt/anaconda3/envs/acab/bin/python
+import logging
+import unittest
+from os.path import split, splitext
+from unittest import mock
+
+import acab
+
+config = acab.setup()
+
+import acab.core.util.vectorise as VEC
+from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.node import AcabNode
+from acab.core.data.production_abstractions import (ProductionComponent,
+                                                    ProductionOperator)
+from acab.core.data.values import AcabValue, Sentence
+from acab.modules.context.constraints import ConstraintCollection
+from acab.modules.context.context_set import ContextInstance, ContextSet
+from acab.modules.operators.query.query_operators import EQ, RegMatch
+from acab.modules.semantics.dependent import BreadthTrieSemantics
+from acab.modules.semantics.independent import BasicNodeSemantics
+from acab.modules.values.numbers.query_operators import GT, LT
+
+BIND_V       = config.prepare("Value.Structure", "BIND")()
+CONSTRAINT_V = config.prepare("Value.Structure", "CONSTRAINT")()
+
+NUMERIC_TYPES = AcabValue._value_types | {int, float}
+
+
+class CountedGT(ProductionOperator):
+    """ GT without a batch override """
+    calls = 0
+
+    def __call__(self, a, b, data=None):
+        CountedGT.calls += 1
+        return a.value > b.value
+
+
+class ConstraintBatchTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        LOGLEVEL = logging.DEBUG
+        LOG_FILE_NAME = "log.{}".format(splitext(split(__file__)[1])[0])
+        logging.basicConfig(filename=LOG_FILE_NAME, level=LOGLEVEL, filemode='w')
+
+        console = logging.StreamHandler()
+        console.setLevel(logging.INFO)
+        logging.getLogger('').addHandler(console)
+
+    def setUp(self):
+        self.types = mock.patch.object(AcabValue, "_value_types", NUMERIC_TYPES)
+        self.types.start()
+        ops        = {"EQ": EQ(), "RegMatch": RegMatch(), "GT": GT(), "LT": LT(), "Count": CountedGT()}
+        self.ops   = ContextInstance(data={str(Sentence.build([x])): y for x, y in ops.items()})
+
+    def tearDown(self):
+        self.types.stop()
+
+    def constrained(self, *tests, var=True):
+        word = Sentence.build(["x"])[0]
+        if var:
+            word.data[BIND_V] = True
+        word.data[CONSTRAINT_V] = [ProductionComponent("test", Sentence.build([op]), list(params))
+                                   for op, *params in tests]
+        return ConstraintCollection.build(word, operators=self.ops)
+
+    def nodes(self, *values):
+        return [AcabNode(AcabValue.safe_make(x)) for x in values]
+
+    def per_node(self, constraints, nodes, ctx):
+        passed = []
+        for node in nodes:
+            try:
+                constraints.test(node, ctx)
+                passed.append(True)
+            except Exception:
+                passed.append(False)
+
+        return passed
+
+    def test_numeric_alphas(self):
+        constraints = self.constrained(("GT", AcabValue.safe_make(2)),
+                                       ("LT", AcabValue.safe_make(6)))
+        nodes       = self.nodes(*range(10))
+        passed      = constraints.test_all(nodes, ContextInstance())
+        self.assertEqual(passed, [x in (3, 4, 5) for x in range(10)])
+        self.assertTrue(all(isinstance(x, bool) for x in passed))
+
+    def test_numeric_alphas_without_numpy(self):
+        constraints = self.constrained(("GT", AcabValue.safe_make(2)))
+        with mock.patch.object(VEC, "np", None):
+            passed = constraints.test_all(self.nodes(1, 3, 2.5), ContextInstance())
+        self.assertEqual(passed, [False, True, True])
+
+    @unittest.skipIf(VEC.np is None, "numpy isn't installed")
+    def test_numeric_masks_are_arrays(self):
+        self.assertIsInstance(VEC.compare(lambda x, y: x > y, [1, 2, 3], 2), VEC.np.ndarray)
+        self.assertIsInstance(VEC.compare(lambda x, y: x > y, ["a", "b"], "a"), list)
+
+    def test_eq_and_regmatch(self):
+        constraints = self.constrained(("RegMatch", AcabValue.safe_make("^item_\\d$")))
+        nodes       = self.nodes("item_1", "item_22", "other", "item_3")
+        self.assertEqual(constraints.test_all(nodes, ContextInstance()),
+                         [True, False, False, True])
+
+        constraints = self.constrained(("EQ", AcabValue.safe_make("other")))
+        self.assertEqual(constraints.test_all(nodes, ContextInstance()),
+                         [False, False, True, False])
+
+    def test_matches_per_node(self):
+        constraints = self.constrained(("RegMatch", AcabValue.safe_make("a")),
+                                       ("EQ", AcabValue.safe_make("bab")))
+        nodes       = self.nodes("bab", "aaa", "ccc", "bab")
+        ctx         = ContextInstance()
+        self.assertEqual(constraints.test_all(nodes, ctx),
+                         self.per_node(constraints, nodes, ctx))
+
+    def test_betas_use_context(self):
+        param = Sentence.build(["y"])[0]
+        param.data[BIND_V] = True
+        constraints = self.constrained(("GT", param))
+        ctx         = ContextInstance(data={"y": AcabValue.safe_make(7)})
+        nodes       = self.nodes(5, 8, 9, 7)
+        self.assertEqual(constraints.test_all(nodes, ctx), [False, True, True, False])
+        self.assertEqual(constraints.test_all(nodes, ctx), self.per_node(constraints, nodes, ctx))
+
+    def test_betas_skip_failed_alphas(self):
+        param = Sentence.build(["y"])[0]
+        param.data[BIND_V] = True
+        constraints = self.constrained(("EQ", AcabValue.safe_make(5)), ("GT", param))
+        ctx         = ContextInstance(data={"y": AcabValue.safe_make(3)})
+        nodes       = self.nodes("word", 5)
+        self.assertEqual(self.per_node(constraints, nodes, ctx), [False, True])
+        self.assertEqual(constraints.test_all(nodes, ctx), [False, True])
+
+    def test_default_batch(self):
+        CountedGT.calls = 0
+        constraints = self.constrained(("Count", AcabValue.safe_make(1)))
+        passed      = constraints.test_all(self.nodes(0, 1, 2, 3), ContextInstance())
+        self.assertEqual(passed, [False, False, True, True])
+        self.assertEqual(CountedGT.calls, 4)
+
+    def test_name_tests_per_node(self):
+        constraints = self.constrained(("GT", AcabValue.safe_make(0)))
+        ctx         = ContextInstance(data={"x": AcabValue.safe_make(2)})
+        self.assertEqual(constraints.test_all(self.nodes(1, 2, 3), ctx), [False, True, False])
+
+    def test_empty(self):
+        constraints = self.constrained(("GT", AcabValue.safe_make(0)))
+        self.assertEqual(constraints.test_all([], ContextInstance()), [])
+
+    def test_query_step(self):
+        node_sem = BasicNodeSemantics().as_handler("_:node")
+        sem      = BreadthTrieSemantics(default=node_sem)
+        struct   = BasicNodeStruct.build_default()
+        for x in range(100):
+            sem.insert(Sentence.build(["a", AcabValue.safe_make(x)]), struct)
+
+        query  = Sentence.build(["a", "x"])
+        query[1].data[BIND_V] = True
+        query[1].data[CONSTRAINT_V] = [ProductionComponent("test", Sentence.build(["GT"]),
+                                                           [AcabValue.safe_make(94)])]
+        ctxs = ContextSet.build(self.ops)
+        with mock.patch.object(GT, "__call__", side_effect=AssertionError("per node")):
+            sem.query(query, struct, ctxs=ctxs)
+
+        self.assertEqual(sorted([x.data["x"].value for x in ctxs.active_list()]),
+                         [95, 96, 97, 98, 99])
+        self.assertEqual(len(ctxs._failed), 95)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,7 @@ logging = root_logger.getLogger(__name__)
 import acab
 config = acab.setup()
 
-from acab.core.data.values import AcabValue
+from acab.core.data.values import AcabValue, SymbolTable
 from acab.modules.context.context_set import ContextSet, ContextInstance
 from acab.error.semantic_exception import AcabSemanticException
 
@@ -138,6 +138,53 @@ class ContextsTests(unittest.TestCase):
     def test_instance_getitem(self):
         pass
 
+    def test_instance_copy_shares_bindings(self):
+        inst  = ContextInstance(data={"a": 2, "b": 3})
+        inst2 = inst.bind_dict({"c": 4})
+        self.assertEqual(dict(inst.data), {"a": 2, "b": 3})
+        self.assertEqual(dict(inst2.data), {"a": 2, "b": 3, "c": 4})
+        self.assertEqual(len(inst2), 3)
+
+    def test_instance_symbol_keys(self):
+        inst = ContextInstance(data={"a": 2, "5": 3})
+        self.assertEqual(inst[SymbolTable.intern("a")], 2)
+        # Plain ints and ids are names, not symbol ids
+        self.assertEqual(inst[5], 3)
+        self.assertNotIn(SymbolTable.intern("a").real, inst)
+        self.assertNotIn(inst.id, inst)
+
+    def test_instance_lineage(self):
+        inst   = ContextInstance()
+        child  = inst.copy()
+        grand  = child.copy()
+        other  = ContextInstance()
+        self.assertEqual(list(grand._lineage), [grand.id, child.id, inst.id])
+        self.assertEqual(grand._depth, 2)
+        self.assertTrue(grand.descends_from({inst.id}))
+        self.assertFalse(grand.descends_from({other.id}))
+
+    def test_set_subctx_by_lineage(self):
+        ctx     = ContextSet()
+        initial = ctx.pop()
+        child   = initial.copy()
+        other   = ContextInstance()
+        ctx.push([child, other])
+        sub     = ctx.subctx([initial.id])
+        self.assertEqual(list(sub._active), [child.id])
+
+    def test_set_descendants(self):
+        ctx     = ContextSet()
+        initial = ctx.pop()
+        middle  = initial.copy()
+        leaves  = [middle.copy(), middle.copy()]
+        ctx.push(leaves)
+        # Ancestors not in the set are still indexed
+        self.assertEqual(ctx.descendants([middle.id]), {middle.id} | {x.id for x in leaves})
+        self.assertEqual(ctx.descendants([leaves[0].id]), {leaves[0].id})
+        self.assertEqual(list(ctx.subctx([middle.id])._active), [x.id for x in leaves])
+        self.assertEqual(ctx.subctx([middle.id]).descendants([initial.id]),
+                         {initial.id, middle.id} | {x.id for x in leaves})
+
 
 
 
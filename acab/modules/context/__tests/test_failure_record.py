@@ -0,0 +1,148 @@
+#!/opt/anaconda3/envs/acab/bin/python
+import logging
+import unittest
+from functools import partial
+from os.path import split, splitext
+
+import acab
+
+config = acab.setup()
+
+from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.triple_store import TripleStore
+from acab.core.data.values import Sentence
+from acab.modules.context import context_delayed_actions
+from acab.modules.context.context_set import ContextInstance, ContextSet
+from acab.modules.context.failure_record import (ContextFailState,
+                                                 CountFailures, NoFailures,
+                                                 RecordFailures, RingFailures,
+                                                 SampledFailures)
+from acab.modules.semantics.dependent import BreadthTrieSemantics
+from acab.modules.semantics.independent import BasicNodeSemantics
+from acab.modules.semantics.secondary_dependent import TripleStoreSemantics
+
+NEGATION_V = config.prepare("Value.Structure", "NEGATION")()
+BIND_V     = config.prepare("Value.Structure", "BIND")()
+
+
+def var_sen(words, *variables, negated=False):
+    sen = Sentence.build(words)
+    for index in variables:
+        sen[index].data[BIND_V] = True
+    if negated:
+        sen.data[NEGATION_V] = True
+
+    return sen
+
+
+class FailureRecordTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        LOGLEVEL = logging.DEBUG
+        LOG_FILE_NAME = "log.{}".format(splitext(split(__file__)[1])[0])
+        logging.basicConfig(filename=LOG_FILE_NAME, level=LOGLEVEL, filemode='w')
+
+        console = logging.StreamHandler()
+        console.setLevel(logging.INFO)
+        logging.getLogger('').addHandler(console)
+
+    def fail_many(self, record, amount=10):
+        query = Sentence.build(["a", "b"])
+        for x in range(amount):
+            record.fail(ContextInstance(), query, str(x), None)
+
+        return record
+
+    def test_record_all(self):
+        record = self.fail_many(RecordFailures())
+        self.assertEqual(len(record), 10)
+        self.assertEqual(len(list(record)), 10)
+        self.assertIsInstance(record[0], ContextFailState)
+
+    def test_record_none(self):
+        record = self.fail_many(NoFailures())
+        self.assertEqual(len(record), 0)
+        self.assertFalse(bool(record))
+        self.assertEqual(list(record), [])
+
+    def test_record_counts(self):
+        record = self.fail_many(CountFailures())
+        self.assertEqual(len(record), 10)
+        self.assertTrue(bool(record))
+        self.assertEqual(list(record), [])
+        self.assertEqual(record.by_query[Sentence.build(["a", "b"])], 10)
+
+    def test_record_ring(self):
+        record = self.fail_many(RingFailures(3))
+        self.assertEqual(len(record), 10)
+        self.assertEqual([x.failed_on for x in record], ["7", "8", "9"])
+
+    def test_record_sampled(self):
+        record = self.fail_many(SampledFailures(rate=0.1, seed=2), amount=1000)
+        self.assertEqual(len(record), 1000)
+        self.assertLess(len(list(record)), 200)
+        self.assertGreater(len(list(record)), 0)
+
+    def test_merge_keeps_count(self):
+        record = self.fail_many(RecordFailures())
+        record.merge(self.fail_many(RingFailures(2)))
+        self.assertEqual(len(record), 20)
+        self.assertEqual(len(list(record)), 12)
+        counts = self.fail_many(CountFailures())
+        counts.merge(self.fail_many(CountFailures()))
+        self.assertEqual(len(counts), 20)
+        self.assertEqual(sum(counts.by_query.values()), 20)
+
+    def test_discard(self):
+        record = RecordFailures()
+        ctx    = ContextInstance()
+        record.fail(ctx, None, None, None)
+        self.fail_many(record)
+        record.discard([ctx.id])
+        self.assertEqual(len(record), 10)
+        self.assertNotIn(ctx, [x.ctx for x in record])
+
+    def test_set_policy(self):
+        ctxs = ContextSet.build(failures=CountFailures)
+        self.assertIsInstance(ctxs._failed, CountFailures)
+        self.assertIsInstance(ctxs.subctx()._failed, CountFailures)
+        self.assertIsInstance(ContextSet.build()._failed, RecordFailures)
+
+    def test_set_default_policy(self):
+        original = ContextSet.failure_policy
+        try:
+            ContextSet.failure_policy = partial(RingFailures, 5)
+            self.assertIsInstance(ContextSet()._failed, RingFailures)
+        finally:
+            ContextSet.failure_policy = original
+
+    def test_query_without_failures(self):
+        node_sem = BasicNodeSemantics().as_handler("_:node")
+        sem      = BreadthTrieSemantics(default=node_sem)
+        struct   = BasicNodeStruct.build_default()
+        for x in range(20):
+            sem.insert(Sentence.build(["a", str(x), "c"]), struct)
+        ctxs = ContextSet.build(failures=NoFailures)
+        sem.query(var_sen(["a", "x", "d"], 1), struct, ctxs=ctxs)
+        self.assertEqual(len(ctxs), 0)
+        self.assertFalse(bool(ctxs._failed))
+
+    def test_negation_without_failures(self):
+        node_sem = BasicNodeSemantics().as_handler("_:node")
+        sem      = TripleStoreSemantics(default=node_sem)
+        struct   = TripleStore.build_default()
+        for triple in [("alice", "likes", "bob"),
+                       ("carol", "likes", "bob"),
+                       ("alice", "knows", "carol")]:
+            sem.insert(Sentence.build(triple), struct)
+
+        for policy in [NoFailures, CountFailures, partial(RingFailures, 1)]:
+            ctxs = ContextSet.build(failures=policy)
+            sem.query(var_sen(["x", "likes", "bob"], 0), struct, ctxs=ctxs)
+            sem.query(var_sen(["x", "knows", "carol"], 0, negated=True), struct, ctxs=ctxs)
+            self.assertEqual([str(x.data["x"]) for x in ctxs.active_list()], ["carol"])
+
+
+if __name__ == '__main__':
+    unittest.main()
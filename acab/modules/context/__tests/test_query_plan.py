@@ -0,0 +1,112 @@
+#https://docs.python.org/3/library/unittest.html
+# https://docs.python.org/3/library/unittest.mock.html
+
+import logging as root_logger
+import unittest
+from os.path import split, splitext
+
+import acab
+
+config = acab.setup()
+
+from acab.core.data.production_abstractions import ProductionComponent
+from acab.core.data.values import AcabValue, Sentence
+from acab.modules.context.context_query_manager import ContextQueryManager
+from acab.modules.context.context_set import ContextInstance, ContextSet
+from acab.modules.context.query_plan import QueryPlan, QueryPlanCache
+from acab.modules.operators.action.action_operators import RebindOperator
+from acab.modules.operators.query.query_operators import EQ
+
+NEGATION_V   = config.prepare("Value.Structure", "NEGATION")()
+BIND_V       = config.prepare("Value.Structure", "BIND")()
+CONSTRAINT_V = config.prepare("Value.Structure", "CONSTRAINT")()
+
+
+class TestQueryPlan(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        LOGLEVEL = root_logger.DEBUG
+        LOG_FILE_NAME = "log.{}".format(splitext(split(__file__)[1])[0])
+        root_logger.basicConfig(filename=LOG_FILE_NAME, level=LOGLEVEL, filemode='w')
+
+        console = root_logger.StreamHandler()
+        console.setLevel(root_logger.INFO)
+        root_logger.getLogger('').addHandler(console)
+
+    def setUp(self):
+        self.op_path   = Sentence.build(["EQ"])
+        self.operators = ContextInstance(data={str(self.op_path): EQ()})
+        self.clause    = Sentence.build(["a", "test", "x"])
+        self.clause[-1].data[BIND_V] = True
+        alpha          = ProductionComponent("alpha test", self.op_path,
+                                             [AcabValue.safe_make("blah")])
+        beta           = ProductionComponent("beta test", self.op_path,
+                                             [AcabValue.safe_make("y", data={BIND_V: True})])
+        self.clause[-1].data[CONSTRAINT_V] = [alpha, beta]
+
+    def test_plan_build(self):
+        plan = QueryPlan.build(self.clause, self.operators)
+        self.assertFalse(plan.negated)
+        self.assertEqual(len(plan.constraints), 3)
+        last = plan.constraints[-1]
+        self.assertEqual(len(last["alpha"]), 1)
+        self.assertEqual(len(last["beta"]), 1)
+        self.assertEqual(len(last._resolved), 2)
+        self.assertTrue(all([isinstance(x, EQ) for x in last._resolved.values()]))
+
+    def test_plan_negated(self):
+        self.clause.data[NEGATION_V] = True
+        plan = QueryPlan.build(self.clause, self.operators)
+        self.assertTrue(plan.negated)
+
+    def test_cache_reuse(self):
+        cache = QueryPlanCache()
+        first = cache.get(self.clause, self.operators)
+        self.assertIs(cache.get(self.clause, self.operators), first)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_cache_keyed_on_operators(self):
+        cache = QueryPlanCache()
+        first = cache.get(self.clause, self.operators)
+        other = cache.get(self.clause, self.operators.copy())
+        self.assertIsNot(first, other)
+        self.assertEqual(len(cache), 2)
+
+    def test_cache_bounded(self):
+        cache   = QueryPlanCache(size=2)
+        clauses = [Sentence.build(["a", str(x)]) for x in range(3)]
+        plans   = [cache.get(x) for x in clauses]
+        self.assertEqual(len(cache), 2)
+        self.assertIsNot(cache.get(clauses[0]), plans[0])
+        self.assertIs(cache.get(clauses[2]), plans[2])
+
+    def test_cache_disabled(self):
+        cache = QueryPlanCache(size=0)
+        first = cache.get(self.clause)
+        self.assertIsNot(cache.get(self.clause), first)
+        self.assertEqual(len(cache), 0)
+
+    def test_manager_uses_cache(self):
+        ctxs   = ContextSet.build(self.operators)
+        first  = ContextQueryManager(self.clause, None, ctxs)
+        second = ContextQueryManager(self.clause, None, ctxs)
+        self.assertTrue(all([x is y for x, y in zip(first.constraints, second.constraints)]))
+
+    def test_rebind_clears_cache(self):
+        ctxs = ContextSet.build(self.operators)
+        ContextQueryManager(self.clause, None, ctxs)
+        self.assertTrue(bool(ContextQueryManager.plans))
+
+        class SemSystem:
+            _operator_cache = self.operators
+
+        sem_sys = SemSystem()
+        RebindOperator()(Sentence.build(["equals"]), str(self.op_path), semSystem=sem_sys)
+        self.assertEqual(len(ContextQueryManager.plans), 0)
+        self.assertIsNot(sem_sys._operator_cache, self.operators)
+        self.assertIn("_:equals", sem_sys._operator_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,6 +7,7 @@ from typing import (Any, Callable, ClassVar, Dict, Generic, Iterable, Iterator,
 
 logging = root_logger.getLogger(__name__)
 
+import acab.core.util.vectorise as VEC
 import acab.interfaces.context as CtxInt
 import acab.error.semantic_exception as ASErr
 from acab.core.config import GET
@@ -38,6 +39,11 @@ class ConstraintCollection(CtxInt.Constraint_i):
 
     source         : Value                     = field()
     _test_mappings : Dict[str, List[Callable]] = field()
+    # The operators the collection was built with, and tests' ops resolved from them
+    _operators     : Optional[CtxIns]          = field(default=None, repr=False)
+    _resolved      : Dict[int, Operator]       = field(default_factory=dict, repr=False)
+    # (operator, params, data) of the alpha tests, when resolved
+    _alpha_trios   : List[Tuple]               = field(default_factory=list, repr=False)
 
     sieve           : ClassVar[List[Callable]] = AcabSieve(default_sieve)
     operators       : ClassVar[CtxIns]         = None
@@ -51,7 +57,7 @@ class ConstraintCollection(CtxInt.Constraint_i):
         if sieve_fns is None:
             sieve = ConstraintCollection.sieve
         else:
-            sieve = AcabSieve(seive_fns)
+            sieve = AcabSieve(sieve_fns)
 
         tests = {}
         for result in sieve.fifo_collect(word):
@@ -63,8 +69,34 @@ class ConstraintCollection(CtxInt.Constraint_i):
             if stop:
                 break
 
+        collection = ConstraintCollection(word, tests, _operators=operators)
+        collection._resolve()
+        return collection
 
-        return ConstraintCollection(word, tests)
+    def _resolve(self):
+        """ Look up the operators of tests that can't be rebound by a context,
+        so queries don't repeat it for every node """
+        if self._operators is None:
+            return
+
+        static = self["alpha"] + [x for x in self["beta"] if not x.op.has_var]
+        for test in static:
+            self._resolved[id(test)] = self._get(test.op)
+
+        self._alpha_trios.extend(self._alphas())
+
+    def _alphas(self) -> List[Tuple]:
+        """ The (operator, params, data) trio of each alpha test """
+        if bool(self._alpha_trios):
+            return self._alpha_trios
+
+        return [(self._op(x), x.params, x.data) for x in self["alpha"]]
+
+    def _op(self, test, stack=None):
+        if id(test) in self._resolved:
+            return self._resolved[id(test)]
+
+        return self._get(test.op, stack)
 
 
     def test(self, node, ctx):
@@ -81,6 +113,63 @@ class ConstraintCollection(CtxInt.Constraint_i):
         if "name" in self._test_mappings:
             self.__run_name(node, ctx)
 
+    def test_all(self, nodes:List[Node], ctx) -> List[bool]:
+        """ Test all the candidate nodes of a query step at once,
+        returning which of them pass.
+        Each alpha test runs once, over every node's value,
+        then each beta test runs once over the values of the nodes the alphas passed,
+        using its operator's batch method. Other tests run per node.
+        As with test, a node only reaches the tests of a stage if it passed the last.
+        """
+        mask = [True for x in nodes]
+        if not bool(nodes):
+            return mask
+
+        if bool(self["alpha"]):
+            values = [x.value for x in nodes]
+            for op, params, data in self._alphas():
+                mask = VEC.mask_and(mask, self._batch(op, values, params, data))
+
+        mask = VEC.to_list(mask)
+        live = [index for index, passed in enumerate(mask) if passed]
+        if bool(self["beta"]) and bool(live):
+            values = [self._get(nodes[x].value, [ctx]) for x in live]
+            betas  = [True for x in live]
+            for test in self._test_mappings["beta"]:
+                op     = self._op(test, [ctx])
+                params = [self._get(x, [ctx]) for x in test.params]
+                betas  = VEC.mask_and(betas, self._batch(op, values, params, test.data))
+
+            for index, passed in zip(live, VEC.to_list(betas)):
+                mask[index] = passed
+
+        if "sub_struct_tests" not in self._test_mappings and "name" not in self._test_mappings:
+            return mask
+
+        for index, node in enumerate(nodes):
+            if not mask[index]:
+                continue
+            try:
+                if "sub_struct_tests" in self._test_mappings:
+                    self.__run_substruct_tests(node, ctx)
+                if "name" in self._test_mappings:
+                    self.__run_name(node, ctx)
+            except ASErr.AcabSemanticTestFailure as err:
+                mask[index] = False
+
+        return mask
+
+    def _batch(self, op, values, params, data) -> VEC.Mask:
+        if hasattr(op, "batch"):
+            return op.batch(values, *params, data=data)
+
+        return [bool(op(x, *params, data=data)) for x in values]
+
+    def test_alphas(self, node):
+        """ Run only the tests which don't need a context """
+        if "alpha" in self._test_mappings:
+            self.__run_alphas(node)
+
     def _get(self, val, stack=None):
         """
         Retrieve a value from a stack of a context instance.
@@ -89,7 +178,7 @@ class ConstraintCollection(CtxInt.Constraint_i):
         if stack is None:
             stack = []
         # TODO separate this into sieve, then move to contextset?
-        stack.append(self.operators)
+        stack.append(self._operators or self.operators)
 
         for ctx in stack:
             if val in ctx:
@@ -102,12 +191,8 @@ class ConstraintCollection(CtxInt.Constraint_i):
 
     def __run_alphas(self, node):
         """ Run alpha tests on a node """
-        # Get the (operator, params, data) trio:
-        test_trios = [(self._get(x.op),
-                       x.params,
-                       x.data) for x in self._test_mappings["alpha"]]
         # Perform the tests:
-        results = [op(node.value, *pars, data=data) for op,pars,data in test_trios]
+        results = [op(node.value, *pars, data=data) for op,pars,data in self._alphas()]
         if not all(results):
             raise ASErr.AcabSemanticTestFailure("Alphas Failed", (node, self))
 
@@ -116,7 +201,7 @@ class ConstraintCollection(CtxInt.Constraint_i):
         test_trios = []
         ctx_stack = [ctxInst]
         for test in self._test_mappings["beta"]:
-            op = self._get(test.op, ctx_stack)
+            op = self._op(test, ctx_stack)
             params = [self._get(x, ctx_stack) for x in test.params]
             trio   = (op, params, test.data)
             test_trios.append(trio)
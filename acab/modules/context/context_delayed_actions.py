@@ -3,26 +3,29 @@ from typing import List, Set, Dict, Tuple, Optional, Any
 from typing import Callable, Iterator, Union, Match
 from typing import Mapping, MutableMapping, Sequence, Iterable
 from typing import cast, ClassVar, TypeVar, Generic
-from uuid import UUID
+from collections import deque
+
+from acab.core.util.identity import AcabId
 
 from acab.core.decorators.util import registerOn
 from acab.modules.context.context_set import ContextSet
 
 @registerOn(ContextSet)
-def do_active(self, uuids:List[UUID]):
-    self._active += [x for x in uuids if x not in self._active]
+def do_active(self, uuids:List[AcabId]):
+    active = set(self._active)
+    self._active.extend([x for x in uuids if x not in active])
 
 @registerOn(ContextSet)
-def do_fail(self, uuids:List[UUID]):
-    self._failed += [x for x in uuids if x not in self._failed]
+def do_fail(self, uuids:List[AcabId]):
+    [self._failed.fail(self._total[x], None, None, None) for x in uuids]
 
 @registerOn(ContextSet)
-def do_deactivate(self, uuids:List[UUID]):
-    self._active = [x for x in self._active if x not in uuids]
-    self._failed = [x for x in self._failed if x not in uuids]
+def do_deactivate(self, uuids:List[AcabId]):
+    self._active = deque([x for x in self._active if x not in uuids])
+    self._failed.discard(uuids)
 
 @registerOn(ContextSet)
-def do_default(self, instr, uuids:List[UUID]):
+def do_default(self, instr, uuids:List[AcabId]):
     """ Default Action if the instruction has no method """
     logging.warning(f"ContextSet bad instruction: {instr} : {uuids}")
 
@@ -30,6 +33,7 @@ def do_default(self, instr, uuids:List[UUID]):
 def do_merge(self, ctxSets):
     for ctxs in ctxSets:
         self._total.update(ctxs._total)
+        self._index(ctxs._total.values())
         self.do_active(ctxs._active)
-        self.do_fail(ctxs._failed)
+        self._failed.merge(ctxs._failed)
         self._named_sets.update(ctxs._named_sets)
@@ -9,7 +9,7 @@ logging = root_logger.getLogger(__name__)
 
 from dataclasses import FrozenInstanceError, InitVar, dataclass, field, replace
 from enum import Enum
-from uuid import UUID, uuid1
+from acab.core.util.identity import AcabId
 
 import acab.interfaces.context as CtxInt
 import acab.error.semantic_exception as ASErr
@@ -19,6 +19,8 @@ from acab.core.data.production_abstractions import (ProductionComponent,
 from acab.interfaces.value import Sentence_i
 from acab.error.semantic_exception import AcabSemanticException
 from acab.modules.context.constraints import ConstraintCollection
+from acab.modules.context.failure_record import FailureRecord_i, RecordFailures
+from acab.modules.context.query_plan import QueryPlanCache
 
 config = GET()
 
@@ -55,36 +57,58 @@ class ContextQueryManager:
 
     _current_constraint : ConstraintCollection = field(init=False, default=None)
     _current_inst       : CtxIns               = field(init=False, default=None)
-    _initial_ctxs       : List[UUID]           = field(init=False, default_factory=list)
+    _initial_ctxs       : List[AcabId]         = field(init=False, default_factory=list)
+    _outer_failures     : FailureRecord_i      = field(init=False, default=None)
+    # Set by semantics to resolve a negated query by searching for a single match
+    exists              : Optional[Callable[[CtxIns], bool]] = field(init=False, default=None)
+
+    plans               : ClassVar[QueryPlanCache] = QueryPlanCache()
 
     def __post_init__(self):
-        sen = self.query_clause
-        self.negated = NEGATION_S in sen.data and sen.data[NEGATION_S]
-        constraints = [ConstraintCollection.build(x, operators=self.ctxs._operators) for x in sen]
-        self.constraints.extend(constraints)
-        self._initial_ctxs = [x.uuid for x in self.ctxs.active_list()]
+        plan = self.plans.get(self.query_clause, self.ctxs._operators)
+        self.negated = plan.negated
+        self.constraints.extend(plan.constraints)
+        self._initial_ctxs = list(self.ctxs._active)
+
+    @staticmethod
+    def start(ctxInst:CtxIns, query_clause:Optional[Sen], root_node:Node) -> CtxIns:
+        """ Set an instance to start at the root node,
+        unless the clause starts with an at_binding,
+        in which case get the bound node """
+        if query_clause is None or not query_clause[0].is_at_var:
+            return ctxInst.set_current_node(root_node)
+
+        return ctxInst.set_current_binding(query_clause[0])
 
     def __enter__(self):
-        # set all instances to start at node, unless start_word is an at_binding,
-        # in which case get the bound node
         # handle negated behaviour
         active_list : List[CtxIns] = self.ctxs.active_list()
-
-        if self.query_clause is None or not self.query_clause[0].is_at_var:
-            [x.set_current_node(self.root_node) for x in active_list]
-        else:
-            assert(self.query_clause[0].is_at_var)
-            root_word = self.query_clause[0]
-            [x.set_current_binding(root_word) for x in active_list]
+        [self.start(x, self.query_clause, self.root_node) for x in active_list]
+        if self.negated:
+            # Record every failure of a negated query to resolve it,
+            # regardless of the context set's failure policy
+            self._outer_failures = self.ctxs._failed
+            self.ctxs._failed    = RecordFailures()
 
         return self
 
 
     def __exit__(self, exc_type, exc_value, traceback):
         if self.negated:
+            failures          = self.ctxs._failed
+            self.ctxs._failed = self._outer_failures
+
+        if self.negated and self.exists is not None:
+            # Only instances without a match pass
+            for ctxInst in self.ctxs.active_list(clear=True):
+                if self.exists(ctxInst):
+                    self.ctxs.fail(ctxInst, None, None, self.query_clause)
+                else:
+                    self.ctxs.push(ctxInst.id)
+
+        elif self.negated:
             # invert failed and passing
-            actually_passed = self.ctxs._failed
-            passed_lineages = {y for x in actually_passed for y in x.ctx._lineage}
+            passed_lineages = self._failed_roots(failures)
             passed_initial  = [x for x in self._initial_ctxs if x in passed_lineages]
 
             actually_failed = self.ctxs.active_list(clear=True)
@@ -97,6 +121,22 @@ class ContextQueryManager:
         # TODO handle exception
 
 
+    def _failed_roots(self, failures) -> Set[AcabId]:
+        """ The initial instances with a failed descendant.
+        Each lineage is walked only until an ancestor already seen """
+        initial = set(self._initial_ctxs)
+        roots, seen = set(), set()
+        for fail_state in failures:
+            for ancestor in fail_state.ctx._lineage:
+                if ancestor in seen:
+                    break
+                seen.add(ancestor)
+                if ancestor in initial:
+                    roots.add(ancestor)
+                    break
+
+        return roots
+
     def __iter__(self):
         return iter(self.constraints)
 
@@ -142,14 +182,15 @@ class ContextQueryManager:
         assert(len(possible) == 1 or bool(constraints))
         successes = []
 
-        # Collect all nodes that pass tests
-        for node in possible:
-            try:
-                constraints.test(node, self._current_inst)
+        # Collect all nodes that pass tests, testing them together
+        passed = constraints.test_all(possible, self._current_inst)
+        for node, success in zip(possible, passed):
+            if success:
                 successes.append(node)
-            except ASErr.AcabSemanticTestFailure as err:
-                logging.debug(f"Tests failed on {node.value}:\n\t{err}")
-                self.ctxs.fail(self._current_inst, constraints.source, node, self.query_clause)
+                continue
+
+            logging.debug(f"Tests failed on {node.value}")
+            self.ctxs.fail(self._current_inst, constraints.source, node, self.query_clause)
 
         # Handle successes
         # success, so copy and extend ctx instance
@@ -1,23 +1,30 @@
 import logging as root_logger
-from typing import (Any, Callable, ClassVar, Dict, Generic, Iterable, Iterator,
+from typing import (Any, Callable, ClassVar, Deque, Dict, Generic, Iterable, Iterator,
                     List, Mapping, Match, MutableMapping, Optional, Sequence,
                     Set, Tuple, TypeVar, Union, cast)
 
 logging = root_logger.getLogger(__name__)
 
+from collections import deque
 from dataclasses import FrozenInstanceError, InitVar, dataclass, field, replace
 from enum import Enum
-from uuid import UUID, uuid1
+from uuid import UUID
 
 import acab.error.semantic_exception as ASErr
 import acab.interfaces.context as CtxInt
 from acab.core.config import GET
 from acab.core.data.production_abstractions import (ProductionComponent,
                                                     ProductionContainer)
+from acab.core.data.values import SymbolId, SymbolTable
+from acab.core.util.identity import AcabId, next_id
+from acab.core.util.persistent_map import PersistentMap
 from acab.core.util.delayed_commands import DelayedCommands_i
 from acab.error.semantic_exception import AcabSemanticException
 from acab.interfaces.value import Sentence_i
 from acab.modules.context.constraints import ConstraintCollection
+from acab.modules.context.failure_record import (ContextFailState,
+                                                 FailureRecord_i,
+                                                 RecordFailures)
 
 config = GET()
 
@@ -39,44 +46,64 @@ NamedCtxSet      = "NamedCtxSet"
 
 DELAYED_E = Enum("Delayed Instruction Set", "ACTIVE FAIL DEACTIVATE CLEAR MERGE")
 
-@dataclass(frozen=True)
-class ContextFailState:
-    """
-    Utility dataclass for holding a ctx with information about where it failed
-    """
-    ctx       : CtxIns         = field()
-    query     : Sen            = field()
-    failed_on : Value          = field()
-    node      : Optional[Node] = field()
-
-
 @dataclass(frozen=True)
 class ContextInstance(CtxInt.ContextInstance_i):
+    """ Bindings are held in PersistentMaps,
+    so extending an instance shares its parent's bindings,
+    instead of copying them.
+    Lineage is the chain of parent instances.
+    """
 
-    data              : Dict[str, Any]  = field(default_factory=dict)
-    nodes             : Dict[str, Node] = field(default_factory=dict)
-    uuid              : UUID            = field(default_factory=uuid1)
+    data              : Dict[str, Any]  = field(default_factory=PersistentMap)
+    nodes             : Dict[str, Node] = field(default_factory=PersistentMap)
+    id                : AcabId          = field(default_factory=next_id)
     _parent_ctx       : CtxIns          = field(default=None)
     exact             : bool            = field(default=False)
 
     _current          : Node            = field(init=False, default=None)
     _depth            : int             = field(init=False, default=0)
-    _lineage          : set             = field(init=False, default_factory=set)
 
     def __post_init__(self):
+        if not isinstance(self.data, PersistentMap):
+            object.__setattr__(self, "data", PersistentMap(self.data))
+        if not isinstance(self.nodes, PersistentMap):
+            object.__setattr__(self, "nodes", PersistentMap(self.nodes))
         if self._parent_ctx is not None:
             object.__setattr__(self, "_depth", self._parent_ctx._depth + 1)
-            lineage = set([self._parent_ctx.uuid, self.uuid]).union(self._parent_ctx._lineage)
-            object.__setattr__(self, "_lineage", lineage)
+
+    @property
+    def _lineage(self) -> Iterator[AcabId]:
+        """ The ids of this instance and its ancestors, nearest first """
+        current = self
+        while current is not None:
+            yield current.id
+            current = current._parent_ctx
+
+    def descends_from(self, ids:Set[AcabId]) -> bool:
+        """ Whether this instance, or an ancestor, is in a set of ids """
+        return any([x in ids for x in self._lineage])
 
     def __hash__(self):
-        return hash(self.uuid)
+        return hash(self.id)
+
+    @property
+    def uuid(self) -> UUID:
+        """ Built from the id only when asked for """
+        return self.id.uuid
+
+    @staticmethod
+    def _key(value: Union[SymbolId, Value]) -> str:
+        """ Bindings are stored by name, but can also be keyed by SymbolTable id """
+        if isinstance(value, SymbolId):
+            return SymbolTable.name(value)
+
+        return str(value)
 
     def __contains__(self, value: Value):
         if isinstance(value, Sentence_i) and value.is_var and value[0] in self:
             return self.data[str(value[0])]
 
-        return str(value) in self.data
+        return ContextInstance._key(value) in self.data
 
     def __getitem__(self, value: Value):
         if self.exact and value not in self:
@@ -84,21 +111,20 @@ class ContextInstance(CtxInt.ContextInstance_i):
 
         if isinstance(value, Sentence_i) and value.is_var and value[0] in self:
             return self.data[str(value[0])]
-        elif str(value) in self:
-            return self.data[str(value)]
+        elif value in self:
+            return self.data[ContextInstance._key(value)]
         else:
             return value
 
     # def __setitem(self, key: Any, value: Any):
     #     raise ASErr.AcabSemanticException("Context Instances can't directly set a value, use MutableContextInstance")
 
-    def __getattribute__(self, value):
-        try:
-            return object.__getattribute__(self, value)
-        except AttributeError as err:
-            if not value in self:
-                raise err
-            return self.__getitem__(value)
+    def __getattr__(self, value):
+        """ Only called when normal lookup fails, so bindings are attributes
+        without slowing down every other attribute access """
+        if value == "data" or not value in self:
+            raise AttributeError(value)
+        return self.__getitem__(value)
 
     def __bool__(self):
         return bool(self.data)
@@ -116,15 +142,14 @@ class ContextInstance(CtxInt.ContextInstance_i):
         if 'data' not in kwargs:
             kwargs['data'] = self.data.copy()
 
-        copied = replace(self,
-                         uuid=uuid1(),
-                         data=kwargs['data'],
-                         nodes=self.nodes.copy(),
-                         _parent_ctx=self,
-                         )
+        copied = type(self)(data=kwargs['data'],
+                            nodes=self.nodes.copy(),
+                            id=next_id(),
+                            _parent_ctx=self,
+                            exact=self.exact)
 
-        assert(self.uuid != copied.uuid)
-        assert(id(self.data) != id(copied.data))
+        assert(self.id != copied.id)
+        assert(self.data is not copied.data)
         return copied
 
     def bind(self, word, nodes, sub_binds=None) -> [CtxIns]:
@@ -197,26 +222,35 @@ class ContextSet(CtxInt.ContextSet_i, DelayedCommands_i):
     # For nesting ctxsets
     _parent              : Optional[CtxSet]       = field(default=None)
 
-    _total               : Dict[UUID, CtxIns]     = field(default_factory=dict)
-    _active              : List[UUID]             = field(default_factory=list)
+    _total               : Dict[AcabId, CtxIns]   = field(default_factory=dict)
+    # A queue of ids, swapped for an empty one when cleared
+    _active              : Deque[AcabId]          = field(default_factory=deque)
+    # Builds the failure record, defaulting to ContextSet.failure_policy
+    _failure_policy      : Optional[Callable[[], FailureRecord_i]] = field(default=None, repr=False)
 
-    _failed              : List[ContextFailState] = field(init=False, default_factory=list)
+    _failed              : FailureRecord_i        = field(init=False, default=None)
     _named_sets          : Dict[Any, NamedCtxSet] = field(init=False, default_factory=dict)
-    _uuid                : UUID                   = field(init=False, default_factory=uuid1)
+    _id                  : AcabId                 = field(init=False, default_factory=next_id)
+    # The lineage tree of every instance added, and their ancestors: parent -> children
+    _children            : Dict[AcabId, Set[AcabId]] = field(init=False, default_factory=dict, repr=False)
+    _indexed             : Set[AcabId]               = field(init=False, default_factory=set, repr=False)
 
     delayed_e            : Enum                   = field(init=False, default=DELAYED_E)
     instance_constructor : CtxIns                 = field(init=False, default=ContextInstance)
 
+    failure_policy       : ClassVar[Callable[[], FailureRecord_i]] = RecordFailures
+
     @staticmethod
-    def build(ops:Union[None, CtxIns, List[ModuleComponents]]=None):
+    def build(ops:Union[None, CtxIns, List[ModuleComponents]]=None, failures=None):
         """ Create the empty context instance,
-        constructing the operator bindings if necessary
+        constructing the operator bindings if necessary.
+        `failures` overrides the failure policy, see failure_record
         """
         if ops is None:
-            return ContextSet()
+            return ContextSet(_failure_policy=failures)
 
         if isinstance(ops, CtxInt.ContextInstance_i):
-            return ContextSet(_operators=ops)
+            return ContextSet(_operators=ops, _failure_policy=failures)
 
         assert(isinstance(ops, list)), ops
         # Get Flat List of Operator Sentences:
@@ -229,43 +263,73 @@ class ContextSet(CtxInt.ContextSet_i, DelayedCommands_i):
         # TODO abstract building ctxinst's to the set
         instance = ContextInstance(op_dict, exact=True)
         # TODO add sugar names from config
-        return ContextSet(_operators=instance)
+        return ContextSet(_operators=instance, _failure_policy=failures)
 
-    def subctx(self, selection:List[Union[CtxIns, UUID]]=None):
+    def subctx(self, selection:List[Union[CtxIns, AcabId]]=None):
         """
         Build a subset of this ctxset.,
-        either with reified instances, or their UUIDs
+        either with reified instances, or their ids
         """
         if selection is None:
             selection     = self._active
         elif all([isinstance(x, ContextInstance) for x in selection]):
-            selection     = [x.uuid for x in selection]
+            selection     = [x.id for x in selection]
 
-        # active_lineage = {y for x in self.active_list() for y in x._lineage}
-        selection = [x.uuid for x in self.active_list() if x._lineage.intersection(selection)]
-        # selection     = [x for x in selection if x in active_lineage]
+        descendants = self.descendants(selection)
+        selection   = [x for x in self._active if x in descendants]
         obj_selection = {x : self._total[x] for x in selection}
 
         assert(all([isinstance(x, ContextInstance) for x in obj_selection.values()]))
-        assert(all([isinstance(x, UUID) for x in selection]))
+        assert(all([isinstance(x, AcabId) for x in selection]))
         subctx = ContextSet(_operators=self._operators,
                             _parent=self,
                             _total=obj_selection,
-                            _active=selection)
+                            _active=selection,
+                            _failure_policy=self._failure_policy)
 
 
         return subctx
 
     def __post_init__(self):
         logging.debug("ContextSet Created")
+        self._failed = (self._failure_policy or type(self).failure_policy)()
+        if not isinstance(self._active, deque):
+            self._active = deque(self._active)
         if not bool(self._total):
             initial = ContextInstance()
-            self._total[initial.uuid] = initial
-            self._active.append(initial.uuid)
+            self._total[initial.id] = initial
+            self._active.append(initial.id)
+
+        self._index(self._total.values())
+
+    def _index(self, instances:Iterable[CtxIns]):
+        """ Add instances to the lineage tree,
+        walking up their parents only until reaching an indexed ancestor """
+        for ctxInst in instances:
+            current = ctxInst
+            while current._parent_ctx is not None and current.id not in self._indexed:
+                self._indexed.add(current.id)
+                parent = current._parent_ctx
+                self._children.setdefault(parent.id, set()).add(current.id)
+                current = parent
+
+    def descendants(self, roots:Iterable[AcabId]) -> Set[AcabId]:
+        """ The ids of the roots and everything derived from them,
+        found from the lineage tree, so only the descendants are visited """
+        found = set()
+        stack = list(roots)
+        while bool(stack):
+            current = stack.pop()
+            if current in found:
+                continue
+            found.add(current)
+            stack += self._children.get(current, [])
+
+        return found
 
 
     def __hash__(self):
-        return hash(self._uuid)
+        return hash(self._id)
     def __len__(self):
         return len(self._active)
 
@@ -276,17 +340,17 @@ class ContextSet(CtxInt.ContextSet_i, DelayedCommands_i):
         a named/continuation set (using the instruction that named it)
         """
         result = None
-        if isinstance(index, int):
-            ctx_uuid = self._active[index]
-            result   = self._total[ctx_uuid]
-        elif isinstance(index, UUID):
+        if isinstance(index, AcabId):
             result = self._total[index]
+        elif isinstance(index, int):
+            ctx_id = self._active[index]
+            result = self._total[ctx_id]
         elif isinstance(index, slice):
-            result = self._active[index]
+            result = list(self._active)[index]
         elif isinstance(index, list):
             result = [self._active[x] for x in index]
         elif isinstance(index, (Sentence_i, ProductionContainer)) and index in self._named_sets:
-            result = self._named_sets[index].uuids
+            result = self._named_sets[index].ids
         else:
             raise Exception(f"Unrecognised arg to getitem: {index}")
 
@@ -307,25 +371,22 @@ class ContextSet(CtxInt.ContextSet_i, DelayedCommands_i):
         # add failure details to the instance, of word and query clause
         logging.debug(f"{repr(self)}: Failing: {node}")
 
-        fail_state = ContextFailState(instance,
-                                      query,
-                                      word,
-                                      node)
-        self._failed.append(fail_state)
+        self._failed.fail(instance, query, word, node)
 
-    def push(self, ctxs:Union[CtxIns, List[CtxIns], UUID, List[UUID]]):
+    def push(self, ctxs:Union[CtxIns, List[CtxIns], AcabId, List[AcabId]]):
         if not isinstance(ctxs, list):
             ctxs = [ctxs]
 
-        if all([isinstance(x, UUID) for x in ctxs]):
+        if all([isinstance(x, AcabId) for x in ctxs]):
             assert(all([x in self._total for x in ctxs]))
-            self._active += ctxs
+            self._active.extend(ctxs)
 
         else:
             # Add to set
-            assert(not any([x.uuid in self._total for x in ctxs]))
-            self._total.update({x.uuid: x for x in ctxs})
-            self._active += [x.uuid for x in ctxs]
+            assert(not any([x.id in self._total for x in ctxs]))
+            self._total.update({x.id: x for x in ctxs})
+            self._active.extend([x.id for x in ctxs])
+            self._index(ctxs)
 
 
 
@@ -336,18 +397,21 @@ class ContextSet(CtxInt.ContextSet_i, DelayedCommands_i):
         if top:
             return self._total[self._active.pop()]
         else:
-            return self._total[self._active.pop(0)]
+            return self._total[self._active.popleft()]
 
 
     def active_list(self, clear=False):
-        the_list = [self._total[x] for x in self._active]
+        """ The active instances.
+        Clearing swaps in a new queue, instead of emptying the current one """
+        active = self._active
         if clear:
-            self._active = []
+            self._active = deque()
 
-        return the_list
+        total = self._total
+        return [total[x] for x in active]
 
     def failed_list(self):
-        return self._failed
+        return list(self._failed)
 
 
     def set_parent(self, parent:CtxSet):
@@ -355,9 +419,9 @@ class ContextSet(CtxInt.ContextSet_i, DelayedCommands_i):
 
 
 
-    def build_named_set(self, inst, uuids:List[UUID]):
+    def build_named_set(self, inst, ids:List[AcabId]):
         assert(inst not in self._named_sets)
-        self._named_sets[inst] = NamedCtxSet(inst, uuids)
+        self._named_sets[inst] = NamedCtxSet(inst, ids)
         return self._named_sets[inst]
 
 
@@ -370,7 +434,7 @@ class MutableContextInstance:
     parent       : CtxSet          = field()
     base         : CtxIns          = field()
     data         : Dict[Any, Any]  = field(default_factory=dict)
-    uuid         : UUID            = field(default_factory=uuid1)
+    id           : AcabId          = field(default_factory=next_id)
 
     def __contains__(self, value: Value):
         key = str(value)
@@ -400,7 +464,7 @@ class NamedCtxSet:
     """ A CtxInst for packaging continuations """
 
     instruction : ProductionContainer = field()
-    uuids       : List[UUID]          = field()
+    ids         : List[AcabId]        = field()
     # TODO instruction state
 
 
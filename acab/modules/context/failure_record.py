@@ -0,0 +1,199 @@
+"""
+Policies for what a ContextSet keeps of its failures.
+
+Every candidate node a query rejects is a failure,
+so on wide queries failures vastly outnumber results,
+and keeping them all pins every dead instance and node in memory.
+
+    RecordFailures  : Keep everything (the default)
+    NoFailures      : Keep nothing
+    CountFailures   : Keep counts, in total and by query clause
+    RingFailures    : Keep the most recent `size` failures
+    SampledFailures : Keep a random `rate` of failures
+
+Set ContextSet.failure_policy to change the default for all context sets,
+or pass a policy to ContextSet.build.
+eg: ContextSet.failure_policy = partial(RingFailures, 100)
+"""
+import abc
+import logging as root_logger
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from random import Random
+from typing import Any, Iterable, Iterator, List, Optional
+
+from acab import types as AT
+from acab.core.util.identity import AcabId
+
+logging = root_logger.getLogger(__name__)
+
+CtxIns = AT.CtxIns
+Sen    = AT.Sentence
+Value  = AT.Value
+Node   = AT.Node
+
+
+@dataclass(frozen=True)
+class ContextFailState:
+    """
+    Utility dataclass for holding a ctx with information about where it failed
+    """
+    ctx       : CtxIns         = field()
+    query     : Sen            = field()
+    failed_on : Value          = field()
+    node      : Optional[Node] = field()
+
+
+@dataclass
+class FailureRecord_i(metaclass=abc.ABCMeta):
+    """ The failures of a context set.
+    len is the number of failures recorded, iteration is of those kept.
+    Fail states are only built if they will be kept.
+    """
+
+    count : int = field(init=False, default=0)
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return bool(self.count)
+
+    def __repr__(self):
+        return f"({self.__class__.__name__}: {self.count})"
+
+    def _keeps(self) -> bool:
+        return True
+
+    @abc.abstractmethod
+    def _store(self, state:ContextFailState):
+        pass
+
+    @abc.abstractmethod
+    def __iter__(self) -> Iterator[ContextFailState]:
+        pass
+
+    def fail(self, instance:CtxIns, query:Sen, word:Value, node:Optional[Node]):
+        self.count += 1
+        if self._keeps():
+            self._store(ContextFailState(instance, query, word, node))
+
+    def add(self, state:ContextFailState):
+        self.count += 1
+        if self._keeps():
+            self._store(state)
+
+    def merge(self, other:'FailureRecord_i'):
+        """ Add the failures of another record """
+        kept = list(other)
+        for state in kept:
+            self.add(state)
+
+        self.count += other.count - len(kept)
+
+    def discard(self, ids:Iterable[AcabId]):
+        """ Remove kept failures of particular instances """
+        pass
+
+
+@dataclass
+class RecordFailures(FailureRecord_i):
+    """ Keep every failure """
+
+    states : List[ContextFailState] = field(init=False, default_factory=list, repr=False)
+
+    def _store(self, state):
+        self.states.append(state)
+
+    def __iter__(self):
+        return iter(self.states)
+
+    def __getitem__(self, index):
+        return self.states[index]
+
+    def discard(self, ids):
+        ids         = set(ids)
+        remaining   = [x for x in self.states if x.ctx.id not in ids]
+        self.count -= len(self.states) - len(remaining)
+        self.states = remaining
+
+
+@dataclass
+class NoFailures(FailureRecord_i):
+    """ Keep nothing, not even a count """
+
+    def fail(self, instance, query, word, node):
+        pass
+
+    def add(self, state):
+        pass
+
+    def merge(self, other):
+        pass
+
+    def _store(self, state):
+        pass
+
+    def __iter__(self):
+        return iter([])
+
+
+@dataclass
+class CountFailures(FailureRecord_i):
+    """ Keep counts of failures, in total and by query clause """
+
+    by_query : Counter = field(init=False, default_factory=Counter)
+
+    def _keeps(self):
+        return False
+
+    def _store(self, state):
+        pass
+
+    def __iter__(self):
+        return iter([])
+
+    def fail(self, instance, query, word, node):
+        self.count += 1
+        self.by_query[query] += 1
+
+    def add(self, state):
+        self.count += 1
+        self.by_query[state.query] += 1
+
+    def merge(self, other):
+        if not isinstance(other, CountFailures):
+            super().merge(other)
+            return
+
+        self.count += other.count
+        self.by_query.update(other.by_query)
+
+
+@dataclass
+class RingFailures(RecordFailures):
+    """ Keep the most recent failures """
+
+    size   : int = field(default=100)
+
+    def __post_init__(self):
+        self.states = deque(maxlen=self.size)
+
+    def discard(self, ids):
+        super().discard(ids)
+        self.states = deque(self.states, maxlen=self.size)
+
+
+@dataclass
+class SampledFailures(RecordFailures):
+    """ Keep a random proportion of failures """
+
+    rate    : float         = field(default=0.01)
+    seed    : Optional[Any] = field(default=None)
+    _random : Random        = field(init=False, default=None, repr=False)
+
+    def __post_init__(self):
+        self._random = Random(self.seed)
+
+    def _keeps(self):
+        return self._random.random() < self.rate
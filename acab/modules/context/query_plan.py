@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Compiled query clauses, cached between queries.
+
+Running the constraint sieve over a clause's words is the same work
+every time a rule fires, so a clause is compiled once, for a set of operators,
+into a QueryPlan of its words' ConstraintCollections
+(their alpha/beta/etc groupings, with static operators resolved).
+
+The cache is a bounded LRU, keyed on the identities of the clause
+and the operator context instance.
+As rebinding an operator replaces the semantic system's operator cache,
+plans compiled against the old operators are never reused,
+and RebindOperator clears the cache to release them.
+"""
+import logging as root_logger
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from acab import types as AT
+from acab.core.config import GET
+from acab.modules.context.constraints import ConstraintCollection
+
+logging = root_logger.getLogger(__name__)
+config  = GET()
+
+NEGATION_S = config.prepare("Value.Structure", "NEGATION")()
+
+CtxIns   = AT.CtxIns
+Sentence = AT.Sentence
+
+CACHE_SIZE = 2 ** 10
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """ A query clause's negation and per-word constraint collections """
+
+    clause      : Sentence                   = field()
+    operators   : Optional[CtxIns]           = field(repr=False)
+    negated     : bool                       = field()
+    constraints : List[ConstraintCollection] = field(repr=False)
+
+    @staticmethod
+    def build(clause:Sentence, operators:Optional[CtxIns]=None) -> 'QueryPlan':
+        negated     = bool(clause.data.get(NEGATION_S, False))
+        constraints = [ConstraintCollection.build(x, operators=operators) for x in clause]
+        return QueryPlan(clause, operators, negated, constraints)
+
+
+@dataclass
+class QueryPlanCache:
+    """ A bounded LRU of compiled QueryPlans.
+    A size of 0 disables caching.
+    """
+
+    size    : int = field(default=CACHE_SIZE)
+    hits    : int = field(init=False, default=0)
+    misses  : int = field(init=False, default=0)
+
+    _plans  : OrderedDict = field(init=False, default_factory=OrderedDict, repr=False)
+
+    def __len__(self):
+        return len(self._plans)
+
+    def get(self, clause:Sentence, operators:Optional[CtxIns]=None) -> QueryPlan:
+        """ Get the plan of a clause, compiling it if necessary """
+        # The plan holds the clause and operators, so their ids can't be reused
+        key  = (id(clause), id(operators))
+        plan = self._plans.get(key, None)
+        if plan is not None:
+            self.hits += 1
+            self._plans.move_to_end(key)
+            return plan
+
+        self.misses += 1
+        plan = QueryPlan.build(clause, operators)
+        if self.size < 1:
+            return plan
+
+        self._plans[key] = plan
+        if self.size < len(self._plans):
+            self._plans.popitem(last=False)
+
+        return plan
+
+    def clear(self):
+        logging.debug(f"Clearing {len(self._plans)} Query Plans")
+        self._plans.clear()
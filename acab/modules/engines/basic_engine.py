@@ -67,6 +67,11 @@ class AcabBasicEngine(AcabEngine_i):
     def bindings(self):
         return self._cached_bindings
 
+    def fork(self) -> 'AcabBasicEngine':
+        forked = super().fork()
+        forked._cached_bindings = []
+        return forked
+
 
     @EnsureEngineInitialised
     def add_to_cache(self, result: CtxSet):
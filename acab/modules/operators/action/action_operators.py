@@ -15,6 +15,7 @@ from acab.core.decorators.semantic import (OperatorArgUnWrap,
                                                OperatorResultWrap,
                                                OperatorSugar)
 from acab.error.semantic_exception import AcabSemanticException
+from acab.modules.context.context_query_manager import ContextQueryManager
 
 logging = root_logger.getLogger(__name__)
 
@@ -77,3 +78,5 @@ class RebindOperator(ActionOperator):
             raise AcabSemanticException("Bad Target Specified for Operator Rebind", op)
         new_cache = cache.bind_dict({str(target) : operator})
         semSystem._operator_cache = new_cache
+        # Plans compiled against the old operators are now unreachable
+        ContextQueryManager.plans.clear()
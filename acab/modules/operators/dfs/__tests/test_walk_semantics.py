@@ -162,6 +162,25 @@ class TestWalkSemantics(unittest.TestCase):
         # check results
         self.assertEqual(len(result), 2)
 
+    def test_query_walk_from_root_indexed(self):
+        """
+        ᛦ $y(::target)?
+        """
+        self.eng("a.b.c.test.sub.blah(::target)")
+        self.eng("a.b.e.test.something(::target)")
+        self.eng("~a.b.c")
+
+        test_var   = AcabValue.safe_make("y", data={BIND: True,
+                                                    TYPE_INSTANCE: Sentence.build(["target"]),
+                                                    QUERY : True})
+        query_sen = Sentence.build([test_var], data={SEM_HINT: "_:WALK"})
+        query = ProductionContainer(value=[query_sen],
+                                    data={SEM_HINT : "_:QUERY"})
+
+        result = self.eng(query)
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0].y, "something")
+
     def test_query_walk_multi_patterns(self):
         """
         @x ᛦ $y(::target) $z(::other)?
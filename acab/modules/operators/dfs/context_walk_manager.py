@@ -117,14 +117,15 @@ class ContextWalkManager:
 
         for constraints in self.constraints:
             successes   = []
-            # Collect all nodes that pass tests
-            for node in possible:
-                try:
-                    constraints.test(node, self._current_inst)
+            # Collect all nodes that pass tests, testing them together
+            passed      = constraints.test_all(possible, self._current_inst)
+            for node, success in zip(possible, passed):
+                if success:
                     successes.append(node)
-                except ASErr.AcabSemanticTestFailure as err:
-                    logging.debug(f"Tests failed on {node.value}:\n\t{err}")
-                    self.ctxs.fail(self._current_inst, constraints.source, node, self.walk_spec)
+                    continue
+
+                logging.debug(f"Tests failed on {node.value}")
+                self.ctxs.fail(self._current_inst, constraints.source, node, self.walk_spec)
 
             # Handle successes
             # success, so copy and extend ctx instance
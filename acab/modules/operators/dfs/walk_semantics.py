@@ -8,13 +8,13 @@ from typing import cast, ClassVar, TypeVar, Generic
 from dataclasses import dataclass, field, InitVar
 
 import logging as root_logger
-from uuid import UUID
+from acab.core.util.identity import AcabId
 
 from acab import types as AT
 import acab.interfaces.semantic as SI
 import acab.error.semantic_exception as ASErr
 from acab.core.config.config import AcabConfig
-from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.acab_struct import BasicNodeStruct, NodeIndex, type_keys
 from acab.core.data.values import AcabStatement, Sentence
 from acab.modules.operators.dfs.context_walk_manager import ContextWalkManager
 
@@ -79,19 +79,45 @@ class WalkTrieSemantics(SI.AbstractionSemantics_i):
         nodesem: InDep        = default.func.lookup().func
 
         with ContextWalkManager(walk_spec, default.struct.root, ctxs) as cwm:
+            indexed = self._indexed(walk_spec, cwm, default.struct)
             for queue in cwm.active:
-                found      : Set[UUID]  = set()
+                if indexed is not None:
+                    cwm.test_and_update(indexed)
+                    continue
+
+                found      : Set[AcabId] = set()
 
                 while bool(queue):
                     current      = queue.pop(0)
-                    if current.uuid in found:
+                    if current.id in found:
                         continue
 
-                    found.add(current.uuid)
+                    found.add(current.id)
                     accessible   = nodesem.access(current, None, data)
                     queue       += accessible
                     cwm.test_and_update(accessible)
 
 
+    def _indexed(self, walk_spec, cwm, struct) -> Optional[List[Node]]:
+        """
+        Walking from the root reaches every node,
+        so when every walk constraint requires a type,
+        the candidates can come from the struct's type index instead.
+        Returns None if a full walk is needed.
+        """
+        if walk_spec[0].is_at_var or 'type_index' not in struct.components:
+            return None
+
+        index = struct.components['type_index']
+        keys  = [type_keys(x.source) for x in cwm.constraints]
+        if not all(keys) or any([x.source.type.has_var for x in cwm.constraints]):
+            return None
+
+        candidates = {}
+        for key in dict.fromkeys([y for x in keys for y in x]):
+            candidates.update({x.id: x for x in index.get(key, root=struct.root)})
+
+        return list(candidates.values())
+
     def _act(self, instruction, semsys, ctxs=None, data=None):
         pass
@@ -1,12 +1,15 @@
 """
 Definitions of initial Comparison operators
 """
+import operator
 import re
 
 from acab import types as AT
 from acab.core.data.production_abstractions import ProductionOperator
-from acab.core.decorators.semantic import OperatorArgUnWrap, OperatorResultWrap
-from acab.core.decorators.semantic import OperatorSugar
+from acab.core.decorators.semantic import (OperatorArgUnWrap,
+                                           OperatorBatchUnWrap,
+                                           OperatorResultWrap, OperatorSugar)
+from acab.core.util.vectorise import compare
 
 Value    = AT.Value
 Sentence = AT.Sentence
@@ -19,6 +22,10 @@ class EQ(ProductionOperator):
     def __call__(self, a, b, data=None):
         return a == b
 
+    @OperatorBatchUnWrap
+    def batch(self, values, b, data=None):
+        return compare(operator.eq, values, b)
+
 
 @OperatorSugar("!=")
 class NEQ(ProductionOperator):
@@ -27,6 +34,10 @@ class NEQ(ProductionOperator):
     def __call__(self, a, b, data=None):
         return a != b
 
+    @OperatorBatchUnWrap
+    def batch(self, values, b, data=None):
+        return compare(operator.ne, values, b)
+
 @OperatorSugar("~=")
 class RegMatch(ProductionOperator):
 
@@ -41,6 +52,11 @@ class RegMatch(ProductionOperator):
             result = True
         return result
 
+    @OperatorBatchUnWrap
+    def batch(self, values, b, data=None):
+        pattern = re.compile(b)
+        return [pattern.search(x) is not None for x in values]
+
 @OperatorSugar("∈")
 class ELEM(ProductionOperator):
 
@@ -0,0 +1,142 @@
+#!/opt/anaconda3/envs/acab/bin/python
+import logging
+import unittest
+from os.path import split, splitext
+
+import acab
+
+config = acab.setup()
+
+from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.production_abstractions import ProductionComponent
+from acab.core.data.values import AcabValue, Sentence
+from acab.error.semantic_exception import AcabSemanticException
+from acab.modules.context.context_set import ContextInstance, ContextSet
+from acab.modules.operators.query.query_operators import EQ
+from acab.modules.semantics.dependent import BreadthTrieSemantics
+from acab.modules.semantics.independent import BasicNodeSemantics
+from acab.modules.semantics.secondary_dependent import DepthTrieSemantics
+
+NEGATION_V   = config.prepare("Value.Structure", "NEGATION")()
+BIND_V       = config.prepare("Value.Structure", "BIND")()
+CONSTRAINT_V = config.prepare("Value.Structure", "CONSTRAINT")()
+
+
+def var_sen(words, *variables, negated=False):
+    sen = Sentence.build(words)
+    for index in variables:
+        sen[index].data[BIND_V] = True
+    if negated:
+        sen.data[NEGATION_V] = True
+
+    return sen
+
+def bindings(ctxs, *variables):
+    return [tuple([str(x.data[y]) for y in variables]) for x in ctxs]
+
+
+class DepthTrieSemanticTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        LOGLEVEL = logging.DEBUG
+        LOG_FILE_NAME = "log.{}".format(splitext(split(__file__)[1])[0])
+        logging.basicConfig(filename=LOG_FILE_NAME, level=LOGLEVEL, filemode='w')
+
+        console = logging.StreamHandler()
+        console.setLevel(logging.INFO)
+        logging.getLogger('').addHandler(console)
+
+    def setUp(self):
+        node_sem    = BasicNodeSemantics().as_handler("_:node")
+        self.dfs    = DepthTrieSemantics(default=node_sem)
+        self.bfs    = BreadthTrieSemantics(default=node_sem)
+        self.struct = BasicNodeStruct.build_default()
+        for x in ["a", "b", "c"]:
+            for y in ["d", "e", "f"]:
+                self.dfs.insert(Sentence.build(["tree", x, y, "leaf"]), self.struct)
+        self.dfs.insert(Sentence.build(["tree", "c", "g"]), self.struct)
+        self.dfs.insert(Sentence.build(["other", "a", "e"]), self.struct)
+
+    def run_both(self, *clauses, ops=None):
+        results = []
+        for sem in [self.bfs, self.dfs]:
+            ctxs = ContextSet.build(ops)
+            for clause in clauses:
+                sem.query(clause, self.struct, ctxs=ctxs)
+            results.append(ctxs)
+
+        return results
+
+    def test_insert_and_delete(self):
+        self.assertTrue(self.struct.root.get_child("tree").has_child("a"))
+        self.dfs.insert(var_sen(["tree", "a"], negated=True), self.struct)
+        self.assertFalse(self.struct.root.get_child("tree").has_child("a"))
+
+    def test_query_requires_ctxs(self):
+        with self.assertRaises(AcabSemanticException):
+            self.dfs.query(Sentence.build(["tree"]), self.struct)
+
+    def test_query_ground(self):
+        bfs, dfs = self.run_both(Sentence.build(["tree", "a", "d", "leaf"]))
+        self.assertEqual(len(dfs), 1)
+        bfs, dfs = self.run_both(Sentence.build(["tree", "a", "g"]))
+        self.assertEqual(len(dfs), 0)
+        self.assertTrue(bool(dfs._failed))
+
+    def test_query_vars_match_bfs(self):
+        query    = var_sen(["tree", "x", "y", "leaf"], 1, 2)
+        bfs, dfs = self.run_both(query)
+        self.assertEqual(len(dfs), 9)
+        self.assertEqual(sorted(bindings(dfs.active_list(), "x", "y")),
+                         sorted(bindings(bfs.active_list(), "x", "y")))
+
+    def test_query_depth_first_order(self):
+        _, dfs = self.run_both(var_sen(["tree", "x", "y"], 1, 2))
+        found  = bindings(dfs.active_list(), "x", "y")
+        self.assertEqual(found[:3], [("a", "d"), ("a", "e"), ("a", "f")])
+        self.assertEqual(found[-1], ("c", "g"))
+
+    def test_query_only_keeps_results(self):
+        bfs, dfs = self.run_both(var_sen(["tree", "x", "y", "leaf"], 1, 2))
+        # The initial context, and the results
+        self.assertEqual(len(dfs._total), 1 + 9)
+        self.assertLess(len(dfs._total), len(bfs._total))
+
+    def test_query_join(self):
+        bfs, dfs = self.run_both(var_sen(["other", "x", "y"], 1, 2),
+                                 var_sen(["tree", "x", "y", "leaf"], 1, 2))
+        self.assertEqual(bindings(dfs.active_list(), "x", "y"), [("a", "e")])
+        self.assertEqual(bindings(bfs.active_list(), "x", "y"), [("a", "e")])
+
+    def test_query_negated(self):
+        bfs, dfs = self.run_both(var_sen(["tree", "x"], 1),
+                                 var_sen(["tree", "x", "g"], 1, negated=True))
+        self.assertEqual(sorted(bindings(dfs.active_list(), "x")), [("a",), ("b",)])
+        self.assertEqual(sorted(bindings(bfs.active_list(), "x")),
+                         sorted(bindings(dfs.active_list(), "x")))
+
+    def test_query_constraints(self):
+        op_loc_path = Sentence.build(["EQ"])
+        ops         = ContextInstance(data={str(op_loc_path): EQ()})
+        query       = var_sen(["tree", "x", "y"], 1, 2)
+        query[-1].data[CONSTRAINT_V] = [ProductionComponent("alpha", op_loc_path,
+                                                            [AcabValue.safe_make("e")])]
+        bfs, dfs = self.run_both(query, ops=ops)
+        self.assertEqual(bindings(dfs.active_list(), "x"), [("a",), ("b",), ("c",)])
+        self.assertEqual(sorted(bindings(bfs.active_list(), "x")),
+                         bindings(dfs.active_list(), "x"))
+
+    def test_query_deep_and_wide(self):
+        struct = BasicNodeStruct.build_default()
+        words  = [str(x) for x in range(6)]
+        sens   = [Sentence.build(["root", x, y, z]) for x in words for y in words for z in words]
+        self.dfs.insert_many(sens, struct)
+        ctxs   = ContextSet.build()
+        self.dfs.query(var_sen(["root", "x", "y", "z"], 1, 2, 3), struct, ctxs=ctxs)
+        self.assertEqual(len(ctxs), 6 ** 3)
+        self.assertEqual(len(ctxs._total), 1 + 6 ** 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
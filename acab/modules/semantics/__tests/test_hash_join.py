@@ -0,0 +1,234 @@
+#!/opt/anaconda3/envs/acab/bin/python
+import logging
+import unittest
+from os.path import split, splitext
+from unittest import mock
+
+import acab
+
+config = acab.setup()
+
+import acab.modules.semantics.abstractions as ASem
+from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.production_abstractions import (ProductionComponent,
+                                                    ProductionContainer)
+from acab.core.data.values import AcabValue, Sentence
+from acab.modules.context import context_delayed_actions
+from acab.modules.context.context_set import ContextInstance, ContextSet
+from acab.modules.operators.query.query_operators import EQ
+from acab.modules.semantics.basic_system import BasicSemanticSystem
+from acab.modules.semantics.dependent import BreadthTrieSemantics
+from acab.modules.semantics.hash_join import HashJoin
+from acab.modules.semantics.independent import BasicNodeSemantics
+from acab.modules.semantics.query_planner import QueryPlanner
+
+NEGATION_V      = config.prepare("Value.Structure", "NEGATION")()
+BIND_V          = config.prepare("Value.Structure", "BIND")()
+AT_BIND_V       = config.prepare("Value.Structure", "AT_BIND")()
+CONSTRAINT_V    = config.prepare("Value.Structure", "CONSTRAINT")()
+SEMANTIC_HINT_V = config.prepare("Value.Structure", "SEMANTIC_HINT")()
+
+QUERY_SEM_HINT  = Sentence.build([config.prepare("SEMANTICS", "QUERY")()])
+
+
+def var_sen(words, *variables, negated=False):
+    sen = Sentence.build(words)
+    for index in variables:
+        sen[index].data[BIND_V] = True
+    if negated:
+        sen.data[NEGATION_V] = True
+
+    return sen
+
+def bindings(ctxs, *variables):
+    return sorted([tuple([str(x.data[y]) for y in variables]) for x in ctxs])
+
+
+class HashJoinTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        LOGLEVEL = logging.DEBUG
+        LOG_FILE_NAME = "log.{}".format(splitext(split(__file__)[1])[0])
+        logging.basicConfig(filename=LOG_FILE_NAME, level=LOGLEVEL, filemode='w')
+
+        console = logging.StreamHandler()
+        console.setLevel(logging.INFO)
+        logging.getLogger('').addHandler(console)
+
+    def setUp(self):
+        node_sem      = BasicNodeSemantics().as_handler("_:node")
+        self.trie     = BreadthTrieSemantics(default=node_sem)
+        self.struct   = BasicNodeStruct.build_default()
+        trie_sem      = self.trie.as_handler("_:trie", struct=self.struct)
+        # Joins regardless of estimates, to compare with running in sequence
+        self.joined   = ASem.QueryAbstraction(joiner=HashJoin(min_rows=0))
+        self.sequence = ASem.QueryAbstraction(joiner=None)
+        self.semSys   = BasicSemanticSystem(init_handlers=[node_sem, trie_sem],
+                                            default=trie_sem)
+        for x in range(10):
+            self.trie.insert(Sentence.build(["a", f"item_{x}", "b"]), self.struct)
+        for x in range(0, 10, 3):
+            self.trie.insert(Sentence.build(["c", f"item_{x}", "d", f"val_{x}"]), self.struct)
+        self.trie.insert(Sentence.build(["blocked", "item_3"]), self.struct)
+
+    def run_both(self, *clauses, ops=None):
+        query   = ProductionContainer("query", list(clauses))
+        results = []
+        for sem in [self.joined, self.sequence]:
+            ctxs = ContextSet.build(ops)
+            sem(query, self.semSys, ctxs=ctxs)
+            results.append(ctxs)
+
+        return results
+
+    def test_groups(self):
+        first  = var_sen(["a", "x", "b"], 1)
+        second = var_sen(["c", "x", "d", "y"], 1, 3)
+        other  = var_sen(["e", "z"], 1)
+        groups = HashJoin().groups([first, other, second], ContextSet.build())
+        self.assertEqual(len(groups), 1)
+        self.assertEqual([id(x) for x in groups[0]], [id(first), id(second)])
+
+    def test_groups_skip_dependent_clauses(self):
+        first   = var_sen(["a", "x", "b"], 1)
+        negated = var_sen(["blocked", "x"], 1, negated=True)
+        at_bind = var_sen(["x", "b"])
+        at_bind[0].data[BIND_V] = AT_BIND_V
+        self.assertFalse(HashJoin().groups([first, negated, at_bind], ContextSet.build()))
+
+    def test_groups_skip_bound_variables(self):
+        ctxs = ContextSet.build()
+        ctxs.push(ctxs.pop().bind_dict({"x": AcabValue.safe_make("item_0")}))
+        self.assertFalse(HashJoin().groups([var_sen(["a", "x", "b"], 1),
+                                            var_sen(["c", "x", "d"], 1)], ctxs))
+
+    def test_join(self):
+        joined, sequence = self.run_both(var_sen(["a", "x", "b"], 1),
+                                         var_sen(["c", "x", "d", "y"], 1, 3))
+        self.assertEqual(bindings(joined.active_list(), "x", "y"),
+                         [("item_0", "val_0"), ("item_3", "val_3"),
+                          ("item_6", "val_6"), ("item_9", "val_9")])
+        self.assertEqual(bindings(joined.active_list(), "x", "y"),
+                         bindings(sequence.active_list(), "x", "y"))
+
+    def test_join_walks_each_clause_once(self):
+        query = ProductionContainer("query", [var_sen(["a", "x", "b"], 1),
+                                              var_sen(["c", "x", "d", "y"], 1, 3)])
+        for sem, walks in [(self.joined, 2), (self.sequence, 2)]:
+            with mock.patch.object(self.trie, "query", wraps=self.trie.query) as query_mock:
+                sem(query, self.semSys, ctxs=ContextSet.build())
+                self.assertEqual(query_mock.call_count, walks)
+
+        # The joined clauses start from a single empty context each
+        ctxs = ContextSet.build()
+        self.joined(query, self.semSys, ctxs=ctxs)
+        self.assertLess(len(ctxs._total), 10)
+
+    def test_join_nodes_bound(self):
+        joined, _ = self.run_both(var_sen(["a", "x", "b"], 1),
+                                  var_sen(["c", "x", "d", "y"], 1, 3))
+        for ctx in joined.active_list():
+            self.assertEqual(ctx.nodes["y"].value, ctx.data["y"])
+
+    def test_join_current_node(self):
+        joined, sequence = self.run_both(var_sen(["a", "x", "b"], 1),
+                                         var_sen(["c", "x", "d", "y"], 1, 3))
+        currents = [sorted([(str(x.data["x"]), id(x._current)) for x in ctxs.active_list()])
+                    for ctxs in [joined, sequence]]
+        self.assertEqual(currents[0], currents[1])
+
+    def test_join_then_negation(self):
+        joined, sequence = self.run_both(var_sen(["a", "x", "b"], 1),
+                                         var_sen(["c", "x", "d", "y"], 1, 3),
+                                         var_sen(["blocked", "x"], 1, negated=True))
+        self.assertEqual(bindings(joined.active_list(), "x"),
+                         [("item_0",), ("item_6",), ("item_9",)])
+        self.assertEqual(bindings(joined.active_list(), "x"),
+                         bindings(sequence.active_list(), "x"))
+
+    def test_join_then_at_binding(self):
+        # The at-binding runs after the join, from the same nodes as in sequence
+        at_bind = var_sen(["x", "b"])
+        at_bind[0].data[BIND_V] = AT_BIND_V
+        joined, sequence = self.run_both(var_sen(["a", "x", "b"], 1),
+                                         var_sen(["c", "x", "d", "y"], 1, 3),
+                                         at_bind)
+        self.assertEqual(len(joined), len(sequence))
+        self.assertEqual(bindings(joined.active_list(), "x", "y"),
+                         bindings(sequence.active_list(), "x", "y"))
+
+    def test_join_empty(self):
+        joined, sequence = self.run_both(var_sen(["a", "x", "b"], 1),
+                                         var_sen(["c", "x", "e"], 1))
+        self.assertEqual(len(joined), 0)
+        self.assertEqual(len(sequence), 0)
+        self.assertTrue(bool(joined._failed))
+
+    def test_join_with_alpha_constraint(self):
+        op_loc_path = Sentence.build(["EQ"])
+        ops         = ContextInstance(data={str(op_loc_path): EQ()})
+        constrained = var_sen(["c", "x", "d", "y"], 1, 3)
+        constrained[-1].data[CONSTRAINT_V] = [ProductionComponent("alpha", op_loc_path,
+                                                                  [AcabValue.safe_make("val_6")])]
+        joined, sequence = self.run_both(var_sen(["a", "x", "b"], 1), constrained, ops=ops)
+        self.assertEqual(bindings(joined.active_list(), "x"), [("item_6",)])
+        self.assertEqual(bindings(sequence.active_list(), "x"), [("item_6",)])
+
+    def test_small_estimates_run_in_sequence(self):
+        clauses = [var_sen(["a", "x", "b"], 1), var_sen(["c", "x", "d", "y"], 1, 3)]
+        groups  = HashJoin().groups(clauses, ContextSet.build())
+        self.assertEqual(len(groups), 1)
+        self.assertFalse(HashJoin().worthwhile(groups, self.struct, QueryPlanner()))
+
+        query = ProductionContainer("query", clauses)
+        ctxs  = ContextSet.build()
+        with mock.patch.object(HashJoin, "join_group") as join_mock:
+            ASem.QueryAbstraction()(query, self.semSys, ctxs=ctxs)
+            join_mock.assert_not_called()
+        self.assertEqual(len(ctxs), 4)
+
+    def test_large_estimates_join(self):
+        for x in range(10, 40):
+            self.trie.insert(Sentence.build(["a", f"item_{x}", "b"]), self.struct)
+            self.trie.insert(Sentence.build(["c", f"item_{x}", "d", f"val_{x}"]), self.struct)
+
+        clauses = [var_sen(["a", "x", "b"], 1), var_sen(["c", "x", "d", "y"], 1, 3)]
+        query   = ProductionContainer("query", clauses)
+        ctxs    = ContextSet.build()
+        with mock.patch.object(HashJoin, "join_group", autospec=True, side_effect=HashJoin.join_group) as join_mock:
+            ASem.QueryAbstraction()(query, self.semSys, ctxs=ctxs)
+            join_mock.assert_called_once()
+
+        sequence = ContextSet.build()
+        self.sequence(query, self.semSys, ctxs=sequence)
+        self.assertEqual(len(ctxs), 34)
+        self.assertEqual(bindings(ctxs.active_list(), "x", "y"),
+                         bindings(sequence.active_list(), "x", "y"))
+
+    def test_groups_cut_at_small_clause(self):
+        for x in range(10, 40):
+            self.trie.insert(Sentence.build(["a", f"item_{x}", "b"]), self.struct)
+            self.trie.insert(Sentence.build(["c", f"item_{x}", "d", f"val_{x}"]), self.struct)
+
+        clauses = [var_sen(["a", "x", "b"], 1),
+                   var_sen(["c", "x", "d", "y"], 1, 3),
+                   var_sen(["blocked", "x"], 1)]
+        groups  = HashJoin().groups(clauses, ContextSet.build())
+        kept    = HashJoin().worthwhile(groups, self.struct, QueryPlanner())
+        self.assertEqual([[id(y) for y in x] for x in kept], [[id(clauses[0]), id(clauses[1])]])
+
+    def test_join_extends_incoming(self):
+        ctxs = ContextSet.build()
+        ctxs.pop()
+        ctxs.push([ContextInstance(data={"z": AcabValue.safe_make("first")}),
+                   ContextInstance(data={"z": AcabValue.safe_make("second")})])
+        query = ProductionContainer("query", [var_sen(["a", "x", "b"], 1),
+                                              var_sen(["c", "x", "d", "y"], 1, 3)])
+        self.joined(query, self.semSys, ctxs=ctxs)
+        self.assertEqual(len(ctxs), 8)
+        self.assertEqual(len(bindings(ctxs.active_list(), "z", "x")), 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
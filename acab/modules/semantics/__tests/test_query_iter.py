@@ -0,0 +1,130 @@
+#!/opt/anaconda3/envs/acab/bin/python
+import logging
+import unittest
+from os.path import split, splitext
+
+import acab
+
+config = acab.setup()
+
+from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.production_abstractions import ProductionContainer
+from acab.core.data.triple_store import TripleStore
+from acab.core.data.values import Sentence
+from acab.modules.context import context_delayed_actions
+from acab.modules.context.context_set import ContextSet
+from acab.modules.semantics.basic_system import BasicSemanticSystem
+from acab.modules.semantics.dependent import BreadthTrieSemantics
+from acab.modules.semantics.independent import BasicNodeSemantics
+from acab.modules.semantics.secondary_dependent import (DepthTrieSemantics,
+                                                        TripleStoreSemantics)
+
+NEGATION_V      = config.prepare("Value.Structure", "NEGATION")()
+BIND_V          = config.prepare("Value.Structure", "BIND")()
+QUERY_V         = config.prepare("Value.Structure", "QUERY")()
+SEMANTIC_HINT_V = config.prepare("Value.Structure", "SEMANTIC_HINT")()
+
+
+def var_sen(words, *variables, negated=False):
+    sen = Sentence.build(words)
+    for index in variables:
+        sen[index].data[BIND_V] = True
+    if negated:
+        sen.data[NEGATION_V] = True
+    sen[-1].data[QUERY_V] = True
+
+    return sen
+
+def bindings(ctxs, *variables):
+    return sorted([tuple([str(x.data[y]) for y in variables]) for x in ctxs])
+
+
+class QueryIterTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        LOGLEVEL = logging.DEBUG
+        LOG_FILE_NAME = "log.{}".format(splitext(split(__file__)[1])[0])
+        logging.basicConfig(filename=LOG_FILE_NAME, level=LOGLEVEL, filemode='w')
+
+        console = logging.StreamHandler()
+        console.setLevel(logging.INFO)
+        logging.getLogger('').addHandler(console)
+
+    def setUp(self):
+        node_sem       = BasicNodeSemantics().as_handler("_:node")
+        self.trie_sem  = BreadthTrieSemantics(default=node_sem).as_handler("_:trie",
+                                                                          struct=BasicNodeStruct.build_default())
+        self.semSys    = BasicSemanticSystem(init_handlers=[node_sem, self.trie_sem],
+                                             default=self.trie_sem)
+        for x in ["a", "b", "c"]:
+            for y in ["d", "e", "f"]:
+                self.semSys(Sentence.build(["tree", x, y]))
+        self.semSys(Sentence.build(["busy", "b"]))
+
+    def test_query_iter(self):
+        result = list(self.semSys.query_iter(var_sen(["tree", "x", "y"], 1, 2)))
+        self.assertEqual(len(result), 9)
+
+    def test_query_iter_limit(self):
+        ctxs   = ContextSet.build()
+        result = list(self.semSys.query_iter(var_sen(["tree", "x", "y"], 1, 2), ctxs=ctxs, limit=2))
+        self.assertEqual(len(result), 2)
+        # Nothing is added to the context set
+        self.assertEqual(len(ctxs._total), 1)
+
+    def test_query_iter_is_lazy(self):
+        results = self.semSys.query_iter(var_sen(["tree", "x", "y"], 1, 2))
+        first   = next(results)
+        self.assertIn("x", first)
+        self.assertEqual(len(list(results)), 8)
+
+    def test_exists(self):
+        self.assertTrue(self.semSys.exists(var_sen(["tree", "x", "e"], 1)))
+        self.assertFalse(self.semSys.exists(var_sen(["tree", "x", "g"], 1)))
+
+    def test_query_iter_container(self):
+        query  = ProductionContainer("query", [var_sen(["tree", "x", "y"], 1, 2),
+                                               var_sen(["busy", "x"], 1, negated=True)])
+        result = self.semSys.query_iter(query)
+        self.assertEqual(len(bindings(result, "x", "y")), 6)
+        self.assertFalse(self.semSys.exists(ProductionContainer("query",
+                                                                [var_sen(["busy", "x"], 1),
+                                                                 var_sen(["tree", "x", "g"], 1)])))
+
+    def test_query_iter_matches_query(self):
+        query  = ProductionContainer("query", [var_sen(["tree", "x", "y"], 1, 2),
+                                               var_sen(["busy", "x"], 1, negated=True)])
+        ctxs   = ContextSet.build()
+        for clause in query.clauses:
+            self.trie_sem.func.query(clause, self.trie_sem.struct, ctxs=ctxs)
+        self.assertEqual(bindings(self.semSys.query_iter(query), "x", "y"),
+                         bindings(ctxs.active_list(), "x", "y"))
+
+    def test_query_iter_without_iter_query(self):
+        node_sem   = BasicNodeSemantics().as_handler("_:node")
+        triple_sem = TripleStoreSemantics(default=node_sem).as_handler("_:triples",
+                                                                       struct=TripleStore.build_default())
+        semSys     = BasicSemanticSystem(init_handlers=[node_sem, triple_sem],
+                                         default=triple_sem)
+        semSys(Sentence.build(["alice", "likes", "bob"]),
+               Sentence.build(["carol", "likes", "bob"]))
+        result = semSys.query_iter(var_sen(["x", "likes", "bob"], 0), limit=1)
+        self.assertEqual(len(list(result)), 1)
+        self.assertTrue(semSys.exists(var_sen(["x", "likes", "y"], 0, 2)))
+
+    def test_negated_query_resolves_by_existence(self):
+        node_sem = BasicNodeSemantics().as_handler("_:node")
+        struct   = BasicNodeStruct.build_default()
+        for sem in [BreadthTrieSemantics(default=node_sem), DepthTrieSemantics(default=node_sem)]:
+            for sen in [["agent", "bob"], ["agent", "jill"], ["busy", "jill", "now"]]:
+                sem.insert(Sentence.build(sen), struct)
+            ctxs = ContextSet.build()
+            sem.query(var_sen(["agent", "x"], 1), struct, ctxs=ctxs)
+            sem.query(var_sen(["busy", "x", "now"], 1, negated=True), struct, ctxs=ctxs)
+            self.assertEqual(bindings(ctxs.active_list(), "x"), [("bob",)])
+            self.assertEqual(len(ctxs._failed), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+#!/opt/anaconda3/envs/acab/bin/python
+import logging
+import unittest
+from os.path import split, splitext
+
+import acab
+
+config = acab.setup()
+
+from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.production_abstractions import ProductionComponent
+from acab.core.data.values import AcabValue, Sentence
+from acab.modules.context.context_set import ContextInstance, ContextSet
+from acab.modules.operators.query.query_operators import EQ
+from acab.modules.semantics.dependent import BreadthTrieSemantics
+from acab.modules.semantics.independent import BasicNodeSemantics
+from acab.modules.semantics.query_planner import ClauseInfo, QueryPlanner
+
+NEGATION_V   = config.prepare("Value.Structure", "NEGATION")()
+BIND_V       = config.prepare("Value.Structure", "BIND")()
+AT_BIND_V    = config.prepare("Value.Structure", "AT_BIND")()
+CONSTRAINT_V = config.prepare("Value.Structure", "CONSTRAINT")()
+
+
+def var_sen(words, **binds):
+    sen = Sentence.build(words)
+    for index, bind in binds.items():
+        sen[int(index[1:])].data[BIND_V] = bind
+
+    return sen
+
+
+class QueryPlannerTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        LOGLEVEL = logging.DEBUG
+        LOG_FILE_NAME = "log.{}".format(splitext(split(__file__)[1])[0])
+        logging.basicConfig(filename=LOG_FILE_NAME, level=LOGLEVEL, filemode='w')
+
+        console = logging.StreamHandler()
+        console.setLevel(logging.INFO)
+        logging.getLogger('').addHandler(console)
+
+    def setUp(self):
+        node_sem         = BasicNodeSemantics().as_handler("_:node")
+        self.trie_sem    = BreadthTrieSemantics(default=node_sem)
+        self.trie_struct = BasicNodeStruct.build_default()
+        for x in range(20):
+            self.trie_sem.insert(Sentence.build(["many", f"item_{x}", "value"]), self.trie_struct)
+        self.trie_sem.insert(Sentence.build(["few", "item_3"]), self.trie_struct)
+
+    def run_query(self, clauses, ctxs=None):
+        ctxs = ctxs or ContextSet.build()
+        for clause in clauses:
+            self.trie_sem.query(clause, self.trie_struct, ctxs=ctxs)
+
+        return sorted([str(x.data['x']) for x in ctxs.active_list()])
+
+    def test_clause_info_binds(self):
+        clause = var_sen(["many", "x", "value"], _1=True)
+        info   = ClauseInfo.build(0, clause)
+        self.assertEqual(info.binds, {"x"})
+        self.assertFalse(info.requires)
+
+    def test_clause_info_at_bind(self):
+        clause = var_sen(["x", "value"], _0=AT_BIND_V)
+        info   = ClauseInfo.build(0, clause)
+        self.assertFalse(info.binds)
+        self.assertEqual(info.requires, {"x"})
+
+    def test_clause_info_negated(self):
+        clause = var_sen(["few", "x"], _1=True)
+        clause.data[NEGATION_V] = True
+        info   = ClauseInfo.build(0, clause)
+        self.assertTrue(info.negated)
+        self.assertFalse(info.binds)
+        self.assertEqual(info.requires, {"x"})
+
+    def test_estimate_selectivity(self):
+        planner   = QueryPlanner()
+        broad     = ClauseInfo.build(0, var_sen(["many", "x", "value"], _1=True))
+        selective = ClauseInfo.build(1, var_sen(["few", "x"], _1=True))
+        missing   = ClauseInfo.build(2, var_sen(["none", "x"], _1=True))
+        self.assertEqual(planner.estimate(broad, self.trie_struct, set()), 20)
+        self.assertEqual(planner.estimate(selective, self.trie_struct, set()), 1)
+        self.assertEqual(planner.estimate(missing, self.trie_struct, set()), 0)
+
+    def test_plan_selective_first(self):
+        broad     = var_sen(["many", "x", "value"], _1=True)
+        selective = var_sen(["few", "x"], _1=True)
+        planned   = QueryPlanner().plan([broad, selective], self.trie_struct)
+        self.assertIs(planned[0], selective)
+        self.assertIs(planned[1], broad)
+
+    def test_plan_same_results(self):
+        broad     = var_sen(["many", "x", "value"], _1=True)
+        selective = var_sen(["few", "x"], _1=True)
+        planned   = QueryPlanner().plan([broad, selective], self.trie_struct)
+        self.assertEqual(self.run_query([broad, selective]), ["item_3"])
+        self.assertEqual(self.run_query(planned), ["item_3"])
+
+    def test_plan_single_clause(self):
+        clauses = [var_sen(["many", "x", "value"], _1=True)]
+        self.assertIs(QueryPlanner().plan(clauses, self.trie_struct), clauses)
+
+    def test_plan_ties_keep_order(self):
+        first   = var_sen(["few", "x"], _1=True)
+        second  = var_sen(["few", "y"], _1=True)
+        planned = QueryPlanner().plan([first, second], self.trie_struct)
+        self.assertIs(planned[0], first)
+        self.assertIs(planned[1], second)
+
+    def test_plan_negation_waits_for_binding(self):
+        negated   = var_sen(["few", "x"], _1=True)
+        negated.data[NEGATION_V] = True
+        broad     = var_sen(["many", "x", "value"], _1=True)
+        planned   = QueryPlanner().plan([broad, negated], self.trie_struct)
+        self.assertIs(planned[0], broad)
+        self.assertIs(planned[1], negated)
+
+    def test_plan_at_bind_waits_for_binding(self):
+        at_clause = var_sen(["x", "value"], _0=AT_BIND_V)
+        broad     = var_sen(["many", "x"], _1=True)
+        planned   = QueryPlanner().plan([at_clause, broad], self.trie_struct)
+        self.assertIs(planned[0], broad)
+        self.assertIs(planned[1], at_clause)
+
+    def test_plan_constraint_waits_for_binding(self):
+        op_loc_path = Sentence.build(["EQ"])
+        ctxs        = ContextSet.build(ContextInstance(data={str(op_loc_path): EQ()}))
+        broad       = var_sen(["many", "x", "value"], _1=True)
+        constrained = var_sen(["few", "y"], _1=True)
+        constrained[-1].data[CONSTRAINT_V] = [ProductionComponent("beta test",
+                                                                  op_loc_path,
+                                                                  [AcabValue.safe_make("x", data={BIND_V: True})])]
+
+        planned = QueryPlanner().plan([constrained, broad], self.trie_struct)
+        self.assertIs(planned[0], broad)
+        self.assertIs(planned[1], constrained)
+
+        for clause in planned:
+            self.trie_sem.query(clause, self.trie_struct, ctxs=ctxs)
+
+        self.assertEqual(len(ctxs), 1)
+        self.assertEqual(ctxs.pop().data['x'].name, "item_3")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,257 @@
+#!/opt/anaconda3/envs/acab/bin/python
+import logging
+import unittest
+from os.path import split, splitext
+from unittest import mock
+
+import acab
+
+config = acab.setup()
+
+from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.production_abstractions import (ProductionComponent,
+                                                    ProductionContainer)
+from acab.core.data.values import AcabValue, Sentence
+from acab.error.semantic_exception import AcabSemanticException
+from acab.modules.context.context_set import ContextInstance, ContextSet
+from acab.modules.operators.query.query_operators import EQ
+from acab.modules.semantics.independent import (BasicNodeSemantics,
+                                                ExclusionNodeSemantics)
+from acab.modules.semantics.rete_network import ReteRule
+from acab.modules.semantics.secondary_dependent import ReteSemantics
+
+EXOP         = config.prepare("MODAL", "exop")()
+EXOP_enum    = config.prepare(EXOP, as_enum=True)()
+
+NEGATION_V   = config.prepare("Value.Structure", "NEGATION")()
+BIND_V       = config.prepare("Value.Structure", "BIND")()
+AT_BIND_V    = config.prepare("Value.Structure", "AT_BIND")()
+CONSTRAINT_V = config.prepare("Value.Structure", "CONSTRAINT")()
+
+
+def var_sen(words, *variables, negated=False):
+    sen = Sentence.build(words)
+    for index in variables:
+        sen[index].data[BIND_V] = True
+    if negated:
+        sen.data[NEGATION_V] = True
+
+    return sen
+
+def bindings(ctxs, *variables):
+    return sorted([tuple([str(x.data[y]) for y in variables]) for x in ctxs])
+
+
+class ReteSemanticTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        LOGLEVEL = logging.DEBUG
+        LOG_FILE_NAME = "log.{}".format(splitext(split(__file__)[1])[0])
+        logging.basicConfig(filename=LOG_FILE_NAME, level=LOGLEVEL, filemode='w')
+
+        console = logging.StreamHandler()
+        console.setLevel(logging.INFO)
+        logging.getLogger('').addHandler(console)
+
+    def setUp(self):
+        node_sem    = ExclusionNodeSemantics().as_handler("_:node")
+        self.sem    = ReteSemantics(default=node_sem)
+        self.struct = BasicNodeStruct.build_default()
+
+    def insert(self, *words, negated=False):
+        sen = Sentence.build(words)
+        if negated:
+            sen.data[NEGATION_V] = True
+        self.sem.insert(sen, self.struct)
+
+    def query(self, clauses):
+        ctxs = ContextSet.build()
+        for clause in clauses:
+            self.sem.query(clause, self.struct, ctxs=ctxs)
+
+        return ctxs.active_list()
+
+    def test_initial_matches(self):
+        self.insert("a", "b", "c")
+        self.insert("a", "b", "d")
+        rule = self.sem.add_rule([var_sen(["a", "b", "x"], 2)], self.struct, name="rule")
+        result = self.sem.tick(self.struct)
+        self.assertIn("rule", result)
+        added, retracted = result["rule"]
+        self.assertEqual(bindings(added, "x"), [("c",), ("d",)])
+        self.assertFalse(retracted)
+        self.assertFalse(self.sem.tick(self.struct))
+
+    def test_incremental_insert(self):
+        self.insert("a", "b", "c")
+        self.sem.add_rule([var_sen(["a", "b", "x"], 2)], self.struct, name="rule")
+        self.sem.tick(self.struct)
+        self.insert("a", "b", "d")
+        self.insert("a", "c", "e")
+        added, retracted = self.sem.tick(self.struct)["rule"]
+        self.assertEqual(bindings(added, "x"), [("d",)])
+        self.assertFalse(retracted)
+
+    def test_retraction(self):
+        self.insert("a", "b", "c")
+        self.insert("a", "b", "d")
+        self.sem.add_rule([var_sen(["a", "b", "x"], 2)], self.struct, name="rule")
+        self.sem.tick(self.struct)
+        self.insert("a", "b", "c", negated=True)
+        added, retracted = self.sem.tick(self.struct)["rule"]
+        self.assertFalse(added)
+        self.assertEqual(bindings(retracted, "x"), [("c",)])
+        # Removing a prefix retracts everything below it
+        self.insert("a", negated=True)
+        added, retracted = self.sem.tick(self.struct)["rule"]
+        self.assertEqual(bindings(retracted, "x"), [("d",)])
+
+    def test_added_then_retracted_cancels(self):
+        self.sem.add_rule([var_sen(["a", "x"], 1)], self.struct, name="rule")
+        self.insert("a", "b")
+        self.insert("a", "b", negated=True)
+        self.assertFalse(self.sem.tick(self.struct))
+
+    def test_join(self):
+        clauses = [var_sen(["parent", "x", "y"], 1, 2),
+                   var_sen(["parent", "y", "z"], 1, 2)]
+        self.insert("parent", "a", "b")
+        self.sem.add_rule(clauses, self.struct, name="grandparent")
+        self.assertFalse(self.sem.tick(self.struct))
+        self.insert("parent", "b", "c")
+        added, _ = self.sem.tick(self.struct)["grandparent"]
+        self.assertEqual(bindings(added, "x", "z"), [("a", "c")])
+        self.insert("parent", "a", "b", negated=True)
+        _, retracted = self.sem.tick(self.struct)["grandparent"]
+        self.assertEqual(bindings(retracted, "x", "z"), [("a", "c")])
+
+    def test_negation(self):
+        clauses = [var_sen(["agent", "x"], 1),
+                   var_sen(["busy", "x"], 1, negated=True)]
+        self.insert("agent", "bob")
+        self.insert("agent", "jill")
+        self.insert("busy", "jill")
+        self.sem.add_rule(clauses, self.struct, name="idle")
+        added, _ = self.sem.tick(self.struct)["idle"]
+        self.assertEqual(bindings(added, "x"), [("bob",)])
+
+        self.insert("busy", "bob")
+        _, retracted = self.sem.tick(self.struct)["idle"]
+        self.assertEqual(bindings(retracted, "x"), [("bob",)])
+
+        self.insert("busy", "jill", negated=True)
+        added, _ = self.sem.tick(self.struct)["idle"]
+        self.assertEqual(bindings(added, "x"), [("jill",)])
+
+    def test_exclusion_retracts(self):
+        self.sem.add_rule([var_sen(["light", "x"], 1)], self.struct, name="rule")
+        sen = Sentence.build(["light", "red"])
+        sen[0].data[EXOP] = EXOP_enum.EX
+        self.sem.insert(sen, self.struct)
+        self.sem.tick(self.struct)
+        sen = Sentence.build(["light", "green"])
+        sen[0].data[EXOP] = EXOP_enum.EX
+        self.sem.insert(sen, self.struct)
+        added, retracted = self.sem.tick(self.struct)["rule"]
+        self.assertEqual(bindings(added, "x"), [("green",)])
+        self.assertEqual(bindings(retracted, "x"), [("red",)])
+
+    def test_alpha_and_beta_tests(self):
+        op_loc_path = Sentence.build(["EQ"])
+        ctxs        = ContextSet.build(ContextInstance(data={str(op_loc_path): EQ()}))
+        alpha_sen   = var_sen(["a", "x"], 1)
+        alpha_sen[-1].data[CONSTRAINT_V] = [ProductionComponent("alpha", op_loc_path,
+                                                                [AcabValue.safe_make("c")])]
+        beta_sen    = var_sen(["b", "y"], 1)
+        beta_sen[-1].data[CONSTRAINT_V]  = [ProductionComponent("beta", op_loc_path,
+                                                                [AcabValue.safe_make("x", data={BIND_V: True})])]
+        self.insert("a", "c")
+        self.insert("a", "d")
+        self.insert("b", "d")
+        self.sem.add_rule([alpha_sen, beta_sen], self.struct, ctxs=ctxs, name="rule")
+        self.assertFalse(self.sem.tick(self.struct))
+        self.insert("b", "c")
+        added, _ = self.sem.tick(self.struct)["rule"]
+        self.assertEqual(bindings(added, "x", "y"), [("c", "c")])
+
+    def test_matches_full_query(self):
+        clauses = [var_sen(["edge", "x", "y"], 1, 2),
+                   var_sen(["edge", "y", "z"], 1, 2),
+                   var_sen(["blocked", "z"], 1, negated=True)]
+        rule = self.sem.add_rule(clauses, self.struct, name="paths")
+        for x, y in [("a", "b"), ("b", "c"), ("c", "d"), ("b", "d"), ("d", "a")]:
+            self.insert("edge", x, y)
+        self.insert("blocked", "d")
+        self.insert("edge", "c", "d", negated=True)
+        self.insert("blocked", "d", negated=True)
+        self.insert("blocked", "a")
+
+        expected = bindings(self.query(clauses), "x", "y", "z")
+        self.assertTrue(bool(expected))
+        self.assertEqual(bindings(rule.matches, "x", "y", "z"), expected)
+
+    def test_shared_alpha_memory(self):
+        clause  = var_sen(["a", "x"], 1)
+        first   = self.sem.add_rule([clause], self.struct, name="first")
+        second  = self.sem.add_rule([var_sen(["a", "x"], 1)], self.struct, name="second")
+        self.assertIs(first.alphas[0], second.alphas[0])
+        self.sem.remove_rule("first", self.struct)
+        self.insert("a", "b")
+        result = self.sem.tick(self.struct)
+        self.assertNotIn("first", result)
+        self.assertIn("second", result)
+
+    def test_exop_alpha_memory(self):
+        exclusive = var_sen(["y", "b", "x"], 0, 2)
+        exclusive[1].data[EXOP] = EXOP_enum.EX
+        self.insert("a", "b", "c")
+        ex_rule   = self.sem.add_rule([exclusive], self.struct, name="exclusive")
+        dot_rule  = self.sem.add_rule([var_sen(["y", "b", "x"], 0, 2)], self.struct, name="dot")
+        self.assertIsNot(ex_rule.alphas[0], dot_rule.alphas[0])
+        self.assertFalse(ex_rule.matches)
+        self.assertEqual(bindings(dot_rule.matches, "y", "x"), [("a", "c")])
+
+        sen = Sentence.build(["e", "b", "f"])
+        sen[1].data[EXOP] = EXOP_enum.EX
+        self.sem.insert(sen, self.struct)
+        self.assertEqual(bindings(ex_rule.matches, "y", "x"), [("e", "f")])
+        self.assertEqual(bindings(dot_rule.matches, "y", "x"), [("a", "c"), ("e", "f")])
+
+    def test_join_is_hashed(self):
+        clauses = [var_sen(["parent", "x", "y"], 1, 2),
+                   var_sen(["parent", "y", "z"], 1, 2)]
+        for x in range(20):
+            self.insert("parent", f"p_{x}", f"p_{x + 1}")
+
+        with mock.patch.object(ReteRule, "join", autospec=True, side_effect=ReteRule.join) as join:
+            rule = self.sem.add_rule(clauses, self.struct, name="grandparent")
+            self.assertEqual(len(rule.matches), 19)
+            # The first clause's 20 wmes, then the single candidate of each token with one
+            self.assertEqual(join.call_count, 39)
+            join.reset_mock()
+
+            self.insert("parent", "p_21", "p_22")
+            self.insert("parent", "p_20", "p_21")
+            self.assertEqual(len(rule.matches), 21)
+            self.assertLess(join.call_count, 10)
+
+        self.insert("parent", "p_5", "p_6", negated=True)
+        self.assertEqual(bindings(rule.matches, "x", "z"),
+                         bindings(self.query(clauses), "x", "z"))
+
+    def test_rule_from_container(self):
+        query = ProductionContainer("query", [var_sen(["a", "x"], 1)])
+        self.insert("a", "b")
+        rule  = self.sem.add_rule(query, self.struct)
+        self.assertEqual(bindings(rule.matches, "x"), [("b",)])
+
+    def test_at_binding_rejected(self):
+        clause = Sentence.build(["x", "y"])
+        clause[0].data[BIND_V] = AT_BIND_V
+        with self.assertRaises(AcabSemanticException):
+            self.sem.add_rule([clause], self.struct, name="rule")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 #!/opt/anaconda3/envs/acab/bin/python
 import sys
 import unittest
+from unittest import mock
 from os.path import abspath, expanduser
 
 sys.path.append(abspath(expanduser("~/github/acab")))
@@ -16,11 +17,14 @@ from acab.core.data.production_abstractions import (ProductionComponent,
 from acab.core.data.values import Sentence
 from acab.interfaces.handler_system import Handler
 from acab.interfaces.semantic import (AbstractionSemantics_i,
+                                               DependentSemantics_i,
                                                SemanticSystem_i)
 from acab.error.acab_exception import AcabException
+from acab.error.semantic_exception import AcabSemanticException
 from acab.modules.semantics.basic_system import BasicSemanticSystem
 from acab.modules.context.context_set import ContextInstance, ContextSet
 from acab.modules.semantics.independent import ExclusionNodeSemantics
+from acab.modules.semantics.default import DEFAULT_SEMANTICS
 
 EXOP         = config.prepare("MODAL", "exop")()
 EXOP_enum    = config.prepare(EXOP, as_enum=True)()
@@ -63,6 +67,73 @@ class SemanticSystemTests(unittest.TestCase):
 
         self.assertEqual(cm.exception.detail, "TestAbsSem called")
 
+    def test_call_batches_insertions(self):
+        semsys = DEFAULT_SEMANTICS()
+        trie   = semsys.default.func
+        sens   = [Sentence.build(["a", "b", x]) for x in ["c", "d", "e"]]
+        query  = Sentence.build(["a", "b", "c"])
+        query[-1].data[QUERY_V] = True
+
+        calls = []
+        original = trie.insert_many
+        def wrapped(sentences, struct, **kwargs):
+            calls.append(len(sentences))
+            return original(sentences, struct, **kwargs)
+
+        trie.insert_many = wrapped
+        result = semsys(*sens, query, sens[0])
+
+        self.assertEqual(calls, [3, 1])
+        self.assertEqual(len(result), 1)
+        self.assertTrue("e" in semsys.default.struct.root.get_child("a").get_child("b"))
+
+    def test_batch_continues_past_failure(self):
+        semsys = DEFAULT_SEMANTICS()
+        trie   = semsys.default.func
+        sens   = [Sentence.build(["a", x, "c"]) for x in ["first", "bad", "last"]]
+        original = trie._insert_word
+        def failing(current, word, *args):
+            if word == "bad":
+                raise AcabSemanticException("Bad Word", word)
+            return original(current, word, *args)
+
+        with mock.patch.object(trie, "_insert_word", side_effect=failing):
+            semsys(*sens)
+
+        inserted = semsys.default.struct.root.get_child("a")
+        self.assertTrue("first" in inserted)
+        self.assertTrue("last" in inserted)
+        self.assertFalse("bad" in inserted)
+
+    def test_default_insert_many_continues_past_failure(self):
+        semsys = DEFAULT_SEMANTICS()
+        trie   = semsys.default.func
+        sens   = [Sentence.build([x]) for x in ["first", "bad", "last"]]
+        original = trie.insert
+        def failing(sen, *args, **kwargs):
+            if sen == sens[1]:
+                raise AcabSemanticException("Bad Sentence", sen)
+            return original(sen, *args, **kwargs)
+
+        with mock.patch.object(trie, "insert", side_effect=failing):
+            DependentSemantics_i.insert_many(trie, sens, semsys.default.struct)
+
+        self.assertTrue("first" in semsys.default.struct.root)
+        self.assertTrue("last" in semsys.default.struct.root)
+
+    def test_fork(self):
+        semsys = DEFAULT_SEMANTICS()
+        semsys(Sentence.build(["a", "b"]))
+        forked = semsys.fork()
+
+        self.assertIs(forked.default.func, semsys.default.func)
+        self.assertIsNot(forked.default.struct, semsys.default.struct)
+        self.assertIs(forked.sieve, semsys.sieve)
+
+        forked(Sentence.build(["a", "c"]))
+        self.assertTrue("c" in forked.default.struct.root.get_child("a"))
+        self.assertFalse("c" in semsys.default.struct.root.get_child("a"))
+
     def test_retrieval(self):
         # put some semantics in semsys.mapping
         semsys = BasicSemanticSystem(default=SemanticSystemTests.StubAbsSemantic().as_handler("_:stub"))
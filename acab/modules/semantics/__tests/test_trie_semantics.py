@@ -12,7 +12,7 @@ import acab
 
 config = acab.setup()
 
-from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.acab_struct import BasicNodeStruct, CompactNodeStruct
 from acab.core.data.node import AcabNode
 from acab.core.data.production_abstractions import ProductionComponent
 from acab.core.data.values import AcabValue, Sentence
@@ -22,6 +22,8 @@ from acab.modules.context.context_set import (ConstraintCollection,
                                               ContextInstance, ContextSet)
 from acab.modules.semantics.dependent import BreadthTrieSemantics
 from acab.modules.semantics.independent import (BasicNodeSemantics,
+                                                CompactExclusionSemantics,
+                                                CompactNodeSemantics,
                                                 ExclusionNodeSemantics)
 
 EXOP         = config.prepare("MODAL", "exop")()
@@ -30,6 +32,7 @@ EXOP_enum    = config.prepare(EXOP, as_enum=True)()
 NEGATION_V   = config.prepare("Value.Structure", "NEGATION")()
 BIND_V       = config.prepare("Value.Structure", "BIND")()
 CONSTRAINT_V = config.prepare("Value.Structure", "CONSTRAINT")()
+TYPE_INSTANCE = config.prepare("Value.Structure", "TYPE_INSTANCE")()
 
 class TrieSemanticTests(unittest.TestCase):
     def test_trie_insert_basic(self):
@@ -42,8 +45,8 @@ class TrieSemanticTests(unittest.TestCase):
         trie_sem.insert(sen, trie_struct)
         # check nodes are in
         self.assertTrue("a" in trie_struct.root)
-        self.assertTrue("test" in trie_struct.root.children["a"])
-        self.assertTrue("sentence" in trie_struct.root.children["a"].children["test"])
+        self.assertTrue("test" in trie_struct.root.get_child("a"))
+        self.assertTrue("sentence" in trie_struct.root.get_child("a").get_child("test"))
 
     def test_trie_insert_non_exclusion(self):
         node_sem = BasicNodeSemantics().as_handler("_:node")
@@ -57,9 +60,9 @@ class TrieSemanticTests(unittest.TestCase):
         trie_sem.insert(sen2, trie_struct)
         # check nodes are in
         self.assertTrue("a" in trie_struct.root)
-        self.assertTrue("test" in trie_struct.root.children["a"])
-        self.assertTrue("sentence" in trie_struct.root.children["a"].children["test"])
-        self.assertTrue("other" in trie_struct.root.children["a"].children["test"])
+        self.assertTrue("test" in trie_struct.root.get_child("a"))
+        self.assertTrue("sentence" in trie_struct.root.get_child("a").get_child("test"))
+        self.assertTrue("other" in trie_struct.root.get_child("a").get_child("test"))
 
     def test_trie_insert_exclusion(self):
         node_sem    = ExclusionNodeSemantics().as_handler("_:node")
@@ -75,9 +78,9 @@ class TrieSemanticTests(unittest.TestCase):
         trie_sem.insert(sen2, trie_struct)
         # check nodes are in
         self.assertTrue("a" in trie_struct.root)
-        self.assertTrue("test" in trie_struct.root.children["a"])
-        self.assertFalse("sentence" in trie_struct.root.children["a"].children["test"])
-        self.assertTrue("other" in trie_struct.root.children["a"].children["test"])
+        self.assertTrue("test" in trie_struct.root.get_child("a"))
+        self.assertFalse("sentence" in trie_struct.root.get_child("a").get_child("test"))
+        self.assertTrue("other" in trie_struct.root.get_child("a").get_child("test"))
 
 
     def test_trie_remove_basic(self):
@@ -94,13 +97,13 @@ class TrieSemanticTests(unittest.TestCase):
         trie_sem.insert(sen, trie_struct)
         # check nodes are in
         self.assertTrue("a" in trie_struct.root)
-        self.assertTrue("test" in trie_struct.root.children["a"])
-        self.assertTrue("sentence" in trie_struct.root.children["a"].children["test"])
+        self.assertTrue("test" in trie_struct.root.get_child("a"))
+        self.assertTrue("sentence" in trie_struct.root.get_child("a").get_child("test"))
         # remove
         trie_sem.insert(neg_sen, trie_struct)
         # verify
         self.assertTrue("a" in trie_struct.root)
-        self.assertFalse("test" in trie_struct.root.children["a"])
+        self.assertFalse("test" in trie_struct.root.get_child("a"))
 
 
     def test_trie_query_exact(self):
@@ -378,7 +381,238 @@ class TrieSemanticTests(unittest.TestCase):
         self.assertIsInstance(results[0][-1], Sentence)
 
 
+    def test_trie_insert_indexes(self):
+        node_sem    = BasicNodeSemantics().as_handler("_:node")
+        trie_sem    = BreadthTrieSemantics(default=node_sem)
+        trie_struct = BasicNodeStruct.build_default()
+        sen = Sentence.build(["a", "test", "sentence"])
+        sen[-1].data[TYPE_INSTANCE] = Sentence.build(["a_type"])
+        trie_sem.insert(sen, trie_struct)
+        self.assertEqual(trie_struct.components['word_index'].count(sen[1].key), 1)
+        self.assertEqual(trie_struct.components['type_index'].count(str(sen[-1].type)), 1)
+        # Removal cleans up the removed subtree
+        neg_sen = Sentence.build(["a", "test"])
+        neg_sen.data[NEGATION_V] = True
+        trie_sem.insert(neg_sen, trie_struct)
+        self.assertEqual(trie_struct.components['word_index'].count(sen[1].key), 0)
+        self.assertEqual(trie_struct.components['type_index'].count(str(sen[-1].type)), 0)
+
+    def test_trie_query_leading_var_indexed(self):
+        node_sem    = BasicNodeSemantics().as_handler("_:node")
+        trie_sem    = BreadthTrieSemantics(default=node_sem)
+        trie_struct = BasicNodeStruct.build_default()
+        for x in range(10):
+            trie_sem.insert(Sentence.build([f"first_{x}", "other"]), trie_struct)
+        trie_sem.insert(Sentence.build(["a", "test", "sentence"]), trie_struct)
+        trie_sem.insert(Sentence.build(["b", "test", "other"]), trie_struct)
+
+        query_sen = Sentence.build(["x", "test"])
+        query_sen[0].data[BIND_V] = True
+        roots = trie_sem._indexed_roots(query_sen, trie_struct)
+        self.assertEqual([x.name for x in roots], ["a", "b"])
+
+        ctx_set = ContextSet.build()
+        trie_sem.query(query_sen, trie_struct, ctxs=ctx_set)
+        self.assertEqual(len(ctx_set), 2)
+        self.assertEqual(ctx_set[0].data['x'].name, 'a')
+        self.assertEqual(ctx_set[1].data['x'].name, 'b')
+
+    def test_trie_query_leading_var_unindexed(self):
+        node_sem    = BasicNodeSemantics().as_handler("_:node")
+        trie_sem    = BreadthTrieSemantics(default=node_sem)
+        trie_struct = BasicNodeStruct.build_default()
+        trie_sem.insert(Sentence.build(["a", "test"]), trie_struct)
+        trie_sem.insert(Sentence.build(["b", "test"]), trie_struct)
+        query_sen = Sentence.build(["x", "test"])
+        query_sen[0].data[BIND_V] = True
+        # The index is no better than scanning the root:
+        self.assertIsNone(trie_sem._indexed_roots(query_sen, trie_struct))
+
+    def test_trie_insert_many(self):
+        node_sem    = BasicNodeSemantics().as_handler("_:node")
+        trie_sem    = BreadthTrieSemantics(default=node_sem)
+        trie_struct = BasicNodeStruct.build_default()
+        neg_sen     = Sentence.build(["a", "test", "blah"])
+        neg_sen.data[NEGATION_V] = True
+        sens = [Sentence.build(["a", "test", "blah"]),
+                Sentence.build(["a", "test", "other"]),
+                neg_sen,
+                Sentence.build(["a", "test", "another"]),
+                Sentence.build(["b", "something"])]
+
+        trie_sem.insert_many(sens, trie_struct)
+        test_node = trie_struct.root.get_child("a").get_child("test")
+        self.assertFalse("blah" in test_node)
+        self.assertTrue("other" in test_node)
+        self.assertTrue("another" in test_node)
+        self.assertTrue("something" in trie_struct.root.get_child("b"))
+        self.assertEqual(len(trie_struct), 6)
+
+    def test_trie_insert_many_exclusion_order(self):
+        node_sem    = ExclusionNodeSemantics().as_handler("_:node")
+        trie_sem    = BreadthTrieSemantics(default=node_sem)
+        trie_struct = BasicNodeStruct.build_default()
+        sens = [Sentence.build(["a", "test", x]) for x in ["first", "second", "first"]]
+        for sen in sens:
+            sen[1].data[EXOP] = EXOP_enum.EX
+
+        trie_sem.insert_many(sens, trie_struct)
+        test_node = trie_struct.root.get_child("a").get_child("test")
+        self.assertEqual([x.name for x in test_node], ["first"])
+
+    def test_trie_iter_sentences(self):
+        node_sem    = BasicNodeSemantics().as_handler("_:node")
+        trie_sem    = BreadthTrieSemantics(default=node_sem)
+        trie_struct = BasicNodeStruct.build_default()
+        trie_sem.insert(Sentence.build(["a", "test", "sentence"]), trie_struct)
+        trie_sem.insert(Sentence.build(["a", "test", "other"]), trie_struct)
+        trie_sem.insert(Sentence.build(["b"]), trie_struct)
+
+        results = trie_sem.iter_sentences(trie_struct)
+        self.assertNotIsInstance(results, list)
+        self.assertEqual(str(next(results)), str(Sentence.build(["b"])))
+        self.assertEqual([str(x) for x in results],
+                         [str(Sentence.build(["a", "test", "sentence"])),
+                          str(Sentence.build(["a", "test", "other"]))])
+
+    def test_trie_to_sentences_empty(self):
+        node_sem    = BasicNodeSemantics().as_handler("_:node")
+        trie_sem    = BreadthTrieSemantics(default=node_sem)
+        trie_struct = BasicNodeStruct.build_default()
+        self.assertEqual(trie_sem.to_sentences(trie_struct), [])
+
+    def test_trie_fork_insert(self):
+        node_sem    = ExclusionNodeSemantics().as_handler("_:node")
+        trie_sem    = BreadthTrieSemantics(default=node_sem)
+        trie_struct = BasicNodeStruct.build_default()
+        trie_sem.insert(Sentence.build(["a", "test", "sentence"]), trie_struct)
+
+        forked = trie_struct.fork()
+        self.assertIs(forked.root, trie_struct.root)
+        trie_sem.insert(Sentence.build(["a", "test", "other"]), forked)
+        trie_sem.insert(Sentence.build(["a", "second"]), trie_struct)
+
+        self.assertTrue("other" in forked.root.get_child("a").get_child("test"))
+        self.assertFalse("other" in trie_struct.root.get_child("a").get_child("test"))
+        self.assertTrue("second" in trie_struct.root.get_child("a"))
+        self.assertFalse("second" in forked.root.get_child("a"))
+        # Untouched subtrees are still shared
+        self.assertIs(forked.root.get_child("a").get_child("test").get_child("sentence"),
+                      trie_struct.root.get_child("a").get_child("test").get_child("sentence"))
+
+    def test_trie_fork_exclusion_and_remove(self):
+        node_sem    = ExclusionNodeSemantics().as_handler("_:node")
+        trie_sem    = BreadthTrieSemantics(default=node_sem)
+        trie_struct = BasicNodeStruct.build_default()
+        sen = Sentence.build(["a", "test", "sentence"])
+        sen[1].data[EXOP] = EXOP_enum.EX
+        trie_sem.insert(sen, trie_struct)
+        trie_sem.insert(Sentence.build(["b", "c"]), trie_struct)
+
+        forked = trie_struct.fork()
+        replacement = Sentence.build(["a", "test", "other"])
+        replacement[1].data[EXOP] = EXOP_enum.EX
+        trie_sem.insert(replacement, forked)
+        neg_sen = Sentence.build(["b", "c"])
+        neg_sen.data[NEGATION_V] = True
+        trie_sem.insert(neg_sen, forked)
+
+        self.assertEqual(sorted([str(x) for x in trie_sem.to_sentences(forked)]),
+                         ["_:a.test.other", "_:b"])
+        self.assertEqual(sorted([str(x) for x in trie_sem.to_sentences(trie_struct)]),
+                         ["_:a.test.sentence", "_:b.c"])
+
+    def test_trie_fork_indexed_query(self):
+        node_sem    = BasicNodeSemantics().as_handler("_:node")
+        trie_sem    = BreadthTrieSemantics(default=node_sem)
+        trie_struct = BasicNodeStruct.build_default()
+        trie_sem.insert(Sentence.build(["a", "test"]), trie_struct)
+        trie_sem.insert(Sentence.build(["b", "test"]), trie_struct)
+
+        forked = trie_struct.fork()
+        trie_sem.insert(Sentence.build(["c", "other"]), trie_struct)
+        trie_sem.insert(Sentence.build(["d", "test"]), forked)
+        trie_sem.insert(Sentence.build(["a", "test", "more"]), forked)
+        trie_sem.insert(Sentence.build(["e", "other"]), trie_struct)
+
+        query_sen = Sentence.build(["x", "test"])
+        query_sen[0].data[BIND_V] = True
+        for struct, expected in [(trie_struct, ["a", "b"]), (forked, ["a", "b", "d"])]:
+            ctx_set = ContextSet.build()
+            trie_sem.query(query_sen, struct, ctxs=ctx_set)
+            self.assertEqual(sorted([str(x.data["x"]) for x in ctx_set.active_list()]), expected)
+
+        # The original's index still finds its nodes through their parents
+        self.assertEqual(len(trie_struct.components['word_index'].get(AcabValue("test").key,
+                                                                      trie_struct.root)), 2)
+
+class CompactTrieSemanticTests(unittest.TestCase):
+    """ BreadthTrieSemantics over a CompactNodeStruct """
+
+    def test_compact_insert_basic(self):
+        node_sem    = CompactNodeSemantics().as_handler("_:node")
+        trie_sem    = BreadthTrieSemantics(default=node_sem)
+        trie_struct = CompactNodeStruct.build_default()
+        self.assertTrue(trie_sem.compatible(trie_struct))
+        sen = Sentence.build(["a", "test", "sentence"])
+        trie_sem.insert(sen, trie_struct)
+        self.assertEqual(len(trie_struct), 3)
+        self.assertTrue("a" in trie_struct.root)
+        self.assertTrue("test" in trie_struct.root.get_child("a"))
+        self.assertTrue("sentence" in trie_struct.root.get_child("a").get_child("test"))
+
+    def test_compact_insert_exclusion(self):
+        node_sem    = CompactExclusionSemantics().as_handler("_:node")
+        trie_sem    = BreadthTrieSemantics(default=node_sem)
+        trie_struct = CompactNodeStruct.build_default()
+        sen  = Sentence.build(["a", "test", "sentence"])
+        sen2 = Sentence.build(["a", "test", "other"])
+        sen[1].data[EXOP] = EXOP_enum.EX
+        trie_sem.insert(sen, trie_struct)
+        trie_sem.insert(sen2, trie_struct)
+        test_node = trie_struct.root.get_child("a").get_child("test")
+        self.assertFalse("sentence" in test_node)
+        self.assertTrue("other" in test_node)
+        self.assertEqual(len(trie_struct), 3)
+
+    def test_compact_remove(self):
+        node_sem    = CompactNodeSemantics().as_handler("_:node")
+        trie_sem    = BreadthTrieSemantics(default=node_sem)
+        trie_struct = CompactNodeStruct.build_default()
+        sen         = Sentence.build(["a", "test", "sentence"])
+        neg_sen     = Sentence.build(["a", "test"])
+        neg_sen.data[NEGATION_V] = True
+        trie_sem.insert(sen, trie_struct)
+        trie_sem.insert(neg_sen, trie_struct)
+        self.assertTrue("a" in trie_struct.root)
+        self.assertFalse("test" in trie_struct.root.get_child("a"))
+        self.assertEqual(len(trie_struct), 1)
+
+    def test_compact_query_var(self):
+        node_sem    = CompactNodeSemantics().as_handler("_:node")
+        trie_sem    = BreadthTrieSemantics(default=node_sem)
+        trie_struct = CompactNodeStruct.build_default()
+        trie_sem.insert(Sentence.build(["a", "test", "sentence"]), trie_struct)
+        trie_sem.insert(Sentence.build(["a", "test", "other"]), trie_struct)
+        ctx_set   = ContextSet.build()
+        query_sen = Sentence.build(["a", "test", "x"])
+        query_sen[-1].data[BIND_V] = True
+        trie_sem.query(query_sen, trie_struct, ctxs=ctx_set)
+        self.assertEqual(len(ctx_set), 2)
+        self.assertEqual(ctx_set[0].data['x'].name, 'sentence')
+        self.assertEqual(ctx_set[1].data['x'].name, 'other')
 
+    def test_compact_to_sentences(self):
+        node_sem    = CompactNodeSemantics().as_handler("_:node")
+        trie_sem    = BreadthTrieSemantics(default=node_sem)
+        trie_struct = CompactNodeStruct.build_default()
+        trie_sem.insert(Sentence.build(["a", "test", "sentence"]), trie_struct)
+        trie_sem.insert(Sentence.build(["a", "other"]), trie_struct)
+        results = trie_sem.to_sentences(trie_struct)
+        self.assertEqual(len(results), 2)
+        self.assertEqual([str(x) for x in results],
+                         [str(Sentence.build(["a", "other"])),
+                          str(Sentence.build(["a", "test", "sentence"]))])
 
 
 
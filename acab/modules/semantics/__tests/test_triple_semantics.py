@@ -0,0 +1,175 @@
+#!/opt/anaconda3/envs/acab/bin/python
+import logging
+import unittest
+from os.path import split, splitext
+
+import acab
+
+config = acab.setup()
+
+from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.production_abstractions import ProductionComponent
+from acab.core.data.triple_store import TripleStore
+from acab.core.data.values import AcabValue, Sentence
+from acab.error.semantic_exception import AcabSemanticException
+from acab.modules.context import context_delayed_actions
+from acab.modules.context.context_set import ContextInstance, ContextSet
+from acab.modules.operators.query.query_operators import EQ
+from acab.modules.semantics.basic_system import BasicSemanticSystem
+from acab.modules.semantics.dependent import BreadthTrieSemantics
+from acab.modules.semantics.independent import BasicNodeSemantics
+from acab.modules.semantics.secondary_dependent import TripleStoreSemantics
+
+NEGATION_V      = config.prepare("Value.Structure", "NEGATION")()
+BIND_V          = config.prepare("Value.Structure", "BIND")()
+CONSTRAINT_V    = config.prepare("Value.Structure", "CONSTRAINT")()
+QUERY_V         = config.prepare("Value.Structure", "QUERY")()
+SEMANTIC_HINT_V = config.prepare("Value.Structure", "SEMANTIC_HINT")()
+
+
+def var_sen(words, *variables, negated=False):
+    sen = Sentence.build(words)
+    for index in variables:
+        sen[index].data[BIND_V] = True
+    if negated:
+        sen.data[NEGATION_V] = True
+
+    return sen
+
+def bindings(ctxs, *variables):
+    return sorted([tuple([str(x.data[y]) for y in variables]) for x in ctxs])
+
+
+class TripleSemanticTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        LOGLEVEL = logging.DEBUG
+        LOG_FILE_NAME = "log.{}".format(splitext(split(__file__)[1])[0])
+        logging.basicConfig(filename=LOG_FILE_NAME, level=LOGLEVEL, filemode='w')
+
+        console = logging.StreamHandler()
+        console.setLevel(logging.INFO)
+        logging.getLogger('').addHandler(console)
+
+    def setUp(self):
+        node_sem    = BasicNodeSemantics().as_handler("_:node")
+        self.sem    = TripleStoreSemantics(default=node_sem)
+        self.struct = TripleStore.build_default()
+        for triple in [("alice", "likes", "bob"),
+                       ("carol", "likes", "bob"),
+                       ("bob", "likes", "alice"),
+                       ("alice", "knows", "carol"),
+                       ("carol", "hates", "alice")]:
+            self.sem.insert(Sentence.build(triple), self.struct)
+
+    def query(self, *clauses, ctxs=None):
+        ctxs = ctxs or ContextSet.build()
+        for clause in clauses:
+            self.sem.query(clause, self.struct, ctxs=ctxs)
+
+        return ctxs.active_list()
+
+    def test_insert(self):
+        self.assertEqual(len(self.struct), 5)
+        self.assertTrue(self.struct)
+        self.sem.insert(Sentence.build(["alice", "likes", "bob"]), self.struct)
+        self.assertEqual(len(self.struct), 5)
+
+    def test_insert_wrong_length(self):
+        with self.assertRaises(AcabSemanticException):
+            self.sem.insert(Sentence.build(["a", "b"]), self.struct)
+
+    def test_match_indexes(self):
+        key = lambda x: Sentence.build([x])[0].key
+        likes, bob, alice = key("likes"), key("bob"), key("alice")
+        self.assertEqual(len(list(self.struct.match(p=likes, o=bob))), 2)
+        self.assertEqual(len(list(self.struct.match(o=alice))), 2)
+        self.assertEqual(len(list(self.struct.match(s=alice, o=bob))), 1)
+        self.assertEqual(len(list(self.struct.match(s=alice))), 2)
+        self.assertEqual(len(list(self.struct.match())), 5)
+
+    def test_query_subject_var(self):
+        result = self.query(var_sen(["x", "likes", "bob"], 0))
+        self.assertEqual(bindings(result, "x"), [("alice",), ("carol",)])
+
+    def test_query_predicate_var(self):
+        result = self.query(var_sen(["carol", "y", "alice"], 1))
+        self.assertEqual(bindings(result, "y"), [("hates",)])
+
+    def test_query_all_vars(self):
+        result = self.query(var_sen(["x", "y", "z"], 0, 1, 2))
+        self.assertEqual(len(result), 5)
+
+    def test_query_ground(self):
+        self.assertEqual(len(self.query(Sentence.build(["bob", "likes", "alice"]))), 1)
+        self.assertEqual(len(self.query(Sentence.build(["bob", "likes", "carol"]))), 0)
+
+    def test_query_prefix(self):
+        result = self.query(var_sen(["x", "likes"], 0))
+        self.assertEqual(bindings(result, "x"), [("alice",), ("bob",), ("carol",)])
+
+    def test_query_join(self):
+        result = self.query(var_sen(["x", "likes", "y"], 0, 2),
+                            var_sen(["y", "likes", "x"], 0, 2))
+        self.assertEqual(bindings(result, "x", "y"), [("alice", "bob"), ("bob", "alice")])
+
+    def test_query_negated(self):
+        result = self.query(var_sen(["x", "likes", "bob"], 0),
+                            var_sen(["x", "knows", "carol"], 0, negated=True))
+        self.assertEqual(bindings(result, "x"), [("carol",)])
+
+    def test_query_constraint(self):
+        op_loc_path = Sentence.build(["EQ"])
+        ctxs        = ContextSet.build(ContextInstance(data={str(op_loc_path): EQ()}))
+        query       = var_sen(["x", "likes", "y"], 0, 2)
+        query[0].data[CONSTRAINT_V] = [ProductionComponent("alpha", op_loc_path,
+                                                           [AcabValue.safe_make("carol")])]
+        result = self.query(query, ctxs=ctxs)
+        self.assertEqual(bindings(result, "y"), [("bob",)])
+
+    def test_delete(self):
+        self.sem.insert(var_sen(["alice", "likes", "bob"], negated=True), self.struct)
+        self.assertEqual(len(self.struct), 4)
+        self.assertEqual(bindings(self.query(var_sen(["x", "likes", "bob"], 0)), "x"), [("carol",)])
+
+    def test_delete_prefix(self):
+        self.sem.insert(var_sen(["alice"], negated=True), self.struct)
+        self.assertEqual(len(self.struct), 3)
+        self.assertFalse(self.struct.root.has_child("alice"))
+        self.assertEqual(len(self.query(var_sen(["x", "y", "z"], 0, 1, 2))), 3)
+
+    def test_delete_prunes(self):
+        self.sem.insert(var_sen(["carol", "hates", "alice"], negated=True), self.struct)
+        carol = self.struct.root.get_child("carol")
+        self.assertFalse(carol.has_child("hates"))
+        self.assertEqual(len(list(self.struct.match(p=Sentence.build(["hates"])[0].key))), 0)
+
+    def test_to_sentences(self):
+        sens = sorted([str(x) for x in self.sem.to_sentences(self.struct)])
+        self.assertEqual(len(sens), 5)
+        self.assertIn("_:alice.likes.bob", sens)
+
+    def test_handler_sieve(self):
+        node_sem   = BasicNodeSemantics().as_handler("_:node")
+        triple_sem = TripleStoreSemantics(default=node_sem).as_handler("_:triples",
+                                                                       struct=TripleStore.build_default())
+        trie_sem   = BreadthTrieSemantics(default=node_sem).as_handler("_:trie",
+                                                                   struct=BasicNodeStruct.build_default())
+        semSys     = BasicSemanticSystem(init_handlers=[node_sem, triple_sem, trie_sem],
+                                         default=trie_sem)
+        hint = Sentence.build(["triples"])
+        sen  = Sentence.build(["alice", "likes", "bob"], data={SEMANTIC_HINT_V: hint})
+        semSys(sen)
+        self.assertEqual(len(triple_sem.struct), 1)
+        self.assertFalse(trie_sem.struct.root.children)
+
+        query = var_sen(["x", "likes", "bob"], 0)
+        query.data[SEMANTIC_HINT_V] = hint
+        query[-1].data[QUERY_V] = True
+        result = semSys(query)
+        self.assertEqual(bindings(result.active_list(), "x"), [("alice",)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@
 # https://mypy.readthedocs.io/en/stable/cheat_sheet_py3.html
 import logging as root_logger
 from collections import defaultdict
+from dataclasses import dataclass, field
 from typing import (Any, Callable, ClassVar, Dict, Generic, Iterable, Iterator,
                     List, Mapping, Match, MutableMapping, Optional, Sequence,
                     Set, Tuple, TypeVar, Union, cast)
@@ -15,21 +16,33 @@ from acab.core.decorators.semantic import RunInSubCtxSet
 from acab.interfaces import semantic as SI
 from acab.error.semantic_exception import AcabSemanticException
 from acab.modules.context.context_set import ContextSet, MutableContextInstance
+from acab.modules.semantics.hash_join import HashJoin
+from acab.modules.semantics.query_planner import QueryPlanner
 from acab.modules.semantics.util import SemanticBreakpointDecorator
 
 CtxIns = AT.CtxIns
 
 # Primary Abstractions:
+@dataclass(repr=False)
 class QueryAbstraction(SI.AbstractionSemantics_i):
     """
-    Very simply accumulate results of multiple sentences of queries
+    Very simply accumulate results of multiple sentences of queries,
+    running the most selective clauses first.
+    Clauses sharing variables are hash joined, unless joiner is None
     """
+    planner : QueryPlanner       = field(default_factory=QueryPlanner)
+    joiner  : Optional[HashJoin] = field(default_factory=HashJoin)
+
     @SemanticBreakpointDecorator
     def __call__(self, instruction, semSys, ctxs=None, data=None):
         query = instruction
         # Get the default dependent semantics
         sem, struct = semSys.lookup()
-        for clause in query.clauses:
+        clauses     = self.planner.plan(query.clauses, struct)
+        if self.joiner is not None:
+            clauses = self.joiner(clauses, sem, struct, ctxs=ctxs, data=data, planner=self.planner)
+
+        for clause in clauses:
             sem.query(clause, struct, data=data, ctxs=ctxs)
 
 class QueryPlusAbstraction(SI.AbstractionSemantics_i):
@@ -138,7 +151,7 @@ class ProxyRuleAbstraction(SI.AbstractionSemantics_i):
         if not bool(ctxs):
             return
 
-        ctxs.build_named_set(instruction, [x.uuid for x in ctxs.active_list()])
+        ctxs.build_named_set(instruction, [x.id for x in ctxs.active_list()])
 
     def run_continuations(self, instruction, semsys, ctxs=None, data=None):
         logging.debug("Running Proxy Rule Continuations")
@@ -10,8 +10,12 @@ from acab import types as AT
 from acab.core.config.config import AcabConfig
 from acab.core.decorators.semantic import (BuildCtxSetIfMissing,
                                                RunDelayedCtxSetActions)
+from acab.core.data.default_structure import QUERY
+from acab.interfaces.handler_system import Handler
 from acab.interfaces.semantic import (AbstractionSemantics_i,
+                                               DependentSemantics_i,
                                                SemanticSystem_i)
+from acab.interfaces.value import Sentence_i
 from acab.error.semantic_exception import AcabSemanticException
 from acab.modules.context.context_set import ContextSet
 
@@ -48,12 +52,58 @@ class BasicSemanticSystem(SemanticSystem_i):
         """ Perform an instruction by mapping it to a semantics """
 
         # Instructions passed in
-        for instruction in instructions:
+        for handler, batch in self._batch_inserts(instructions):
             if not bool(ctxs):
                 logging.warning("Empty ContextSet, cannot continue received instructions")
                 break
 
-            ctxs = self.run_instruction(instruction, ctxs=ctxs)
+            if handler is None:
+                ctxs = self.run_instruction(batch[0], ctxs=ctxs)
+            else:
+                ctxs = self.run_insertions(handler, batch, ctxs=ctxs)
+
+        return ctxs
+
+    def _batch_inserts(self, instructions) -> Iterator[Tuple[Optional[Handler], List[Sentence]]]:
+        """ Group consecutive plain sentence insertions into the same dependent semantics,
+        everything else is yielded individually, with no handler
+        """
+        handler, batch = None, []
+        for instruction in instructions:
+            target = self._insert_handler(instruction)
+            if bool(batch) and (target is None or target is not handler):
+                yield (handler, batch)
+                handler, batch = None, []
+
+            if target is None:
+                yield (None, [instruction])
+            else:
+                handler = target
+                batch.append(instruction)
+
+        if bool(batch):
+            yield (handler, batch)
+
+    def _insert_handler(self, instruction) -> Optional[Handler]:
+        """ Get the handler of an instruction, if it's a dependent insertion """
+        if not isinstance(instruction, Sentence_i) or not bool(instruction):
+            return None
+        if QUERY in instruction[-1].data and bool(instruction[-1].data[QUERY]):
+            return None
+
+        handler = self.lookup(instruction)
+        if not isinstance(handler.func, DependentSemantics_i) or handler.struct is None:
+            return None
+
+        return handler
+
+    def run_insertions(self, handler, sentences, ctxs=None) -> CtxSet:
+        """ Insert many sentences into a dependent semantics' struct in one go """
+        try:
+            logging.debug(f"Firing Semantics: {handler.func} on {len(sentences)} sentences")
+            handler.func.insert_many(sentences, handler.struct, data={}, ctxs=ctxs)
+        except AcabSemanticException as err:
+            logging.warning(err)
 
         return ctxs
 
@@ -90,6 +140,9 @@ class BasicSemanticSystem(SemanticSystem_i):
     def to_sentences(self) -> List[Sentence]:
         return self.default.func.to_sentences(self.default.struct)
 
+    def iter_sentences(self) -> Iterator[Sentence]:
+        return self.default.func.iter_sentences(self.default.struct)
+
 
     def __repr__(self):
         ops = ""
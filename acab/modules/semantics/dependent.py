@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
 import logging as root_logger
+from collections import deque
+from typing import Iterator, List, Optional, Tuple
 
 from acab import types as AT
 import acab.interfaces.semantic as SI
 import acab.error.semantic_exception as ASErr
 from acab.core.config.config import AcabConfig
-from acab.core.data.acab_struct import BasicNodeStruct
+from acab.core.data.acab_struct import BasicNodeStruct, CompactNodeStruct, NodeIndex
+from acab.core.data.snapshot import MappedNodeStruct
 from acab.core.data.values import AcabStatement, Sentence
 from acab.interfaces.value import Sentence_i
 from acab.modules.context.context_query_manager import ContextQueryManager
@@ -20,6 +23,7 @@ Value         = AT.Value
 Structure     = AT.DataStructure
 Engine        = AT.Engine
 Contexts      = AT.CtxSet
+CtxIns        = AT.CtxIns
 
 
 # Dependent Semantics
@@ -29,38 +33,131 @@ class BreadthTrieSemantics(SI.DependentSemantics_i):
     Searches *Breadth First*
     """
     def compatible(self, struct):
-        is_bns = isinstance(struct, BasicNodeStruct)
+        is_bns = isinstance(struct, (BasicNodeStruct, CompactNodeStruct, MappedNodeStruct))
         has_all_node_comp = "all_nodes" in struct.components
         return is_bns or has_all_node_comp
 
     def insert(self, sen, struct, data=None, ctxs=None):
         if data is None:
             data = {}
+        if isinstance(struct, MappedNodeStruct):
+            raise ASErr.AcabSemanticException("Mapped Structs are read only", sen)
+
+        # Write ahead:
+        journal = struct.components.get('journal', None)
+        if journal is not None:
+            journal.record(sen)
 
         if NEGATION_S in sen.data and sen.data[NEGATION_S]:
             self._delete(sen, struct, data)
+            self._compact_journal(journal, struct)
             return ctxs
 
         logging.debug(f"Inserting: {sen} into {struct}")
+        indexes = struct.indexes
         # Get the root
-        current = self.default.func.up(struct.root)
+        current = self.default.func.up(struct.own(None, struct.root))
         for word in sen:
-            semantics, _ = self.lookup(current)
-            accessible = semantics.access(current, word, data)
-            if bool(accessible):
-                current = accessible[0]
-            else:
-                next_semantics, _ = self.lookup(word)
-                new_node = next_semantics.make(word, data)
-                struct.components['all_nodes'][new_node.uuid] = new_node
-                current = semantics.insert(current, new_node, data)
+            current = self._insert_word(current, word, struct, data, self.lookup, indexes)
 
+        self._compact_journal(journal, struct)
         return current
 
+    def insert_many(self, sentences, struct, data=None, ctxs=None):
+        """ Insert sentences in order.
+        Consecutive sentences which share a prefix
+        only walk that prefix once, and handler lookups are cached.
+        Sentences aren't reordered, as exclusion depends on order.
+        """
+        if data is None:
+            data = {}
+        if isinstance(struct, MappedNodeStruct):
+            raise ASErr.AcabSemanticException("Mapped Structs are read only", sentences)
+
+        indexes = struct.indexes
+        journal = struct.components.get('journal', None)
+        lookup  = self._cached_lookup()
+        root    = self.default.func.up(struct.own(None, struct.root))
+        # The words and nodes of the last inserted sentence
+        path    : List[Tuple[Value, Node]] = []
+        for sen in sentences:
+            if journal is not None:
+                journal.record(sen)
+
+            try:
+                if NEGATION_S in sen.data and sen.data[NEGATION_S]:
+                    path = []
+                    self._delete(sen, struct, data)
+                    continue
+
+                shared = 0
+                for (prev, _), word in zip(path, sen.words):
+                    if not (prev is word or (prev.key == word.key and prev.data == word.data)):
+                        break
+                    shared += 1
+
+                del path[shared:]
+                current = path[-1][1] if bool(path) else root
+                for word in sen.words[shared:]:
+                    current = self._insert_word(current, word, struct, data, lookup, indexes)
+                    path.append((word, current))
+
+            except ASErr.AcabSemanticException as err:
+                logging.warning(err)
+                path = []
+
+        self._compact_journal(journal, struct)
+        return ctxs
+
+    def _compact_journal(self, journal, struct):
+        """ Once applied, entries can be compacted into a snapshot """
+        if journal is not None and journal.should_compact:
+            journal.compact(struct)
+
+    def _cached_lookup(self):
+        """ Without sieve functions, lookup always gives the default handler,
+        so it can be cached by the type looked up """
+        if bool(self.sieve):
+            return self.lookup
+
+        cache = {}
+        def lookup(value=None):
+            key = type(value)
+            if key not in cache:
+                cache[key] = self.lookup(value)
+            return cache[key]
+
+        return lookup
+
+    def _insert_word(self, current, word, struct, data, lookup, indexes):
+        """ Access or create the node for word below current """
+        semantics, _ = lookup(current)
+        accessible = semantics.access(current, word, data)
+        if bool(accessible):
+            return struct.own(current, accessible[0])
+
+        next_semantics, _ = lookup(word)
+        new_node = next_semantics.make(word, data)
+        if 'all_nodes' in struct.components:
+            struct.components['all_nodes'][new_node.id] = new_node
+
+        change_log = struct.components.get('change_log', None)
+        if change_log is not None:
+            old_children = current.children
+            child = semantics.insert(current, new_node, data)
+            change_log.inserted(current, old_children, child)
+        else:
+            child = semantics.insert(current, new_node, data)
+
+        for index in indexes:
+            index.add(child)
+
+        return child
+
     def _delete(self, sen, struct, data=None):
         logging.debug(f"Removing: {sen} from {struct}")
         parent = struct.root
-        current = struct.root
+        current = struct.own(None, struct.root)
 
         for word in sen:
             # Get independent semantics for current
@@ -68,7 +165,7 @@ class BreadthTrieSemantics(SI.DependentSemantics_i):
             accessed = semantics.access(current, word, data)
             if bool(accessed):
                 parent = current
-                current = accessed[0]
+                current = struct.own(parent, accessed[0])
             else:
                 return None
 
@@ -76,50 +173,215 @@ class BreadthTrieSemantics(SI.DependentSemantics_i):
         # remove current from parent
         semantics, _ = self.lookup(parent)
         semantics.remove(parent, current.value, data)
+        if 'change_log' in struct.components:
+            struct.components['change_log'].removed(parent, current)
+        self._unindex(current, struct)
+
+    def _unindex(self, node, struct):
+        """ Remove a removed node and its descendents from the struct's indexes """
+        indexes = struct.indexes
+        if not bool(indexes):
+            return
+
+        queue = [node]
+        while bool(queue):
+            current = queue.pop()
+            queue  += current.children.values()
+            for index in indexes:
+                index.remove(current)
+
+    def _indexed_roots(self, sen, struct, negated=False) -> Optional[List[Node]]:
+        """ For queries starting with an unbound variable followed by a word,
+        eg: $x.b.c?
+        use the word index to find the root children which have the word
+        as a child, instead of trying every root child.
+
+        Returns None when the index can't be used, or is no smaller than a scan.
+        Negated queries scan, as their failures matter.
+        """
+        if negated or len(sen) < 2 or 'word_index' not in struct.components:
+            return None
+
+        first, second = sen[0], sen[1]
+        if not first.is_var or first.is_at_var or second.is_var:
+            return None
+
+        index = struct.components['word_index']
+        key   = second.key
+        if len(struct.root) <= index.count(key):
+            return None
+
+        roots = []
+        for node in index.get(key):
+            parent = node.parent() if node.parent is not None else None
+            if parent is None or parent.parent is None or parent.parent() is not struct.root:
+                continue
+            if NodeIndex.is_attached(node, struct.root):
+                roots.append(parent)
+
+        return roots
 
     def query(self, sen, struct, data=None, ctxs=None):
-        """ Breadth First Search Query """
+        """ Breadth First Search Query.
+        Negated queries only search each context until a match exists
+        """
         if ctxs is None:
             raise ASErr.AcabSemanticException("Ctxs is none to TrieSemantics.query", sen)
 
         with ContextQueryManager(sen, struct.root, ctxs) as cqm:
+            if cqm.negated:
+                cqm.exists = lambda x: self._exists(x, cqm.constraints, sen, data)
+                return ctxs
+
+            indexed_roots = self._indexed_roots(sen, struct)
             for source_word in cqm.query:
                 for bound_word, ctxInst, current_node in cqm.active:
-                    indep, _ = self.lookup(current_node)
-                    results = indep.access(current_node,
-                                           bound_word,
-                                           data)
+                    if indexed_roots is not None and bound_word is None and current_node is struct.root:
+                        results = indexed_roots
+                    else:
+                        indep, _ = self.lookup(current_node)
+                        results = indep.access(current_node,
+                                               bound_word,
+                                               data)
 
                     cqm.test_and_update(results)
+                indexed_roots = None
 
         return ctxs
 
+    def iter_query(self, sen, struct, data=None, ctxs=None, start=None) -> Iterator[CtxIns]:
+        """ Lazily yield the bindings of a query, depth first,
+        extending each start context (defaulting to the active contexts) in turn.
+        The trie is only searched as far as the bindings taken need.
+        Contexts aren't added to the context set, nor failures recorded.
+        """
+        operators = ctxs._operators if ctxs is not None else None
+        plan      = ContextQueryManager.plans.get(sen, operators)
+        if start is None:
+            start = ctxs.active_list()
+
+        for ctxInst in start:
+            ContextQueryManager.start(ctxInst, sen, struct.root)
+            if not plan.negated:
+                yield from self._search(ctxInst, plan.constraints, sen, data)
+            elif not self._exists(ctxInst, plan.constraints, sen, data):
+                yield ctxInst
+
+    def _exists(self, ctxInst, constraints, sen, data=None) -> bool:
+        """ Search until a context has a single binding """
+        return next(self._search(ctxInst, constraints, sen, data), None) is not None
+
+    def _search(self, ctxInst, constraints, sen, data=None, fail=None) -> Iterator[CtxIns]:
+        """ Yield the completed bindings of a query for a context, depth first.
+        The stack holds a (context, remaining candidates) frame per word matched,
+        so at most one partial context per word is live.
+        Failures are passed to `fail`, as ContextSet.fail
+        """
+        if not bool(constraints):
+            yield ctxInst
+            return
+
+        candidates = self._candidates(ctxInst, constraints[0], data)
+        if not bool(candidates):
+            if fail is not None:
+                fail(ctxInst, constraints[0].source, ctxInst._current, sen)
+            return
+
+        stack = [(ctxInst, candidates)]
+        while bool(stack):
+            current, candidates = stack[-1]
+            depth = len(stack) - 1
+            if not bool(candidates):
+                stack.pop()
+                continue
+
+            node     = candidates.pop()
+            extended = self._extend(current, node, constraints[depth], sen, fail)
+            if extended is None:
+                continue
+            if depth + 1 == len(constraints):
+                yield extended
+                continue
+
+            next_candidates = self._candidates(extended, constraints[depth + 1], data)
+            if not bool(next_candidates):
+                if fail is not None:
+                    fail(extended, constraints[depth + 1].source, node, sen)
+                continue
+
+            stack.append((extended, next_candidates))
+
+    def _candidates(self, ctxInst, constraints, data=None) -> List[Node]:
+        """ The nodes a context could bind the next word to,
+        reversed, so popping them keeps the trie's order """
+        bound_word = ctxInst[constraints.source]
+        if bound_word.is_var:
+            bound_word = None
+
+        current = ctxInst._current
+        indep, _ = self.lookup(current)
+        results  = list(indep.access(current, bound_word, data))
+        results.reverse()
+        return results
+
+    def _extend(self, ctxInst, node, constraints, sen, fail=None) -> Optional[CtxIns]:
+        """ Test a node, and bind it in a copy of the context if it passes """
+        try:
+            constraints.test(node, ctxInst)
+        except ASErr.AcabSemanticTestFailure as err:
+            logging.debug(f"Tests failed on {node.value}:\n\t{err}")
+            if fail is not None:
+                fail(ctxInst, constraints.source, node, sen)
+            return None
+
+        return ctxInst.bind(constraints.source,
+                            [node],
+                            sub_binds=constraints["sub_struct_binds"])[0]
+
     def to_sentences(self, struct, data=None, ctxs=None):
-        """ Convert a trie to a list of sentences
-        essentially a dfs of the structure,
+        """ Convert a trie to a list of sentences.
+        See iter_sentences
+        """
+        return list(self.iter_sentences(struct, data=data, ctxs=ctxs))
+
+    def iter_sentences(self, struct, data=None, ctxs=None) -> Iterator[Sentence]:
+        """ Lazily convert a trie to sentences,
+        essentially a bfs of the structure,
         ensuring only leaves are complex structures.
 
-        structures are converted to words for use within sentences
+        structures are converted to words for use within sentences.
+        Paths are linked (word, prefix) pairs, shared between siblings.
         """
         # TODO if passed a node, use that in place of root
-        result_list = []
-        # Queue: List[Tuple[List[Value], Node]]
-        queue = [([], struct.root)]
+        lookup = self._cached_lookup()
+        root   = struct.root
+        # Queue: Deque[Tuple[Optional[Tuple[Value, Prefix]], Node]]
+        queue  = deque([(None, root)])
         while bool(queue):
-            path, current = queue.pop(0)
-            updated_path = path + [current.value]
-            semantics, _ = self.lookup(current)
+            prefix, current = queue.popleft()
+            semantics, _ = lookup(current)
             accessible = semantics.access(current, None, data)
             if bool(accessible):
                 # branch
-                queue += [(updated_path, x) for x in accessible]
+                child_prefix = None
+                if current is not root:
+                    word = current.value
+                    if not isinstance(word, Sentence_i):
+                        word = word.to_word()
+                    child_prefix = (word, prefix)
+
+                queue.extend([(child_prefix, x) for x in accessible])
+
+            if current is root:
+                continue
 
             if not bool(accessible) or isinstance(current.value, AcabStatement):
                 # Leaves and Statements
-                # Always ignore the root node, so starting index is 1
-                words = [x.to_word() if not isinstance(x, Sentence_i) else x for x in updated_path[1:-1]]
-                words.append(updated_path[-1])
-                result_list.append(Sentence.build(words))
+                words = [current.value]
+                while prefix is not None:
+                    words.append(prefix[0])
+                    prefix = prefix[1]
 
-        return result_list
+                words.reverse()
+                yield Sentence.build(words)
 
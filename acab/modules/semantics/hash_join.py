@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Hash join evaluation of query clauses which share variables.
+
+Running clauses in sequence walks a later clause once for every context
+an earlier clause produced: for a.$x.b?, c.$x.d? that is a walk of c
+for every binding of $x, O(n.m) for fact families of size n and m.
+
+Instead, clauses which can be evaluated on their own
+(positive, with no @x at-binding, and no constraint on another clause's variables)
+and share a variable with another such clause, are each queried once,
+from an empty context. Their binding tables are then hash joined
+on their shared variables, in query order, which is O(n + m).
+The joined bindings extend each incoming context,
+at the node the last joined clause ended on,
+and the remaining clauses run in sequence as usual.
+
+Querying a clause on its own only pays when both it and the bindings so far
+are large. Otherwise running in sequence, walking the trie from each binding
+(a nested loop over the trie as an index), is cheaper.
+So groups are cut short at the first clause where the planner estimates
+either side as fewer than min_rows.
+"""
+import logging as root_logger
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from acab import types as AT
+from acab.core.data.values import SymbolTable
+from acab.modules.semantics.query_planner import ClauseInfo, QueryPlanner
+
+logging = root_logger.getLogger(__name__)
+
+Sentence  = AT.Sentence
+Structure = AT.DataStructure
+CtxSet    = AT.CtxSet
+CtxIns    = AT.CtxIns
+
+# A row of a binding table: (data, nodes, the node its last clause ended on)
+Row = Tuple[Dict[str, AT.Value], Dict[str, AT.Node], AT.Node]
+
+
+def clause_vars(clause:Sentence) -> Set[str]:
+    return {str(x) for x in clause.words if x.is_var}
+
+
+@dataclass
+class HashJoin:
+    """ Finds the joinable groups of a planned query, and evaluates them.
+
+    min_group : the fewest clauses worth joining
+    min_rows  : the fewest estimated rows on each side of a join worth hashing
+    """
+
+    min_group : int   = field(default=2)
+    min_rows  : float = field(default=16.0)
+
+    def __call__(self, clauses:List[Sentence], sem, struct:Structure, ctxs:CtxSet, data=None, planner:QueryPlanner=None) -> List[Sentence]:
+        """ Join what can be joined into ctxs, returning the clauses left to run """
+        groups = self.groups(clauses, ctxs)
+        if struct is not None:
+            order  = {id(x): i for i, x in enumerate(clauses)}
+            groups = sorted(self.worthwhile(groups, struct, planner or QueryPlanner()),
+                            key=lambda x: order[id(x[-1])])
+        if not bool(groups):
+            return clauses
+
+        joined = {id(y) for x in groups for y in x}
+        logging.debug(f"Hash Joining: {[[str(y) for y in x] for x in groups]}")
+        tables = [self.join_group(x, sem, struct, ctxs, data) for x in groups]
+        self.extend(ctxs, tables, groups)
+        return [x for x in clauses if id(x) not in joined]
+
+    def groups(self, clauses:List[Sentence], ctxs:CtxSet) -> List[List[Sentence]]:
+        """ The clauses connected by shared variables, in query order.
+        Groups are ordered by their last clause """
+        infos      = [ClauseInfo.build(i, x) for i, x in enumerate(clauses)]
+        incoming   = set([y for x in ctxs.active_list() for y in x.data.keys()])
+        candidates = [x for x in infos if self._joinable(x, incoming)]
+
+        groups : List[Tuple[Set[str], List[Sentence]]] = []
+        for info in candidates:
+            connected = [x for x in groups if bool(x[0] & info.binds)]
+            variables = set(info.binds).union(*[x[0] for x in connected])
+            members   = [y for x in connected for y in x[1]] + [info.clause]
+            groups    = [x for x in groups if x not in connected] + [(variables, members)]
+
+        order   = {id(x): i for i, x in enumerate(clauses)}
+        ordered = [sorted(x[1], key=lambda y: order[id(y)])
+                   for x in groups if len(x[1]) >= self.min_group]
+        return sorted(ordered, key=lambda x: order[id(x[-1])])
+
+    def worthwhile(self, groups:List[List[Sentence]], struct:Structure, planner:QueryPlanner) -> List[List[Sentence]]:
+        """ Cut each group short at the first clause where the planner estimates
+        the rows so far, or the clause's own rows, as fewer than min_rows """
+        result = []
+        for group in groups:
+            first = ClauseInfo.build(0, group[0])
+            left  = planner.estimate(first, struct, set())
+            bound = set(first.binds)
+            kept  = group[:1]
+            for clause in group[1:]:
+                info  = ClauseInfo.build(0, clause)
+                right = planner.estimate(info, struct, set())
+                if left < self.min_rows or right < self.min_rows:
+                    break
+
+                kept.append(clause)
+                left *= planner.estimate(info, struct, bound)
+                bound.update(info.binds)
+
+            if len(kept) >= self.min_group:
+                result.append(kept)
+
+        return result
+
+    def _joinable(self, info:ClauseInfo, incoming:Set[str]) -> bool:
+        """ Positive, needs nothing bound, binds only its own words,
+        and is independent of the incoming contexts """
+        clause = info.clause
+        return (not info.negated
+                and not bool(info.requires)
+                and bool(clause)
+                and not clause[0].is_at_var
+                and bool(info.binds)
+                and info.binds == clause_vars(clause)
+                and not bool(info.binds & incoming))
+
+    def evaluate(self, clause:Sentence, sem, struct:Structure, ctxs:CtxSet, data=None) -> List[Row]:
+        """ Query a single clause from an empty context """
+        sub_ctxs = ctxs.build(ctxs._operators, failures=ctxs._failure_policy)
+        sem.query(clause, struct, data=data, ctxs=sub_ctxs)
+        ctxs._failed.merge(sub_ctxs._failed)
+        return [(dict(x.data), dict(x.nodes), x._current) for x in sub_ctxs.active_list()]
+
+    def join_group(self, group:List[Sentence], sem, struct:Structure, ctxs:CtxSet, data=None) -> List[Row]:
+        """ Evaluate and join a group's clauses, in order.
+        Each next clause is hashed on the variables it shares with those so far,
+        and probed with the rows so far """
+        rows      = self.evaluate(group[0], sem, struct, ctxs, data)
+        variables = clause_vars(group[0])
+        for clause in group[1:]:
+            if not bool(rows):
+                break
+
+            shared   = sorted(variables & clause_vars(clause))
+            variables.update(clause_vars(clause))
+            table    = self._hash(self.evaluate(clause, sem, struct, ctxs, data), shared)
+            joined   = []
+            for row_data, row_nodes, _ in rows:
+                key = self._key(row_data, shared)
+                for other_data, other_nodes, current in table.get(key, []):
+                    joined.append(({**row_data, **other_data}, {**row_nodes, **other_nodes}, current))
+
+            rows = joined
+
+        return rows
+
+    def _key(self, row_data, shared:List[str]) -> Tuple[int, ...]:
+        return tuple([SymbolTable.key(row_data[x]) for x in shared])
+
+    def _hash(self, rows:List[Row], shared:List[str]) -> Dict[Tuple[int, ...], List[Row]]:
+        table = {}
+        for row in rows:
+            table.setdefault(self._key(row[0], shared), []).append(row)
+
+        return table
+
+    def extend(self, ctxs:CtxSet, tables:List[List[Row]], groups:List[List[Sentence]]):
+        """ Extend each active context by every combination of the groups' rows.
+        Each is left at the node of the last group's row, as groups are ordered by their last clause """
+        extended = ctxs.active_list(clear=True)
+        for table, group in zip(tables, groups):
+            if not bool(table):
+                [ctxs.fail(x, None, None, group[-1]) for x in extended]
+                return
+
+            results = []
+            for ctxInst in extended:
+                for row_data, row_nodes, current in table:
+                    bound = ctxInst.bind_dict(row_data)
+                    bound.nodes.update(row_nodes)
+                    results.append(bound.set_current_node(current))
+
+            extended = results
+
+        ctxs.push(extended)
@@ -5,7 +5,7 @@ from typing import TypeVar
 
 import acab.error.semantic_exception as ASErr
 from acab.core.config.config import AcabConfig
-from acab.core.data.node import AcabNode
+from acab.core.data.node import AcabNode, CompactNode
 from acab.core.data.values import AcabValue, Sentence
 from acab.interfaces import semantic as SI
 
@@ -126,3 +126,81 @@ class ExclusionNodeSemantics(SI.IndependentSemantics_i):
 
         return node.remove_child(to_delete)
 
+
+
+class CompactNodeSemantics(SI.IndependentSemantics_i):
+    """ BasicNodeSemantics, for the handles of a CompactNodeStruct """
+
+    def make(self, val, data=None) -> CompactNode:
+        return self.up(CompactNode.detached(val), data)
+
+    def up(self, node: CompactNode, data=None) -> CompactNode:
+        return node
+
+    def access(self, node, term, data=None):
+        if term is None:
+            return list(node)
+
+        index = node._find(term)
+        if index < 0:
+            return []
+
+        return [CompactNode(node.store, index)]
+
+    def insert(self, node, new_node, data=None) -> CompactNode:
+        assert(isinstance(node, CompactNode))
+        assert(isinstance(new_node, CompactNode))
+        if new_node in node:
+            raise ASErr.AcabSemanticIndependentFailure("Node is already child", (node, new_node))
+
+        return node.add_child(new_node)
+
+    def remove(self, node, to_delete: AcabValue, data=None) -> CompactNode:
+        assert(isinstance(node, CompactNode))
+        assert(isinstance(to_delete, AcabValue))
+
+        if to_delete not in node:
+            raise ASErr.AcabSemanticIndependentFailure("Value not in node", (node, to_delete))
+
+        return node.remove_child(to_delete)
+
+class CompactExclusionSemantics(CompactNodeSemantics):
+    """ ExclusionNodeSemantics, for the handles of a CompactNodeStruct.
+    Only non-default exops are stored, to keep node data sparse
+    """
+
+    def up(self, node: CompactNode, data=None) -> CompactNode:
+        if node.is_attached:
+            return node
+
+        exop = node.value.data.get(EXOP, DEFAULT_EXOP)
+        if bool(data) and EXOP in data:
+            exop = data[EXOP]
+
+        if exop != DEFAULT_EXOP:
+            node.data[EXOP] = exop
+        else:
+            node.data.pop(EXOP, None)
+
+        return node
+
+    def access(self, node, term, data=None):
+        potentials = super().access(node, term, data)
+
+        if bool(term) and EXOP in term.data and any([x.data_get(EXOP, DEFAULT_EXOP) != term.data[EXOP] for x in potentials]):
+            raise ASErr.AcabSemanticIndependentFailure(f"EXOP MisMatch, expected {term.data[EXOP]}",
+                                                       term)
+
+        return potentials
+
+    def insert(self, node, new_node, data=None) -> CompactNode:
+        assert(isinstance(node, CompactNode))
+        assert(isinstance(new_node, CompactNode))
+
+        if new_node in node:
+            raise ASErr.AcabSemanticIndependentFailure("Node is already child", (node, new_node))
+
+        if node.data_get(EXOP, DEFAULT_EXOP) is EXOP_enum.EX and bool(node):
+            node.clear_children()
+
+        return node.add_child(new_node)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Cost based ordering of a query's clauses.
+
+Each clause multiplies the number of contexts by how many matches it has,
+so running the most selective clauses first keeps the context set small.
+Selectivity is estimated from the trie: child counts of the nodes a clause
+walks through, and for variables, the fan-out of a sample of children.
+
+Clauses are only reordered when it can't change the result:
+A clause which needs a variable bound (an @x at-binding, a variable
+parameter of a constraint, or any variable of a negated clause),
+waits for a clause that binds it, if the query has one.
+"""
+import logging as root_logger
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import List, Optional, Set
+
+from acab import types as AT
+from acab.core.config.config import AcabConfig
+from acab.interfaces.value import Sentence_i
+
+logging = root_logger.getLogger(__name__)
+config  = AcabConfig.Get()
+
+NEGATION_S   = config.prepare("Value.Structure", "NEGATION")()
+CONSTRAINT_S = config.prepare("Value.Structure", "CONSTRAINT")()
+
+Sentence  = AT.Sentence
+Value     = AT.Value
+Structure = AT.DataStructure
+
+
+def value_vars(value) -> Set[str]:
+    """ The names of variables in a value, sentence, or constraint """
+    found = set()
+    if value is None:
+        return found
+    if isinstance(value, Sentence_i):
+        found.update([str(x) for x in value.words if x.is_var])
+    elif value.is_var:
+        found.add(str(value))
+
+    for param in getattr(value, "params", []):
+        found.update(value_vars(param))
+    if hasattr(value, "op"):
+        found.update(value_vars(value.op))
+
+    return found
+
+
+@dataclass
+class ClauseInfo:
+    """ The variables a clause binds and requires """
+    index    : int       = field()
+    clause   : Sentence  = field()
+    negated  : bool      = field()
+    binds    : Set[str]  = field(default_factory=set)
+    requires : Set[str]  = field(default_factory=set)
+
+    @staticmethod
+    def build(index, clause) -> 'ClauseInfo':
+        negated  = bool(clause.data.get(NEGATION_S, False))
+        info     = ClauseInfo(index, clause, negated)
+        mentions = set()
+        for word in clause.words:
+            if word.is_at_var:
+                info.requires.add(str(word))
+            elif word.is_var:
+                mentions.add(str(word))
+
+            for constraint in word.data.get(CONSTRAINT_S, []):
+                info.requires.update(value_vars(constraint))
+            if word.type.has_var:
+                mentions.update(value_vars(word.type))
+
+        if negated:
+            info.requires.update(mentions)
+        else:
+            info.binds = mentions
+            info.requires.difference_update(mentions)
+
+        return info
+
+
+@dataclass
+class QueryPlanner:
+    """ Orders clauses greedily, by estimated contexts out per context in.
+    Ties keep source order.
+
+    sample_size    : children sampled to estimate fan-out past a variable
+    unknown_fanout : assumed fan-out below an @x binding
+    constraint_selectivity : assumed pass rate of each constraint
+    """
+
+    sample_size            : int   = field(default=8)
+    unknown_fanout         : float = field(default=4.0)
+    constraint_selectivity : float = field(default=0.5)
+
+    def plan(self, clauses:List[Sentence], struct:Optional[Structure]=None) -> List[Sentence]:
+        if len(clauses) < 2 or not all([isinstance(x, Sentence_i) for x in clauses]):
+            return clauses
+
+        infos    = [ClauseInfo.build(i, x) for i, x in enumerate(clauses)]
+        bindable = set().union(*[x.binds for x in infos])
+        # Variables no clause binds come from outside the query
+        bound     = set().union(*[x.requires for x in infos]) - bindable
+        remaining = infos
+        ordered   = []
+        while bool(remaining):
+            ready = [x for x in remaining if x.requires <= bound]
+            if not bool(ready):
+                # Unsatisfiable dependencies, so leave it to fail in order
+                ready = remaining[:1]
+
+            best = min(ready, key=lambda x: (self.estimate(x, struct, bound), x.index))
+            ordered.append(best.clause)
+            bound.update(best.binds)
+            remaining = [x for x in remaining if x is not best]
+
+        if any([x is not y for x, y in zip(ordered, clauses)]):
+            logging.debug(f"Reordered Query: {[str(x) for x in ordered]}")
+
+        return ordered
+
+    def estimate(self, info:ClauseInfo, struct:Optional[Structure], bound:Set[str]) -> float:
+        """ Estimate the contexts a clause produces, for each it is given """
+        matches = self._walk(info.clause, getattr(struct, "root", None), bound)
+        if info.negated:
+            # Negations only ever remove contexts
+            return max(0.0, 1.0 - min(1.0, matches))
+
+        return matches
+
+    def _walk(self, clause, root, bound:Set[str]) -> float:
+        words = clause.words
+        frontier = [root] if root is not None else None
+        if bool(words) and words[0].is_at_var:
+            frontier, words = None, words[1:]
+
+        estimate = 1.0
+        for word in words:
+            is_open = word.is_var and str(word) not in bound
+            if is_open:
+                estimate *= self.constraint_selectivity ** len(word.data.get(CONSTRAINT_S, []))
+
+            if frontier is None:
+                estimate *= self.unknown_fanout if is_open else 1.0
+            elif is_open:
+                estimate *= sum([len(x) for x in frontier]) / len(frontier)
+                frontier  = self._sample(frontier)
+            elif word.is_var:
+                # Bound, but to an unknown value, so assume it is present
+                frontier  = self._sample(frontier)
+            else:
+                found     = [x.get_child(word) for x in frontier if x.has_child(word)]
+                estimate *= len(found) / len(frontier)
+                frontier  = found
+
+            if frontier is not None and not bool(frontier):
+                return 0.0
+
+        return estimate
+
+    def _sample(self, frontier) -> List:
+        per_node = max(1, self.sample_size // len(frontier))
+        sampled  = [y for x in frontier for y in islice(iter(x), per_node)]
+        return sampled[:self.sample_size]
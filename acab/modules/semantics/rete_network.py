@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+A Rete network over a trie, for incremental matching of rule queries.
+
+Working memory elements (wmes) are the paths from the root to each node,
+as every prefix of an inserted sentence is queryable.
+They are keyed by their nodes' interned value keys,
+so copy on write copies of a node (see BasicNodeStruct.fork) are the same wme.
+
+Each distinct query clause compiles to an AlphaMemory,
+holding the wmes that match its literal words, exops and alpha tests.
+Each rule is a chain of beta memories, one per clause prefix,
+of tokens: context instances of the bindings so far,
+keyed by the wmes of the positive clauses that made them.
+A positive clause joins its parent tokens with its alpha memory,
+a negated clause passes its parent tokens that nothing in its alpha memory joins.
+Joins are hashed on the variables a clause shares with the clauses before it,
+so each token or wme is only tested against those with the same bindings.
+
+The trie semantics report added and removed nodes,
+which are propagated through only the memories they affect,
+and each rule accumulates its new and retracted matches until the next tick.
+"""
+import logging as root_logger
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+import acab.error.semantic_exception as ASErr
+from acab import types as AT
+from acab.core.config.config import AcabConfig
+from acab.core.data.values import SymbolTable
+from acab.interfaces.value import Sentence_i
+from acab.modules.context.constraints import ConstraintCollection
+from acab.modules.context.context_query_manager import ContextQueryManager
+from acab.modules.context.context_set import ContextInstance
+
+logging = root_logger.getLogger(__name__)
+config  = AcabConfig.Get()
+
+CONSTRAINT_S = config.prepare("Value.Structure", "CONSTRAINT")()
+EXOP         = config.prepare("MODAL", "exop")()
+DEFAULT_EXOP = config.default(EXOP)
+
+Node     = AT.Node
+Sentence = AT.Sentence
+CtxIns   = AT.CtxIns
+
+Path    = Tuple[Node, ...]
+WMEKey  = Tuple[int, ...]
+Support = Tuple[WMEKey, ...]
+JoinKey = Tuple[int, ...]
+
+
+def node_path(node:Node) -> Path:
+    """ The nodes from below the root to a node """
+    path    = [node]
+    current = node.parent() if node.parent is not None else None
+    while current is not None and current.parent is not None:
+        path.append(current)
+        current = current.parent()
+
+    path.reverse()
+    return tuple(path)
+
+
+def wme_key(path:Path) -> WMEKey:
+    return tuple([x.key for x in path])
+
+
+def clause_shape(clause:Sentence) -> Tuple[int, Optional[int]]:
+    """ Alpha memories are found by length and final literal word """
+    last = clause[-1]
+    return (len(clause), None if last.is_var else SymbolTable.key(last))
+
+
+@dataclass
+class AlphaMemory:
+    """ The wmes which pass a clause's tests that don't need bindings """
+
+    clause      : Sentence                   = field()
+    constraints : List[ConstraintCollection] = field(repr=False)
+    wmes        : Dict[WMEKey, Path]         = field(default_factory=dict, repr=False)
+    successors  : List[Tuple['ReteRule', int]] = field(default_factory=list, repr=False)
+    # The wmes by the node keys at some word positions, for hash joins
+    _indexes    : Dict[Tuple[int, ...], Dict[JoinKey, Dict[WMEKey, Path]]] = field(default_factory=dict, repr=False)
+
+    @staticmethod
+    def key(clause:Sentence) -> Tuple:
+        """ Clauses without constraints share memories by their words and exops """
+        if any([CONSTRAINT_S in x.data for x in clause.words]):
+            return ("clause", id(clause))
+
+        return tuple([(x.is_var, str(x), str(x.type), str(x.data.get(EXOP, None)))
+                      for x in clause.words])
+
+    def matches(self, path:Path) -> bool:
+        if len(path) != len(self.clause):
+            return False
+
+        for word, node, constraints in zip(self.clause.words, path, self.constraints):
+            if word.is_var:
+                pass
+            elif SymbolTable.key(word) != node.key:
+                return False
+            elif EXOP in word.data and node.data.get(EXOP, DEFAULT_EXOP) != word.data[EXOP]:
+                # As in a trie query, only literal words test exops
+                return False
+            try:
+                constraints.test_alphas(node)
+            except ASErr.AcabSemanticTestFailure:
+                return False
+
+        return True
+
+    def fill(self, root:Node):
+        """ Find the matching wmes already in the trie """
+        frontier = [()]
+        parents  = [root]
+        for word in self.clause.words:
+            next_frontier, next_parents = [], []
+            for path, parent in zip(frontier, parents):
+                if word.is_var:
+                    children = list(parent.children.values())
+                elif parent.has_child(word):
+                    children = [parent.get_child(word)]
+                else:
+                    children = []
+
+                next_frontier += [path + (x,) for x in children]
+                next_parents  += children
+
+            frontier, parents = next_frontier, next_parents
+
+        for path in frontier:
+            if self.matches(path):
+                self.add(wme_key(path), path)
+
+    def index(self, positions:Tuple[int, ...]) -> Dict[JoinKey, Dict[WMEKey, Path]]:
+        """ Get the wmes grouped by their keys at the positions,
+        building the index if necessary """
+        if positions not in self._indexes:
+            index = {}
+            for key, path in self.wmes.items():
+                index.setdefault(tuple([key[x] for x in positions]), {})[key] = path
+            self._indexes[positions] = index
+
+        return self._indexes[positions]
+
+    def add(self, key:WMEKey, path:Path):
+        self.wmes[key] = path
+        for positions, index in self._indexes.items():
+            index.setdefault(tuple([key[x] for x in positions]), {})[key] = path
+
+    def remove(self, key:WMEKey) -> Optional[Path]:
+        path = self.wmes.pop(key, None)
+        if path is None:
+            return None
+
+        for positions, index in self._indexes.items():
+            join_key = tuple([key[x] for x in positions])
+            group    = index[join_key]
+            del group[key]
+            if not bool(group):
+                del index[join_key]
+
+        return path
+
+
+@dataclass
+class ReteRule:
+    """ The beta memories of a rule's query,
+    and its changes in matches since the last tick """
+
+    name       : str                = field()
+    clauses    : List[Sentence]     = field(repr=False)
+    alphas     : List[AlphaMemory]  = field(repr=False)
+    negated    : List[bool]         = field(repr=False)
+
+    memories   : List[Dict[Support, CtxIns]] = field(init=False, default_factory=list, repr=False)
+    added      : Dict[Support, CtxIns]       = field(init=False, default_factory=dict, repr=False)
+    retracted  : Dict[Support, CtxIns]       = field(init=False, default_factory=dict, repr=False)
+    _positions : List[int]                   = field(init=False, default_factory=list, repr=False)
+    _shared    : List[Tuple[int, ...]]       = field(init=False, default_factory=list, repr=False)
+    _betas     : List[Dict[JoinKey, Set[Support]]] = field(init=False, default_factory=list, repr=False)
+
+    def __post_init__(self):
+        self.memories   = [{} for x in range(len(self.clauses) + 1)]
+        # The index into a token's support of each positive clause's wme
+        self._positions = [sum([not x for x in self.negated[:i]]) for i in range(len(self.clauses))]
+        # The word positions of each clause's variables which earlier clauses bind
+        bound = set()
+        for clause, negated in zip(self.clauses, self.negated):
+            self._shared.append(tuple([i for i, x in enumerate(clause.words)
+                                       if x.is_var and str(x) in bound]))
+            if not negated:
+                bound.update([str(x) for x in clause.words if x.is_var])
+
+        # Each beta memory's tokens, by their bindings of the next clause's shared variables
+        self._betas = [{} for x in self.clauses]
+
+    @property
+    def matches(self) -> List[CtxIns]:
+        return list(self.memories[-1].values())
+
+    def start(self):
+        self._propagate(0, {(): ContextInstance()})
+
+    def tick(self) -> Tuple[List[CtxIns], List[CtxIns]]:
+        """ Get and clear the (new, retracted) matches """
+        result = (list(self.added.values()), list(self.retracted.values()))
+        self.added.clear()
+        self.retracted.clear()
+        return result
+
+    def join(self, level:int, token:CtxIns, path:Path) -> Optional[CtxIns]:
+        """ Extend a token by a wme, as a trie query would """
+        current = token
+        for word, node, constraints in zip(self.clauses[level].words,
+                                           path,
+                                           self.alphas[level].constraints):
+            if word.is_var and word in current and SymbolTable.key(current[word]) != node.key:
+                return None
+            try:
+                constraints.test(node, current)
+            except ASErr.AcabSemanticTestFailure:
+                return None
+
+            current = current.bind(word, [node], sub_binds=constraints["sub_struct_binds"])[0]
+
+        return current
+
+    def _token_key(self, level:int, token:CtxIns) -> JoinKey:
+        words = self.clauses[level].words
+        return tuple([SymbolTable.key(token[words[x]]) for x in self._shared[level]])
+
+    def _wme_key(self, level:int, key:WMEKey) -> JoinKey:
+        return tuple([key[x] for x in self._shared[level]])
+
+    def _joinable(self, level:int, token:CtxIns) -> Dict[WMEKey, Path]:
+        """ The wmes of a level's alpha memory with the same shared bindings as a token """
+        index = self.alphas[level].index(self._shared[level])
+        return index.get(self._token_key(level, token), {})
+
+    def _tokens(self, level:int, key:WMEKey) -> List[Tuple[Support, CtxIns]]:
+        """ The tokens of a level's beta memory with the same shared bindings as a wme """
+        memory = self.memories[level]
+        return [(x, memory[x]) for x in self._betas[level].get(self._wme_key(level, key), ())]
+
+    def _blocked(self, level:int, token:CtxIns) -> bool:
+        return any([self.join(level, token, x) is not None for x in self._joinable(level, token).values()])
+
+    def _propagate(self, level:int, tokens:Dict[Support, CtxIns]):
+        """ Add tokens to a beta memory, and pass them down the chain """
+        while bool(tokens):
+            memory = self.memories[level]
+            tokens = {x: y for x, y in tokens.items() if x not in memory}
+            memory.update(tokens)
+            if level == len(self.clauses):
+                for support, ctx in tokens.items():
+                    if self.retracted.pop(support, None) is None:
+                        self.added[support] = ctx
+                return
+
+            betas = self._betas[level]
+            for support, ctx in tokens.items():
+                betas.setdefault(self._token_key(level, ctx), set()).add(support)
+
+            if self.negated[level]:
+                tokens = {x: y for x, y in tokens.items() if not self._blocked(level, y)}
+            else:
+                joined = {}
+                for support, ctx in tokens.items():
+                    for key, path in self._joinable(level, ctx).items():
+                        result = self.join(level, ctx, path)
+                        if result is not None:
+                            joined[support + (key,)] = result
+                tokens = joined
+
+            level += 1
+
+    def _remove(self, level:int, should_remove):
+        """ Remove tokens from a beta memory and those below it """
+        for current in range(level, len(self.memories)):
+            memory  = self.memories[current]
+            removed = [x for x in memory if should_remove(x)]
+            for support in removed:
+                ctx = memory.pop(support)
+                if current < len(self.clauses):
+                    betas    = self._betas[current]
+                    join_key = self._token_key(current, ctx)
+                    betas[join_key].discard(support)
+                    if not bool(betas[join_key]):
+                        del betas[join_key]
+                elif self.added.pop(support, None) is None:
+                    self.retracted[support] = ctx
+
+    def wme_added(self, level:int, key:WMEKey, path:Path):
+        if self.negated[level]:
+            passed  = self.memories[level + 1]
+            blocked = set([x for x, y in self._tokens(level, key)
+                           if x in passed and self.join(level, y, path) is not None])
+            size    = self._positions[level]
+            self._remove(level + 1, lambda x: x[:size] in blocked)
+            return
+
+        joined = {}
+        for support, ctx in self._tokens(level, key):
+            result = self.join(level, ctx, path)
+            if result is not None:
+                joined[support + (key,)] = result
+
+        self._propagate(level + 1, joined)
+
+    def wme_removed(self, level:int, key:WMEKey):
+        if not self.negated[level]:
+            position = self._positions[level]
+            self._remove(level + 1, lambda x: len(x) > position and x[position] == key)
+            return
+
+        passed    = self.memories[level + 1]
+        unblocked = {x: y for x, y in self._tokens(level, key)
+                     if x not in passed and not self._blocked(level, y)}
+        self._propagate(level + 1, unblocked)
+
+
+@dataclass
+class ReteNetwork:
+    """ The alpha memories of a struct, and the rules using them """
+
+    _alphas : Dict[Tuple, AlphaMemory]           = field(default_factory=dict, repr=False)
+    _shapes : Dict[Tuple, List[AlphaMemory]]     = field(default_factory=dict, repr=False)
+    _rules  : Dict[str, ReteRule]                = field(default_factory=dict)
+
+    def __len__(self):
+        return len(self._rules)
+
+    def __contains__(self, name):
+        return name in self._rules
+
+    def __getitem__(self, name) -> ReteRule:
+        return self._rules[name]
+
+    def add_rule(self, name:str, clauses:List[Sentence], root:Node, operators:Optional[CtxIns]=None) -> ReteRule:
+        """ Compile a rule's query clauses, and match it against the current trie """
+        if name in self._rules:
+            raise ASErr.AcabSemanticException("Rete Rule already exists", name)
+        if not bool(clauses):
+            raise ASErr.AcabSemanticException("Rete Rules need a query", name)
+
+        alphas, negated = [], []
+        for clause in clauses:
+            if not isinstance(clause, Sentence_i) or not bool(clause):
+                raise ASErr.AcabSemanticException("Rete Rules can only query sentences", clause)
+            if clause[0].is_at_var:
+                raise ASErr.AcabSemanticException("Rete Rules can't query from a binding", clause)
+
+            plan = ContextQueryManager.plans.get(clause, operators)
+            alphas.append(self._alpha(clause, plan.constraints, root))
+            negated.append(plan.negated)
+
+        rule = ReteRule(name, clauses, alphas, negated)
+        for level, alpha in enumerate(alphas):
+            alpha.successors.append((rule, level))
+
+        self._rules[name] = rule
+        rule.start()
+        return rule
+
+    def remove_rule(self, name:str):
+        rule = self._rules.pop(name)
+        for alpha in rule.alphas:
+            alpha.successors = [x for x in alpha.successors if x[0] is not rule]
+            if bool(alpha.successors):
+                continue
+
+            del self._alphas[AlphaMemory.key(alpha.clause)]
+            shape = clause_shape(alpha.clause)
+            self._shapes[shape].remove(alpha)
+
+    def _alpha(self, clause, constraints, root) -> AlphaMemory:
+        key = AlphaMemory.key(clause)
+        if key not in self._alphas:
+            alpha = AlphaMemory(clause, constraints)
+            alpha.fill(root)
+            self._alphas[key] = alpha
+            self._shapes.setdefault(clause_shape(clause), []).append(alpha)
+
+        return self._alphas[key]
+
+    def _candidates(self, path:Path) -> List[AlphaMemory]:
+        return (self._shapes.get((len(path), path[-1].key), [])
+                + self._shapes.get((len(path), None), []))
+
+    def tick(self) -> Dict[str, Tuple[List[CtxIns], List[CtxIns]]]:
+        """ Get and clear the (new, retracted) matches of rules which changed """
+        changed = [x for x in self._rules.values() if bool(x.added) or bool(x.retracted)]
+        return {x.name: x.tick() for x in changed}
+
+    def added(self, node:Node):
+        """ Propagate a node newly added to the trie """
+        path = node_path(node)
+        key  = wme_key(path)
+        for alpha in self._candidates(path):
+            if key in alpha.wmes or not alpha.matches(path):
+                continue
+
+            alpha.add(key, path)
+            for rule, level in alpha.successors:
+                rule.wme_added(level, key, path)
+
+    def removed(self, node:Node):
+        """ Propagate a node, and its descendents, being removed from the trie """
+        queue = [node_path(node)]
+        while bool(queue):
+            path = queue.pop()
+            queue += [path + (x,) for x in path[-1].children.values()]
+            key   = wme_key(path)
+            for alpha in self._candidates(path):
+                if alpha.remove(key) is None:
+                    continue
+                for rule, level in alpha.successors:
+                    rule.wme_removed(level, key)
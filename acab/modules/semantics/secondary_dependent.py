@@ -1,10 +1,15 @@
 import logging as root_logger
+from typing import Dict, List, Tuple
 
 import acab.interfaces.semantic as SI
 import acab.error.semantic_exception as ASErr
 from acab.core.config.config import AcabConfig
 from acab.core.data.acab_struct import BasicNodeStruct
-from acab.core.data.values import AcabStatement, Sentence
+from acab.core.data.triple_store import TRIPLE, TripleStore
+from acab.core.data.values import AcabStatement, Sentence, SymbolTable
+from acab.modules.context.context_query_manager import ContextQueryManager
+from acab.modules.semantics.dependent import BreadthTrieSemantics
+from acab.modules.semantics.rete_network import ReteNetwork, ReteRule
 
 logging = root_logger.getLogger(__name__)
 config = AcabConfig.Get()
@@ -14,6 +19,7 @@ NEGATION_S       = config.prepare("Value.Structure", "NEGATION")()
 QUERY_FALLBACK_S = config.prepare("Value.Structure", "QUERY_FALLBACK")()
 DEFAULT_SETUP_S  = config.prepare("Data", "DEFAULT_SETUP_METHOD")()
 DEFAULT_UPDATE_S = config.prepare("Data", "DEFAULT_UPDATE_METHOD")()
+QUERY_C          = config.prepare("Structure.Components", "QUERY")()
 
 Node          = 'AcabNode'
 Printable     = 'Printable'
@@ -21,10 +27,195 @@ Value         = 'AcabValue'
 Structure     = 'AcabStruct'
 Engine        = 'Engine'
 Contexts      = 'Contexts'
+CtxIns        = 'ContextInstance'
 
 
-# TODO RDFSemantics, ReteSemantics
 # Dependent Semantics
+class ReteSemantics(BreadthTrieSemantics):
+    """
+    Breadth First Trie Semantics, which also match rules incrementally.
+
+    Rules are compiled into the struct's 'rete' component, a ReteNetwork,
+    and every node the trie semantics add or remove
+    is propagated through it, instead of rules re-querying the trie.
+    `tick` then gives each changed rule's new and retracted matches.
+    See acab.modules.semantics.rete_network
+    """
+
+    def network(self, struct) -> ReteNetwork:
+        if 'rete' not in struct.components:
+            struct.components['rete'] = ReteNetwork()
+
+        return struct.components['rete']
+
+    def add_rule(self, rule, struct, ctxs=None, name=None) -> ReteRule:
+        """ Add a rule, query container, or list of query sentences,
+        to be matched against the struct.
+        Its current matches are reported by the next tick.
+        """
+        if isinstance(rule, list):
+            clauses = rule
+        elif hasattr(rule, "structure"):
+            clauses = rule[QUERY_C].clauses if QUERY_C in rule else []
+        else:
+            clauses = rule.clauses
+
+        if name is None:
+            name = str(rule) if not isinstance(rule, list) else ";".join([str(x) for x in rule])
+
+        operators = ctxs._operators if ctxs is not None else None
+        return self.network(struct).add_rule(name, clauses, struct.root, operators=operators)
+
+    def remove_rule(self, name, struct):
+        self.network(struct).remove_rule(name)
+
+    def tick(self, struct) -> Dict[str, Tuple[List[CtxIns], List[CtxIns]]]:
+        """ Map rule names to their (new, retracted) matches since the last tick """
+        return self.network(struct).tick()
+
+    def _insert_word(self, current, word, struct, data, lookup, indexes):
+        network = struct.components.get('rete', None)
+        if network is None:
+            return super()._insert_word(current, word, struct, data, lookup, indexes)
+
+        existed      = current.has_child(word)
+        old_children = current.children
+        child = super()._insert_word(current, word, struct, data, lookup, indexes)
+        if current.children is not old_children:
+            # Exclusion replaced the children
+            [network.removed(x) for x in old_children.values()]
+        if not existed:
+            network.added(child)
+
+        return child
+
+    def _unindex(self, node, struct):
+        if 'rete' in struct.components:
+            struct.components['rete'].removed(node)
+
+        super()._unindex(node, struct)
+
+
+class TripleStoreSemantics(SI.DependentSemantics_i):
+    """
+    Semantics for subject.predicate.object sentences, in a TripleStore.
+    Triples are a set, so exclusion isn't supported.
+
+    Insertions must be three words.
+    Retractions and queries can be of one to three words,
+    as prefixes of the triples.
+    Each query word is matched by an index lookup,
+    using every position that is bound, so $x.likes.bob? uses POS.
+    """
+
+    def compatible(self, struct):
+        return isinstance(struct, TripleStore)
+
+    def insert(self, sen, struct, data=None, ctxs=None):
+        if data is None:
+            data = {}
+
+        if NEGATION_S in sen.data and sen.data[NEGATION_S]:
+            return self._delete(sen, struct, data)
+
+        if len(sen) != TRIPLE:
+            raise ASErr.AcabSemanticException("Triple Stores only hold three word sentences", sen)
+
+        current = struct.root
+        created = False
+        for word in sen:
+            semantics, _ = self.lookup(current)
+            accessible = semantics.access(current, word, data)
+            if bool(accessible):
+                current = accessible[0]
+                continue
+
+            next_semantics, _ = self.lookup(word)
+            new_node = next_semantics.make(word, data)
+            current  = semantics.insert(current, new_node, data)
+            created  = True
+
+        if created:
+            struct.index(current)
+
+        return current
+
+    def _delete(self, sen, struct, data=None):
+        """ Remove every triple starting with the sentence,
+        and any subjects or predicates left empty """
+        if TRIPLE < len(sen):
+            return None
+
+        current = struct.root
+        for word in sen:
+            semantics, _ = self.lookup(current)
+            accessed = semantics.access(current, word, data)
+            if not bool(accessed):
+                return None
+            current = accessed[0]
+
+        for leaf in list(struct.leaves(current)):
+            struct.unindex(leaf)
+
+        while current is not struct.root:
+            parent = current.parent()
+            semantics, _ = self.lookup(parent)
+            semantics.remove(parent, current.value, data)
+            if bool(parent.children):
+                break
+            current = parent
+
+    def query(self, sen, struct, data=None, ctxs=None):
+        if ctxs is None:
+            raise ASErr.AcabSemanticException("Ctxs is none to TripleStoreSemantics.query", sen)
+        if TRIPLE < len(sen):
+            raise ASErr.AcabSemanticException("Triple Store queries are at most three words", sen)
+        if sen[0].is_at_var:
+            raise ASErr.AcabSemanticException("Triple Store queries can't start from a binding", sen)
+
+        with ContextQueryManager(sen, struct.root, ctxs) as cqm:
+            for position, source_word in enumerate(cqm.query):
+                for bound_word, ctxInst, current_node in cqm.active:
+                    pattern = self._pattern(sen, ctxInst, current_node, position)
+                    cqm.test_and_update(self._step(struct, pattern, position))
+
+        return ctxs
+
+    def _pattern(self, sen, ctxInst, current_node, position) -> List:
+        """ The keys of the query's bound positions,
+        with those already matched taken from the current node's path """
+        pattern = [None, None, None]
+        for index, word in enumerate(sen.words):
+            if not (word.is_var and word not in ctxInst):
+                pattern[index] = SymbolTable.key(ctxInst[word])
+
+        node = current_node
+        for index in reversed(range(position)):
+            pattern[index] = node.key
+            node = node.parent()
+
+        return pattern
+
+    def _step(self, struct, pattern, position) -> List[Node]:
+        """ The distinct SPO nodes at a position, of the triples matching a pattern """
+        results = {}
+        for leaf in struct.match(*pattern):
+            node = leaf
+            for x in range(TRIPLE - 1 - position):
+                node = node.parent()
+            results[id(node)] = node
+
+        return list(results.values())
+
+    def to_sentences(self, struct, data=None, ctxs=None):
+        return list(self.iter_sentences(struct, data=data, ctxs=ctxs))
+
+    def iter_sentences(self, struct, data=None, ctxs=None):
+        for leaf in struct.leaves():
+            predicate = leaf.parent()
+            yield Sentence.build([predicate.parent().value, predicate.value, leaf.value])
+
+
 class FSMSemantics(SI.DependentSemantics_i):
 
     def insert(self, struct, sen, data=None, ctxs=None):
@@ -165,112 +356,30 @@ class ASPSemantics(SI.DependentSemantics_i):
 
 
 
-class DepthTrieSemantics(SI.DependentSemantics_i):
+class DepthTrieSemantics(BreadthTrieSemantics):
     """
     Trie Semantics which map values -> Nodes
     Searches *Depth First*
-    """
-
-    def insert(self, struct, sen, data=None, ctxs=None):
-        if data is None:
-            data = {}
-
-        if NEGATION_S in sen.data and sen.data[NEGATION_S]:
-            return self._delete(struct, sen, data)
-
-        # Get the root
-        # TODO: Ensure the struct is appropriate
-        current = self.default[0].up(struct.root)
-        for word in sen:
-            semantics, _ = self.lookup(current)
-            accessible = semantics.access(current, word, data)
-            if bool(accessible):
-                current = accessible[0]
-            else:
-                next_semantics, _ = self.lookup(word)
-                new_node = next_semantics.make(word, data)
-                current = semantics.insert(current, new_node, data)
-
-        return current
-
-
-    def _delete(self, struct, sen, data=None, ctxs=None):
-        parent = struct.root
-        current = struct.root
-
-        for word in sen:
-            # Get independent semantics for current
-            semantics, _ = self.lookup(current)
-            accessed = semantics.access(current, word, data)
-            if bool(accessed):
-                parent = current
-                current = accessed[0]
-            else:
-                return None
-
-        # At leaf:
-        # remove current from parent
-        semantics, _ = self.lookup(parent)
-        semantics.remove(parent, current.value, data)
-
-        return current
 
+    Insertion and retraction are as BreadthTrieSemantics.
+    Queries finish one binding before expanding the next,
+    so hold a partial context per word of the query,
+    instead of every partial context at each depth.
+    Only completed contexts are added to the context set.
+    See BreadthTrieSemantics._search
+    """
 
-    def query(self, struct, sen, data=None, ctxs=None):
+    def query(self, sen, struct, data=None, ctxs=None):
         """ Depth First Search Query """
         if ctxs is None:
             raise ASErr.AcabSemanticException("Ctxs is none to TrieSemantics.query", sen)
 
-        negated_query = False
-        if NEGATION_S in sen.data and sen.data[NEGATION_S]:
-            negated_query = True
-
-        # TODO get collapse vars from the sentence
-        collapse_vars = []
-        with ctxs(struct.root, sen, data, collapse_vars, negated_query):
-            while ctxs.active:
-                currentInst = ctxs.pop(top=True)
-                try:
-                    remaining_sen = sen.words[:]
-                    if currentInst._remaining_query is not None:
-                        remaining_sen = currentInst._remaining_query
-
-                    while bool(remaining_sen):
-                        word = remaining_sen.pop(0)
-                        indep, _ = self.lookup(currentInst._current)
-                        search_word = word
-                        # Handle variable:
-                        if word.is_var and word not in ctxInst:
-                            search_word = None
-                        elif word.is_var and word in ctxInst:
-                            # Word is var, but bound, so look for that instead
-                            search_word = currentInst[word]
-
-
-                        results = indep.access(currentInst._current,
-                                               search_word,
-                                               datac)
-
-                        # TODO to make this depth first,
-                        # the current ctxInst needs to be updated
-                        # as the search progresses
-                        if not bool(results):
-                            ctxs.fail(currentInst, word, None)
-                            raise ASErr.AcabSemanticQueryContextDepletionFailure("Ctx has failed, going to next", None)
-                        else:
-                            new_active_ctxs = ctxs.test(currentInst, results, word)
-                            if not bool(new_active_ctxs):
-                                raise ASErr.AcabSemanticQueryContextDepletionFailure("No Successes, switch to next context", None)
-                            for ctxInst in new_active_ctxs:
-                                ctx_inst._remaining_query = remaining_sen[:]
-
-                            currentInst = new_active_ctxs.pop(0)
-
-                except ASErr.AcabSemanticQueryContextDepletionFailure as err:
-                    continue
+        with ContextQueryManager(sen, struct.root, ctxs) as cqm:
+            if cqm.negated:
+                cqm.exists = lambda x: self._exists(x, cqm.constraints, sen, data)
+            else:
+                for ctxInst in ctxs.active_list(clear=True):
+                    for result in self._search(ctxInst, cqm.constraints, sen, data, fail=ctxs.fail):
+                        ctxs.push(result)
 
         return ctxs
-
-
-    def trigger(self, struct, sen, data=None, ctxs=None):
-        pass
@@ -1,16 +1,26 @@
+import operator
+
 from acab.core.data.production_abstractions import ProductionOperator
-from acab.core.decorators.semantics import OperatorArgUnWrap, OperatorResultWrap
+from acab.core.decorators.semantic import (OperatorArgUnWrap,
+                                           OperatorBatchUnWrap)
+from acab.core.util.vectorise import compare
 
 
 class GT(ProductionOperator):
     @OperatorArgUnWrap
-    @OperatorResultWrap
     def __call__(self, a, b, data=None):
         return a > b
 
+    @OperatorBatchUnWrap
+    def batch(self, values, b, data=None):
+        return compare(operator.gt, values, b)
+
 
 class LT(ProductionOperator):
     @OperatorArgUnWrap
-    @OperatorResultWrap
     def __call__(self, a, b, data=None):
         return a < b
+
+    @OperatorBatchUnWrap
+    def batch(self, values, b, data=None):
+        return compare(operator.lt, values, b)